@@ -0,0 +1,95 @@
+import argparse
+import os
+import sys
+import timeit
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from wildfire_processing_functions import separate_date_series_to_Y_m_d  # noqa: E402
+
+
+def create_hourly_date_series(
+    number_of_rows: int,
+    date_format: str = "%Y-%m-%d %H:%M",
+    dtype: str = "object",
+) -> pd.Series:
+    """
+    Create a series of hourly date strings like the Whitesands F4 weather_date column
+
+    Parameters
+    ----------
+    number_of_rows : int
+        The number of rows of the series
+    date_format : str, optional
+        The format of the dates. Default is "%Y-%m-%d %H:%M".
+    dtype : str, optional
+        The dtype of the series, e.g. "object" or "string[pyarrow]".
+        Default is "object".
+
+    Returns
+    -------
+    date_series : Series
+        The series of date strings
+    """
+    dates = pd.date_range("1980-01-01", periods=number_of_rows, freq="h")
+    date_series = pd.Series(dates.strftime(date_format), dtype=dtype)
+
+    return date_series
+
+
+if __name__ == "__main__":
+    # This script compares the fixed-width fast path of
+    # separate_date_series_to_Y_m_d with the pd.to_datetime path.
+
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "-n",
+        "--number_of_rows",
+        type=int,
+        default=1000000,
+        help="Number of rows of the benchmarked date series.",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=5,
+        help="Number of timed repetitions of each path.",
+    )
+    parser.add_argument(
+        "-d",
+        "--dtypes",
+        nargs="+",
+        default=["object", "string[pyarrow]"],
+        help="Dtypes of the benchmarked date series.",
+    )
+    args = parser.parse_args()
+
+    for dtype in args.dtypes:
+        date_series = create_hourly_date_series(args.number_of_rows, dtype=dtype)
+        print(f"\n{args.number_of_rows} rows of {dtype} dates")
+
+        fast_result = separate_date_series_to_Y_m_d(date_series, use_fast_path=True)
+        slow_result = separate_date_series_to_Y_m_d(date_series, use_fast_path=False)
+        for column_name in slow_result.columns:
+            np.testing.assert_array_equal(fast_result[column_name], slow_result[column_name])
+
+        timings = {}
+        for path_name, use_fast_path in [("to_datetime", False), ("fixed_width", True)]:
+            timings[path_name] = min(
+                timeit.repeat(
+                    lambda: separate_date_series_to_Y_m_d(date_series, use_fast_path=use_fast_path),
+                    number=1,
+                    repeat=args.repeat,
+                )
+            )
+            print(f"{path_name:>12}: {timings[path_name]:.3f} s")
+
+        print(f"     speedup: {timings['to_datetime'] / timings['fixed_width']:.1f}x")
+        print(
+            f"      memory: {slow_result.memory_usage(index=False).sum() / 1e6:.1f} MB (to_datetime) vs "
+            f"{fast_result.memory_usage(index=False).sum() / 1e6:.1f} MB (fixed_width)"
+        )
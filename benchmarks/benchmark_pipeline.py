@@ -0,0 +1,447 @@
+import argparse
+import copy
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from wildfire_processing_functions import (  # noqa: E402
+    load_json_file,
+    create_nfdb_filter_arguments,
+    create_whitesands_f4_filter_arguments,
+    read_vector_file_into_gdf,
+    read_csv_file_into_df,
+    filter_nfdb_data,
+    separate_date_series_to_Y_m_d,
+    filter_whitesands_f4_data,
+    create_memory_usage_message,
+    aggregate_nfdb_data,
+    aggregate_whitesands_f4_data,
+    aggregate_wind_rose,
+    create_nfdb_figure_tasks,
+    create_whitesands_f4_figure_tasks,
+    render_figures,
+)
+from synthetic_data import write_synthetic_data_package  # noqa: E402
+
+
+DEFAULT_CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "src", "wildfire_config.json"
+)
+
+
+def create_benchmark_config(
+    config: dict,
+    data_paths: dict,
+    cache_dir: str,
+) -> dict:
+    """
+    Point a copy of the configuration parameters at a synthetic data package
+
+    The region of interest is moved to the centre of the synthetic Alberta
+    fires and every fire counts as large, so that every scale has fires to
+    filter, aggregate, and plot.
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    data_paths : dict
+        The output of `write_synthetic_data_package`
+    cache_dir : str
+        The directory of the columnar cache files
+
+    Returns
+    -------
+    benchmark_config : dict
+        The configuration parameters of the benchmark
+    """
+    benchmark_config = copy.deepcopy(config)
+    benchmark_config["data_package_dir"] = os.path.dirname(data_paths["nfdb"])
+    benchmark_config["cache_dir"] = cache_dir
+    benchmark_config["NFDB_data"]["file_name"] = os.path.basename(data_paths["nfdb"])
+    benchmark_config["NFDB_data"]["region_of_interest"].update(
+        {
+            "province_or_territory_name": "AB",
+            "region_centre_latitude": "54°30'00''N",
+            "region_centre_longitude": "115°00'00''W",
+            "region_radius": 3,
+        }
+    )
+    benchmark_config["NFDB_data"]["fire_conditions"]["min_fire_size"] = 0
+    benchmark_config["Whitesands_F4_data"]["file_name"] = os.path.basename(data_paths["whitesands_f4"])
+
+    return benchmark_config
+
+
+def time_stage(
+    function,
+    repeat: int,
+) -> tuple:
+    """
+    Time a stage several times and keep the fastest run
+
+    Parameters
+    ----------
+    function : callable
+        The stage as a function without arguments
+    repeat : int
+        The number of timed runs
+
+    Returns
+    -------
+    seconds : float
+        The wall time of the fastest run in seconds
+    result : any
+        The result of the last run
+    """
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start_time)
+
+    return min(timings), result
+
+
+def run_benchmark_at_scale(
+    config: dict,
+    scale_factor: float,
+    work_dir: str,
+    repeat: int,
+    seed: int = 0,
+    scale_name: str = None,
+) -> dict:
+    """
+    Benchmark the pipeline stages on a synthetic data package of one size
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    scale_factor : float
+        The size of the synthetic datasets relative to the real ones
+    work_dir : str
+        The directory of the synthetic data packages, caches, and figures.
+        Data packages already written there are reused.
+    repeat : int
+        The number of timed runs of each stage
+    seed : int, optional
+        The seed of the synthetic data. Default is 0.
+    scale_name : str, optional
+        The name of the scale in the printed timings, e.g. "10x". Default is
+        None, which uses the scale factor.
+
+    Returns
+    -------
+    stage_results : dict
+        {stage name: {"seconds": float, "rows": int}} in the order the stages ran
+    """
+    if scale_name is None:
+        scale_name = f"{scale_factor:g}x"
+    scale_dir = os.path.join(work_dir, f"scale_{scale_factor:g}_seed_{seed}")
+    data_package_dir = os.path.join(scale_dir, "data_package")
+    cache_dir = os.path.join(scale_dir, "cache")
+    figure_dir = os.path.join(scale_dir, "figures")
+    os.makedirs(figure_dir, exist_ok=True)
+
+    data_paths_file = os.path.join(scale_dir, "data_paths.json")
+    if os.path.exists(data_paths_file):
+        data_paths = load_json_file(data_paths_file)
+    else:
+        print(f"Writing the synthetic data package to {data_package_dir}")
+        data_paths = write_synthetic_data_package(data_package_dir, scale_factor=scale_factor, seed=seed)
+        with open(data_paths_file, "w") as f:
+            json.dump(data_paths, f, indent=4)
+
+    benchmark_config = create_benchmark_config(config, data_paths, cache_dir)
+    nfdb_filter_arguments = create_nfdb_filter_arguments(benchmark_config)
+    whitesands_f4_filter_arguments = create_whitesands_f4_filter_arguments(benchmark_config)
+    date_column_name = whitesands_f4_filter_arguments["date_column_name"]
+
+    stages = [
+        (
+            "read_vector_file_into_gdf (no cache)",
+            lambda: read_vector_file_into_gdf(data_paths["nfdb"], use_cache=False),
+        ),
+        (
+            "read_vector_file_into_gdf (cold cache)",
+            lambda: read_vector_file_into_gdf(data_paths["nfdb"], rebuild_cache=True, cache_dir=cache_dir),
+        ),
+        (
+            "read_vector_file_into_gdf (warm cache)",
+            lambda: read_vector_file_into_gdf(data_paths["nfdb"], cache_dir=cache_dir),
+        ),
+        (
+            "filter_nfdb_data",
+            lambda: filter_nfdb_data(**nfdb_filter_arguments),
+        ),
+        (
+            "separate_date_series_to_Y_m_d",
+            lambda: separate_date_series_to_Y_m_d(weather_date_series),
+        ),
+        (
+            "filter_whitesands_f4_data",
+            lambda: filter_whitesands_f4_data(**whitesands_f4_filter_arguments),
+        ),
+        (
+            "aggregate_nfdb_data",
+            lambda: aggregate_nfdb_data(
+                filtered_nfdb_data,
+                year_column=benchmark_config["NFDB_data"]["time_of_interest"]["year_column_name"],
+                month_column=benchmark_config["NFDB_data"]["time_of_interest"]["month_column_name"],
+                fire_size_column=benchmark_config["NFDB_data"]["fire_conditions"]["fire_size_column_name"],
+                min_fire_size=benchmark_config["NFDB_data"]["fire_conditions"]["min_fire_size"],
+            ),
+        ),
+        (
+            "aggregate_whitesands_f4_data",
+            lambda: aggregate_whitesands_f4_data(
+                filtered_whitesands_f4_data,
+                wind_direction_column_name=benchmark_config["Whitesands_F4_data"]["weather_data"][
+                    "wind_direction_column_name"
+                ],
+            ),
+        ),
+        (
+            "aggregate_wind_rose",
+            lambda: aggregate_wind_rose(
+                filtered_whitesands_f4_data,
+                wind_direction_column_name=benchmark_config["Whitesands_F4_data"]["weather_data"][
+                    "wind_direction_column_name"
+                ],
+                wind_speed_column_name=benchmark_config["Whitesands_F4_data"]["weather_data"][
+                    "wind_speed_column_name"
+                ],
+            ),
+        ),
+        (
+            "render_figures",
+            lambda: render_figures(
+                create_nfdb_figure_tasks(benchmark_config, filtered_nfdb_data_large_fires)
+                + create_whitesands_f4_figure_tasks(benchmark_config, whitesands_f4_summary, wind_rose),
+                output_dir=figure_dir,
+                file_formats=["png"],
+                max_workers=1,
+            ),
+        ),
+    ]
+
+    stage_results = {}
+    for stage_name, stage_function in stages:
+        seconds, result = time_stage(stage_function, repeat)
+        stage_results[stage_name] = {
+            "seconds": seconds,
+            "rows": len(result),
+        }
+        print(f"{scale_name:>6} {stage_name:<40} {seconds:>9.3f} s {len(result):>10} rows")
+        if isinstance(result, pd.DataFrame):
+            memory_usage_message = create_memory_usage_message(result, data_name=f"{'':>7} The {stage_name} output")
+            if memory_usage_message is not None:
+                print(memory_usage_message)
+
+        # the inputs of the later stages
+        if stage_name == "read_vector_file_into_gdf (warm cache)":
+            weather_date_series = read_csv_file_into_df(
+                data_paths["whitesands_f4"], cache_dir=cache_dir
+            )[date_column_name]
+        elif stage_name == "filter_nfdb_data":
+            filtered_nfdb_data = result
+            fire_size_column_name = benchmark_config["NFDB_data"]["fire_conditions"]["fire_size_column_name"]
+            filtered_nfdb_data_large_fires = filtered_nfdb_data[
+                filtered_nfdb_data[fire_size_column_name]
+                > benchmark_config["NFDB_data"]["fire_conditions"]["min_fire_size"]
+            ]
+        elif stage_name == "filter_whitesands_f4_data":
+            filtered_whitesands_f4_data = result
+        elif stage_name == "aggregate_whitesands_f4_data":
+            whitesands_f4_summary = result
+        elif stage_name == "aggregate_wind_rose":
+            wind_rose = result
+
+    return stage_results
+
+
+def compare_benchmark_results(
+    benchmark_results: dict,
+    baseline_results: dict,
+    tolerance: float,
+    min_seconds: float = 0.05,
+) -> list:
+    """
+    Compare benchmark results with a baseline and find the regressed stages
+
+    A stage regresses if its fastest run is both relatively and absolutely
+    slower than the baseline, so the timer noise of stages of a few
+    milliseconds is not reported as a regression.
+
+    Parameters
+    ----------
+    benchmark_results : dict
+        The benchmark results
+    baseline_results : dict
+        The baseline results written by an earlier run
+    tolerance : float
+        The allowed relative slowdown, e.g. 0.25 for 25%
+    min_seconds : float, optional
+        The allowed absolute slowdown in seconds. Default is 0.05.
+
+    Returns
+    -------
+    regressions : list
+        The (scale, stage name, baseline seconds, seconds) of the regressed stages
+    """
+    regressions = []
+    print(f"\n{'scale':>6} {'stage':<40} {'baseline':>9} {'current':>9} {'ratio':>7}")
+    for scale, stage_results in benchmark_results["results"].items():
+        baseline_stage_results = baseline_results["results"].get(scale, {})
+        for stage_name, stage_result in stage_results.items():
+            if stage_name not in baseline_stage_results:
+                continue
+            baseline_seconds = baseline_stage_results[stage_name]["seconds"]
+            ratio = stage_result["seconds"] / baseline_seconds if baseline_seconds > 0 else np.inf
+            is_regression = ratio > 1 + tolerance and stage_result["seconds"] - baseline_seconds > min_seconds
+            print(
+                f"{scale:>6} {stage_name:<40} {baseline_seconds:>9.3f} {stage_result['seconds']:>9.3f} "
+                f"{ratio:>6.2f}x{' REGRESSION' if is_regression else ''}"
+            )
+            if is_regression:
+                regressions.append((scale, stage_name, baseline_seconds, stage_result["seconds"]))
+
+    return regressions
+
+
+if __name__ == "__main__":
+    # This script times the pipeline stages on synthetic NFDB and Whitesands F4
+    # data at several scales, writes the timings to a JSON baseline, and
+    # optionally compares them with an earlier baseline.
+
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "-s",
+        "--scales",
+        type=float,
+        nargs="+",
+        default=[1, 10, 100],
+        help="Scale factors of the synthetic data, in units of the base fraction.",
+    )
+    parser.add_argument(
+        "-b",
+        "--base_fraction",
+        type=float,
+        default=0.01,
+        help="Size of the 1x synthetic data relative to the real datasets "
+        "(423,832 NFDB points and 203,910 hourly rows), so that 100x is the real size by default.",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of timed runs of each stage. The fastest run is kept.",
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        type=str,
+        default=DEFAULT_CONFIG_PATH,
+        help="Path to the configuration file whose time of interest is benchmarked.",
+    )
+    parser.add_argument(
+        "-w",
+        "--work_dir",
+        type=str,
+        default=os.path.join(tempfile.gettempdir(), "wildfire_benchmark"),
+        help="Directory of the synthetic data packages. They are reused across runs.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default="benchmark_results.json",
+        help="Path to the JSON file to write the results to.",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        default=None,
+        help="Path to an earlier JSON results file to compare the results with.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Relative slowdown of a stage over the baseline reported as a regression.",
+    )
+    parser.add_argument(
+        "--min_seconds",
+        type=float,
+        default=0.05,
+        help="Absolute slowdown of a stage over the baseline in seconds below which it is not a regression.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed of the synthetic data.",
+    )
+    args = parser.parse_args()
+    if args.baseline is not None and args.repeat < 3:
+        # a single run is too noisy to be compared with a baseline
+        parser.error("At least 3 runs of each stage (--repeat) are needed to compare with a baseline.")
+
+    config = load_json_file(args.config)
+    benchmark_results = {
+        "metadata": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "geopandas": gpd.__version__,
+            "base_fraction": args.base_fraction,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    for scale in args.scales:
+        # the printed timings and the saved results use the same scale names
+        scale_name = f"{scale:g}x"
+        print(f"{scale_name}: {scale * args.base_fraction:g} of the real dataset sizes")
+        benchmark_results["results"][scale_name] = run_benchmark_at_scale(
+            config,
+            scale_factor=scale * args.base_fraction,
+            work_dir=args.work_dir,
+            repeat=args.repeat,
+            seed=args.seed,
+            scale_name=scale_name,
+        )
+
+    with open(args.output, "w") as f:
+        json.dump(benchmark_results, f, indent=4)
+    print(f"Benchmark results saved to {args.output}")
+
+    if args.baseline is not None:
+        regressions = compare_benchmark_results(
+            benchmark_results,
+            load_json_file(args.baseline),
+            tolerance=args.tolerance,
+            min_seconds=args.min_seconds,
+        )
+        if regressions:
+            print(
+                f"{len(regressions)} stages are more than {args.tolerance:.0%} and"
+                f" {args.min_seconds:g} s slower than the baseline."
+            )
+            sys.exit(1)
+        print("No stage is slower than the baseline.")
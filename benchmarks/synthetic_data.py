@@ -0,0 +1,212 @@
+import os
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+
+# number of points and rows of the real NFDB and Whitesands F4 datasets
+NFDB_NUMBER_OF_POINTS = 423832
+WHITESANDS_F4_NUMBER_OF_ROWS = 203910
+
+# approximate (min lat, max lat, min lon, max lon) of the NFDB source agencies
+NFDB_AGENCY_EXTENTS = {
+    "AB": (49.0, 60.0, -120.0, -110.0),
+    "BC": (48.3, 60.0, -139.0, -114.0),
+    "SK": (49.0, 60.0, -110.0, -101.4),
+    "MB": (49.0, 60.0, -102.0, -89.0),
+    "ON": (41.7, 56.9, -95.2, -74.3),
+    "QC": (45.0, 62.6, -79.8, -57.1),
+    "NT": (60.0, 70.0, -136.0, -102.0),
+    "YT": (60.0, 69.6, -141.0, -124.0),
+    "PC": (48.5, 69.0, -140.0, -60.0),
+}
+NFDB_AGENCY_WEIGHTS = [0.16, 0.22, 0.08, 0.07, 0.19, 0.17, 0.04, 0.02, 0.05]
+NFDB_CAUSES = ["H", "L", "U", "H-PB", "RE"]
+NFDB_FIRE_TYPES = ["Fire", "IFM", "Prescribed Burn"]
+WIND_DIRECTION_TYPES = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
+
+
+def create_synthetic_nfdb_data(
+    number_of_points: int,
+    start_year: int = 1980,
+    end_year: int = 2022,
+    seed: int = 0,
+) -> gpd.GeoDataFrame:
+    """
+    Create synthetic fire points with the schema of the NFDB point shapefile
+
+    Parameters
+    ----------
+    number_of_points : int
+        The number of fire points
+    start_year : int, optional
+        The first year of the fires. Default is 1980.
+    end_year : int, optional
+        The last year of the fires. Default is 2022.
+    seed : int, optional
+        The seed of the random number generator. Default is 0.
+
+    Returns
+    -------
+    nfdb_data_gdf : GeoDataFrame
+        The synthetic NFDB data in EPSG:4326
+    """
+    rng = np.random.default_rng(seed)
+
+    agency_names = list(NFDB_AGENCY_EXTENTS)
+    agencies = rng.choice(len(agency_names), size=number_of_points, p=NFDB_AGENCY_WEIGHTS)
+    extents = np.array([NFDB_AGENCY_EXTENTS[agency_name] for agency_name in agency_names])[agencies]
+    latitudes = rng.uniform(extents[:, 0], extents[:, 1])
+    longitudes = rng.uniform(extents[:, 2], extents[:, 3])
+
+    years = rng.integers(start_year, end_year + 1, size=number_of_points)
+    # most fires happen in the summer months
+    months = rng.choice(
+        np.arange(1, 13),
+        size=number_of_points,
+        p=[0.01, 0.01, 0.02, 0.08, 0.16, 0.18, 0.22, 0.18, 0.08, 0.04, 0.01, 0.01],
+    )
+    days = rng.integers(1, 29, size=number_of_points)
+    report_dates = pd.to_datetime(
+        pd.DataFrame({"year": years, "month": months, "day": days})
+    ).dt.strftime("%Y/%m/%d")
+
+    nfdb_data_gdf = gpd.GeoDataFrame(
+        {
+            "NFDB_ID": [f"{agency_names[agency]}-{i}" for i, agency in enumerate(agencies)],
+            "SRC_AGENCY": np.array(agency_names)[agencies],
+            "FIRE_ID": rng.integers(1, 100000, size=number_of_points).astype(str),
+            "LATITUDE": latitudes.round(4),
+            "LONGITUDE": longitudes.round(4),
+            "YEAR": years,
+            "MONTH": months,
+            "DAY": days,
+            "REP_DATE": report_dates,
+            "DECADE": [f"{year // 10 * 10}-{year // 10 * 10 + 9}" for year in years],
+            # heavy-tailed fire sizes, with a few percent of fires over 200 ha
+            "SIZE_HA": np.round(rng.lognormal(mean=0.0, sigma=2.5, size=number_of_points), 2),
+            "CAUSE": rng.choice(NFDB_CAUSES, size=number_of_points),
+            "FIRE_TYPE": rng.choice(NFDB_FIRE_TYPES, size=number_of_points, p=[0.95, 0.03, 0.02]),
+            "ECOZONE": rng.integers(1, 16, size=number_of_points),
+        },
+        geometry=gpd.points_from_xy(longitudes, latitudes),
+        crs="EPSG:4326",
+    )
+
+    return nfdb_data_gdf
+
+
+def create_synthetic_whitesands_f4_data(
+    number_of_rows: int,
+    start_date: str = "1999-06-01",
+    end_date: str = "2022-09-01",
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Create synthetic hourly weather rows with the schema of the Whitesands F4 CSV file
+
+    The rows are spread evenly over the period, so any number of rows covers
+    the same years. Fewer rows than hours in the period skip hours and more
+    rows repeat them.
+
+    Parameters
+    ----------
+    number_of_rows : int
+        The number of hourly rows
+    start_date : str, optional
+        The date of the first row. Default is "1999-06-01".
+    end_date : str, optional
+        The date of the last row. Default is "2022-09-01".
+    seed : int, optional
+        The seed of the random number generator. Default is 0.
+
+    Returns
+    -------
+    whitesands_f4_data_df : DataFrame
+        The synthetic Whitesands F4 data
+    """
+    rng = np.random.default_rng(seed)
+
+    weather_dates = pd.date_range(start_date, end_date, periods=number_of_rows).floor("h")
+    day_of_year = weather_dates.dayofyear.to_numpy()
+    hour = weather_dates.hour.to_numpy()
+    seasonal_temperature = 4 - 16 * np.cos(2 * np.pi * (day_of_year - 15) / 365.25)
+    daily_temperature = seasonal_temperature + 5 * np.sin(2 * np.pi * (hour - 9) / 24)
+    temperature = daily_temperature + rng.normal(0, 3, size=number_of_rows)
+
+    wind_speed = np.round(rng.gamma(shape=2.0, scale=6.0, size=number_of_rows), 1)
+    wind_speed[rng.random(number_of_rows) < 0.05] = 0.0
+    wind_direction = rng.integers(0, 360, size=number_of_rows)
+    wind_direction_types = np.array(WIND_DIRECTION_TYPES)[((wind_direction + 22.5) // 45).astype(int) % 8]
+    wind_direction_types = np.where(wind_speed == 0, "CLM", wind_direction_types)
+
+    relative_humidity = np.clip(
+        70 - 1.5 * (temperature - seasonal_temperature) + rng.normal(0, 12, size=number_of_rows),
+        5,
+        100,
+    ).round()
+
+    whitesands_f4_data_df = pd.DataFrame(
+        {
+            "station_id": "F4",
+            "station_name": "WHITESANDS",
+            "latitude": 52.467,
+            "longitude": -112.817,
+            "weather_date": weather_dates.strftime("%Y-%m-%d %H:%M"),
+            "temperature": temperature.round(1),
+            "minimum_temperature": (temperature - np.abs(rng.normal(1.5, 0.5, size=number_of_rows))).round(1),
+            "maximum_temperature": (temperature + np.abs(rng.normal(1.5, 0.5, size=number_of_rows))).round(1),
+            "relative_humidity": relative_humidity,
+            "rh_max_h": np.minimum(relative_humidity + rng.integers(0, 10, size=number_of_rows), 100),
+            "wind_speed_kmh": wind_speed,
+            "wind_direction": wind_direction,
+            "c_wnd_drct_type": wind_direction_types,
+            "precipitation": np.round(rng.exponential(0.3, size=number_of_rows) * (rng.random(number_of_rows) < 0.1), 1),
+        }
+    )
+
+    return whitesands_f4_data_df
+
+
+def write_synthetic_data_package(
+    data_package_dir: str,
+    scale_factor: float = 1.0,
+    seed: int = 0,
+) -> dict:
+    """
+    Write a synthetic NFDB shapefile and Whitesands F4 CSV file to a data package directory
+
+    Parameters
+    ----------
+    data_package_dir : str
+        The data_package directory to write the files to
+    scale_factor : float, optional
+        The size of the datasets relative to the real ones
+        (423,832 NFDB points and 203,910 hourly rows). Default is 1.0.
+    seed : int, optional
+        The seed of the random number generator. Default is 0.
+
+    Returns
+    -------
+    data_paths : dict
+        The paths and sizes of the written files as
+        {"nfdb": path, "whitesands_f4": path, "nfdb_points": n, "whitesands_f4_rows": n}
+    """
+    os.makedirs(data_package_dir, exist_ok=True)
+
+    number_of_points = max(1, round(NFDB_NUMBER_OF_POINTS * scale_factor))
+    number_of_rows = max(1, round(WHITESANDS_F4_NUMBER_OF_ROWS * scale_factor))
+    data_paths = {
+        "nfdb": os.path.join(data_package_dir, "NFDB_point_synthetic.shp"),
+        "whitesands_f4": os.path.join(data_package_dir, "Whitesands_F4_synthetic.csv"),
+        "nfdb_points": number_of_points,
+        "whitesands_f4_rows": number_of_rows,
+    }
+
+    create_synthetic_nfdb_data(number_of_points, seed=seed).to_file(data_paths["nfdb"])
+    create_synthetic_whitesands_f4_data(number_of_rows, seed=seed).to_csv(
+        data_paths["whitesands_f4"],
+        index=False,
+    )
+
+    return data_paths
@@ -0,0 +1,192 @@
+import os
+import json
+import geopandas as gpd
+import pandas as pd
+from wildfire_instrumentation import instrument_function
+from wildfire_processing_functions import (
+    validate_type,
+    aggregate_nfdb_data,
+    aggregate_whitesands_f4_data,
+    aggregate_wind_rose,
+    create_nfdb_summary_figure_tasks,
+    create_whitesands_f4_figure_tasks,
+)
+
+
+# file names of the tables and the metadata of an aggregate cube directory
+AGGREGATE_CUBE_FILE_NAMES = {
+    "nfdb": "nfdb_cube.parquet",
+    "whitesands_f4": "whitesands_f4_cube.parquet",
+    "wind_rose": "wind_rose_cube.parquet",
+}
+AGGREGATE_CUBE_METADATA_FILE_NAME = "cube_metadata.json"
+
+
+@instrument_function
+def create_aggregate_cube(
+    config: dict,
+    filtered_nfdb_data: gpd.GeoDataFrame,
+    filtered_whitesands_f4_data: pd.DataFrame,
+    whitesands_f4_summary: pd.DataFrame = None,
+) -> dict:
+    """
+    Create the aggregate cube of the filtered NFDB and Whitesands F4 data
+
+    The cube holds the NFDB fire and large fire counts per year and month, the
+    Whitesands F4 measurement counts and variable sums per month, year, and
+    wind direction, and the wind rose counts per month, direction sector, and
+    wind speed class. Every figure except the fire maps can be drawn from it.
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    filtered_nfdb_data : GeoDataFrame
+        The output of `filter_nfdb_data`
+    filtered_whitesands_f4_data : DataFrame
+        The output of `filter_whitesands_f4_data`
+    whitesands_f4_summary : DataFrame, optional
+        The output of `aggregate_whitesands_f4_data` for the filtered
+        Whitesands F4 data if it is already known, e.g. from the incremental
+        ingestion. Default is None, which aggregates the data.
+
+    Returns
+    -------
+    aggregate_cube : dict
+        The cube tables as {"nfdb": DataFrame, "whitesands_f4": DataFrame,
+        "wind_rose": DataFrame}
+    """
+    validate_type(config, dict, "config")
+    validate_type(filtered_nfdb_data, gpd.GeoDataFrame, "filtered_nfdb_data")
+    validate_type(filtered_whitesands_f4_data, pd.DataFrame, "filtered_whitesands_f4_data")
+
+    aggregate_cube = {
+        "nfdb": aggregate_nfdb_data(
+            filtered_nfdb_data,
+            year_column=config["NFDB_data"]["time_of_interest"]["year_column_name"],
+            month_column=config["NFDB_data"]["time_of_interest"]["month_column_name"],
+            fire_size_column=config["NFDB_data"]["fire_conditions"]["fire_size_column_name"],
+            min_fire_size=config["NFDB_data"]["fire_conditions"]["min_fire_size"],
+        ),
+        "whitesands_f4": aggregate_whitesands_f4_data(
+            filtered_whitesands_f4_data,
+            wind_direction_column_name=config["Whitesands_F4_data"]["weather_data"]["wind_direction_column_name"],
+        ) if whitesands_f4_summary is None else whitesands_f4_summary,
+        "wind_rose": aggregate_wind_rose(
+            filtered_whitesands_f4_data,
+            wind_direction_column_name=config["Whitesands_F4_data"]["weather_data"]["wind_direction_column_name"],
+            wind_speed_column_name=config["Whitesands_F4_data"]["weather_data"]["wind_speed_column_name"],
+            number_of_sectors=config["Whitesands_F4_data"].get("wind_rose", {}).get("number_of_sectors", 8),
+            speed_class_edges=config["Whitesands_F4_data"].get("wind_rose", {}).get("speed_class_edges"),
+        ),
+    }
+
+    return aggregate_cube
+
+
+@instrument_function
+def write_aggregate_cube(
+    aggregate_cube: dict,
+    cube_dir: str,
+    config: dict,
+) -> None:
+    """
+    Write the aggregate cube tables and the config they were created with to a directory
+
+    Parameters
+    ----------
+    aggregate_cube : dict
+        The output of `create_aggregate_cube`
+    cube_dir : str
+        The directory to write the cube to. It is created if it does not exist.
+    config : dict
+        The configuration parameters used to create the cube
+    """
+    validate_type(aggregate_cube, dict, "aggregate_cube")
+    validate_type(cube_dir, str, "cube_dir")
+    validate_type(config, dict, "config")
+
+    os.makedirs(cube_dir, exist_ok=True)
+    for table_name, file_name in AGGREGATE_CUBE_FILE_NAMES.items():
+        aggregate_cube[table_name].to_parquet(os.path.join(cube_dir, file_name), index=False)
+
+    cube_metadata = {
+        "NFDB_data": config["NFDB_data"],
+        "Whitesands_F4_data": config["Whitesands_F4_data"],
+    }
+    with open(os.path.join(cube_dir, AGGREGATE_CUBE_METADATA_FILE_NAME), "w") as f:
+        json.dump(cube_metadata, f, indent=4)
+
+
+@instrument_function
+def read_aggregate_cube(
+    cube_dir: str,
+) -> dict:
+    """
+    Read an aggregate cube written by `write_aggregate_cube`
+
+    Parameters
+    ----------
+    cube_dir : str
+        The directory of the cube
+
+    Returns
+    -------
+    aggregate_cube : dict
+        The cube tables as {"nfdb": DataFrame, "whitesands_f4": DataFrame,
+        "wind_rose": DataFrame}
+        and the config sections it was created with as "metadata"
+    """
+    validate_type(cube_dir, str, "cube_dir")
+
+    if not os.path.exists(os.path.join(cube_dir, AGGREGATE_CUBE_METADATA_FILE_NAME)):
+        raise ValueError(
+            f"No aggregate cube found in {cube_dir}. "
+            f"Run the analysis with the aggregate_cube config section enabled first."
+        )
+
+    for table_name, file_name in AGGREGATE_CUBE_FILE_NAMES.items():
+        if not os.path.exists(os.path.join(cube_dir, file_name)):
+            raise ValueError(
+                f"The aggregate cube in {cube_dir} has no {table_name} table. "
+                f"Run the analysis with the aggregate_cube config section enabled again."
+            )
+    aggregate_cube = {
+        table_name: pd.read_parquet(os.path.join(cube_dir, file_name))
+        for table_name, file_name in AGGREGATE_CUBE_FILE_NAMES.items()
+    }
+    with open(os.path.join(cube_dir, AGGREGATE_CUBE_METADATA_FILE_NAME), "r") as f:
+        aggregate_cube["metadata"] = json.load(f)
+
+    return aggregate_cube
+
+
+def create_aggregate_cube_figure_tasks(
+    config: dict,
+    aggregate_cube: dict,
+) -> list:
+    """
+    Create the figure tasks that can be drawn from the aggregate cube alone
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    aggregate_cube : dict
+        The output of `create_aggregate_cube` or `read_aggregate_cube`
+
+    Returns
+    -------
+    figure_tasks : list
+        A list of (figure name, plot function, plot arguments) tuples
+    """
+    validate_type(config, dict, "config")
+    validate_type(aggregate_cube, dict, "aggregate_cube")
+
+    figure_tasks = create_nfdb_summary_figure_tasks(
+        config, aggregate_cube["nfdb"]
+    ) + create_whitesands_f4_figure_tasks(
+        config, aggregate_cube["whitesands_f4"], aggregate_cube["wind_rose"]
+    )
+
+    return figure_tasks
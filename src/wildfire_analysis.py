@@ -1,15 +1,43 @@
 import argparse
 import os
+import sys
 import json
-from wildfire_processing_functions_BY import (
+from wildfire_processing_functions import (
     load_json_file,
     create_data_file_path,
-    convert_coordinate_to_float,
-    convert_month_to_int,
+    create_nfdb_filter_arguments,
+    create_whitesands_f4_filter_arguments,
+    run_tasks_concurrently,
+    create_memory_usage_message,
     filter_nfdb_data,
     filter_whitesands_f4_data,
-    visualize_nfdb_results,
-    visualize_whitesands_F4_results,
+    create_nfdb_figure_tasks,
+    create_whitesands_f4_figure_tasks,
+    visualize_figures,
+)
+from wildfire_instrumentation import (
+    enable_instrumentation,
+    measure_stage,
+    write_instrumentation_report,
+)
+from wildfire_incremental_ingestion import (
+    update_whitesands_f4_data_incrementally,
+    read_incrementally_ingested_whitesands_f4_data,
+)
+from wildfire_multi_station import find_station_files, process_weather_stations
+from wildfire_parameter_sweep import run_parameter_sweep
+from wildfire_query_service import run_query_service
+from wildfire_memo_cache import create_memo_key, run_memoized_tasks
+from wildfire_fire_weather import (
+    create_daily_fire_weather,
+    calculate_fire_weather_indices,
+    create_fire_weather_figure_tasks,
+)
+from wildfire_aggregate_cube import (
+    create_aggregate_cube,
+    write_aggregate_cube,
+    read_aggregate_cube,
+    create_aggregate_cube_figure_tasks,
 )
 
 
@@ -18,7 +46,7 @@ if __name__ == "__main__":
     # The script reads a configuration file that contains the parameters
     # needed to process. The configuration file can be provided as a path or
     # as a JSON string. The script will look for a file called
-    # `wildfire_config_BY.json` in the same directory if no configuration file
+    # `wildfire_config.json` in the same directory if no configuration file
     # is provided.
     # This script can be run on a local machine or virtual machine (like a
     # Google Cloud Engine). For processing very huge datasets and
@@ -34,7 +62,7 @@ if __name__ == "__main__":
         required=False,
         help="Location of the json configuration file used to set parameters."
         " If None is provided, the script will look for a file called"
-        " wildfire_config_BY.json in the same directory.",
+        " wildfire_config.json in the same directory.",
     )
     parser.add_argument(
         "-j",
@@ -43,10 +71,84 @@ if __name__ == "__main__":
         help="Full config contents formatted as a JSON string."
         " This will override any config path or defaults.",
     )
+    parser.add_argument(
+        "--rebuild_cache",
+        action="store_true",
+        help="Rebuild the columnar cache of the NFDB and Whitesands F4 data"
+        " files even if an up-to-date cache exists. The memo cache of the"
+        " cleaned data is also recomputed.",
+    )
+    parser.add_argument(
+        "-o",
+        "--render_dir",
+        required=False,
+        help="Directory to save the figures in. If provided, the figures are"
+        " rendered headless and concurrently instead of being shown. This"
+        " overrides the render_results section of the config.",
+    )
+    parser.add_argument(
+        "--from_cube",
+        action="store_true",
+        help="Visualize the results from the aggregate cube saved in the"
+        " aggregate_cube cube_dir of the config instead of the raw data.",
+    )
+    parser.add_argument(
+        "--sweep",
+        required=False,
+        help="Location of a json sweep file with a list (configs) and/or a grid"
+        " (grid) of config overrides, e.g. {\"grid\": {\"NFDB_data.region_of_interest"
+        ".region_radius\": [1, 2, 3]}}. The data is loaded once, every"
+        " configuration is filtered in a worker pool, and one summary row per"
+        " configuration is written to --sweep_output instead of running the analysis.",
+    )
+    parser.add_argument(
+        "--sweep_output",
+        default="sweep_summary.csv",
+        help="Path to the CSV file to write the sweep summary to.",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run the local query service instead of the analysis. The data is"
+        " loaded once and kept in memory, and the filter, aggregate, and"
+        " large fire queries are answered over HTTP on the host and port of"
+        " the query_service section of the config.",
+    )
+    parser.add_argument(
+        "--instrumentation_report",
+        required=False,
+        help="Path to a JSON file to write the wall time, CPU time, peak RSS"
+        " increase, and row counts of every processing function and pipeline"
+        " stage to. The cleaning branches run sequentially when set.",
+    )
+    parser.add_argument(
+        "--profile_stage",
+        required=False,
+        help="Name of a stage (e.g. filter_nfdb_data or visualization) to run"
+        " under cProfile. Requires --instrumentation_report.",
+    )
+    parser.add_argument(
+        "--profile_dir",
+        required=False,
+        help="Directory to write the <stage>.prof cProfile dump to. Default is"
+        " the current working directory.",
+    )
+    parser.add_argument(
+        "--no_cache",
+        action="store_true",
+        help="Bypass the columnar cache and read the NFDB and Whitesands F4"
+        " data files directly.",
+    )
 
     args = parser.parse_args()
     config_arg = args.config
     json_string = args.json_string
+    use_cache = not args.no_cache
+    rebuild_cache = args.rebuild_cache
+    render_dir = args.render_dir
+    instrumentation_report_path = args.instrumentation_report
+    if instrumentation_report_path is not None:
+        enable_instrumentation(profile_stage=args.profile_stage, profile_dir=args.profile_dir)
 
     if json_string is not None:
         config = json.loads(json_string)
@@ -54,7 +156,7 @@ if __name__ == "__main__":
         if config_arg is None:
             path_to_config = os.path.join(
                 os.path.dirname(os.path.abspath(__file__)),
-                "wildfire_config_BY.json",
+                "wildfire_config.json",
             )
         else:
             path_to_config = config_arg
@@ -62,117 +164,286 @@ if __name__ == "__main__":
         # read the config file
         config = load_json_file(path_to_config)
 
+    render_config = config.get("render_results", {})
+    if render_dir is None and render_config.get("render_results", False):
+        render_dir = render_config["results_dir"]
+    cube_config = config.get("aggregate_cube", {})
+
+    if args.from_cube:
+        # Visualize the results straight from a saved aggregate cube without
+        # reading the raw data. The fire maps need the fire points and are skipped.
+        print("\n *** Data visualization from the aggregate cube has started... *** \n")
+        aggregate_cube = read_aggregate_cube(cube_config["cube_dir"])
+        config = {**config, **aggregate_cube["metadata"]}
+        figure_paths = visualize_figures(
+            create_aggregate_cube_figure_tasks(config, aggregate_cube),
+            output_dir=render_dir,
+            file_formats=render_config.get("file_formats", ["png"]),
+            max_workers=render_config.get("max_workers"),
+        )
+        if render_dir is not None:
+            print(f"{len(figure_paths)} figure files have been saved in {render_dir}. \n")
+        print("\n *** Data visualization has been completed! *** \n")
+        if instrumentation_report_path is not None:
+            write_instrumentation_report(instrumentation_report_path)
+        sys.exit(0)
+
+    if args.sweep is not None:
+        # Filter the data once loaded with every configuration of the sweep
+        # and only write the summary of each configuration
+        print("\n *** Parameter sweep has started... *** \n")
+        sweep = load_json_file(args.sweep)
+        with measure_stage("parameter_sweep"):
+            sweep_summary = run_parameter_sweep(
+                config,
+                sweep,
+                max_workers=sweep.get("max_workers") if instrumentation_report_path is None else 1,
+                use_cache=use_cache,
+                rebuild_cache=rebuild_cache,
+            )
+        sweep_summary.to_csv(args.sweep_output, index=False)
+        print(f"The summary of {sweep_summary.shape[0]} configurations has been saved in {args.sweep_output}. \n")
+        print("\n *** Parameter sweep has been completed! *** \n")
+        if instrumentation_report_path is not None:
+            write_instrumentation_report(instrumentation_report_path)
+        sys.exit(0)
+
+    if args.serve:
+        # Keep the data in memory and answer queries until interrupted
+        query_service_config = config.get("query_service", {})
+        run_query_service(
+            config,
+            host=query_service_config.get("host", "127.0.0.1"),
+            port=query_service_config.get("port", 8765),
+            cache_size_mb=query_service_config.get("cache_size_mb", 64),
+            use_cache=use_cache,
+            rebuild_cache=rebuild_cache,
+        )
+        sys.exit(0)
+
     # ---------------------------------------------------------------------------
     # Data cleaning
     # ---------------------------------------------------------------------------
 
     print("\n *** Data cleaning has started... *** \n")
 
-    # ----- Clean the NFDB data ----- #
-    # create NFDB data file path
-    nfdb_data_path = create_data_file_path(
-        data_package_dir=config["data_package_dir"],
-        file_name=config["NFDB_data"]["file_name"],
-    )
-
-    # convert lat and lon to float
-    lat = convert_coordinate_to_float(
-       coordinate=config["NFDB_data"]["region_of_interest"]["region_centre_latitude"]
-    )
-    lon = convert_coordinate_to_float(
-       coordinate=config["NFDB_data"]["region_of_interest"]["region_centre_longitude"]
-    )
-
-    # convert month to integer if it is a string
-    if isinstance(config["NFDB_data"]["time_of_interest"]["start_month"], str):
-        start_month = convert_month_to_int(
-            month=config["NFDB_data"]["time_of_interest"]["start_month"]
-        )
-    else:
-        start_month = config["NFDB_data"]["time_of_interest"]["start_month"]
-    if isinstance(config["NFDB_data"]["time_of_interest"]["end_month"], str):
-        end_month = convert_month_to_int(
-            month=config["NFDB_data"]["time_of_interest"]["end_month"]
+    # The NFDB and Whitesands F4 data share no data, so they can be cleaned concurrently
+    concurrent_cleaning_config = config.get("concurrent_cleaning", {})
+    cleaning_tasks = {
+        # ----- Clean the NFDB data ----- #
+        "NFDB": (
+            filter_nfdb_data,
+            create_nfdb_filter_arguments(config, use_cache=use_cache, rebuild_cache=rebuild_cache),
+        ),
+        # ----- Clean the Whitesands F4 data ----- #
+        "Whitesands F4": (
+            filter_whitesands_f4_data,
+            create_whitesands_f4_filter_arguments(config, use_cache=use_cache, rebuild_cache=rebuild_cache),
+        ),
+    }
+    incremental_ingestion_config = config.get("incremental_ingestion", {})
+    if incremental_ingestion_config.get("incremental_ingestion", False):
+        # only clean the Whitesands F4 rows appended since the last run
+        whitesands_f4_filter_arguments = create_whitesands_f4_filter_arguments(config)
+        cleaning_tasks["Whitesands F4"] = (
+            update_whitesands_f4_data_incrementally,
+            {
+                "file_path": whitesands_f4_filter_arguments["file_path"],
+                "state_dir": incremental_ingestion_config["state_dir"],
+                "date_column_name": whitesands_f4_filter_arguments["date_column_name"],
+                "start_year": whitesands_f4_filter_arguments["start_year"],
+                "end_year": whitesands_f4_filter_arguments["end_year"],
+                "start_month": whitesands_f4_filter_arguments["start_month"],
+                "end_month": whitesands_f4_filter_arguments["end_month"],
+                "wind_direction_column_name": config["Whitesands_F4_data"]["weather_data"]["wind_direction_column_name"],
+                "column_dtypes": whitesands_f4_filter_arguments["column_dtypes"],
+                "max_parts": incremental_ingestion_config.get("max_parts", 8),
+            },
         )
+    # the stages of worker processes cannot be recorded, so the cleaning
+    # runs sequentially when the run is instrumented
+    cleaning_max_workers = None if concurrent_cleaning_config.get("concurrent_cleaning", False) \
+        and instrumentation_report_path is None else 1
+    memo_cache_config = config.get("memo_cache", {})
+    with measure_stage("data_cleaning"):
+        if memo_cache_config.get("memo_cache", False):
+            # The cleaned data only depends on the data file and its config
+            # section, so it is read back from the memo cache when neither has
+            # changed. The incremental ingestion keeps its own state.
+            config_section_names = {"NFDB": "NFDB_data", "Whitesands F4": "Whitesands_F4_data"}
+            memo_keys = {
+                task_name: create_memo_key(
+                    function_name=function.__name__,
+                    file_path=function_arguments["file_path"],
+                    config_section=config[config_section_names[task_name]],
+                )
+                for task_name, (function, function_arguments) in cleaning_tasks.items()
+                if function in (filter_nfdb_data, filter_whitesands_f4_data)
+            }
+            cleaning_results = run_memoized_tasks(
+                cleaning_tasks,
+                memo_keys=memo_keys,
+                memo_cache_dir=memo_cache_config["memo_cache_dir"],
+                max_size_mb=memo_cache_config.get("max_size_mb", 1024),
+                use_processes=concurrent_cleaning_config.get("use_processes", True),
+                max_workers=cleaning_max_workers,
+                recompute=rebuild_cache,
+            )
+        else:
+            cleaning_results = run_tasks_concurrently(
+                cleaning_tasks,
+                use_processes=concurrent_cleaning_config.get("use_processes", True),
+                max_workers=cleaning_max_workers,
+            )
+    filtered_nfdb_data = cleaning_results["NFDB"]
+    whitesands_f4_summary = None
+    if incremental_ingestion_config.get("incremental_ingestion", False):
+        # The ingestion has only cleaned the appended rows and merged their
+        # summary into the stored summary. Reading the stored rows back is the
+        # one step that scales with the whole history, so only the columns of
+        # the later stages are read unless the cleaned data is saved.
+        whitesands_f4_summary = cleaning_results["Whitesands F4"]["whitesands_f4_summary"]
+        fire_weather_config = config.get("fire_weather", {})
+        if config["save_results"]["save_results"] or whitesands_f4_summary is None:
+            whitesands_f4_column_names = None
+        else:
+            whitesands_f4_column_names = [
+                whitesands_f4_filter_arguments["date_column_name"],
+                config["Whitesands_F4_data"]["weather_data"]["wind_direction_column_name"],
+                config["Whitesands_F4_data"]["weather_data"]["wind_speed_column_name"],
+                "year",
+                "month",
+            ]
+            if fire_weather_config.get("fire_weather", False):
+                whitesands_f4_column_names += [
+                    fire_weather_config["temperature_column_name"],
+                    fire_weather_config["relative_humidity_column_name"],
+                    fire_weather_config["precipitation_column_name"],
+                ]
+            whitesands_f4_column_names = list(dict.fromkeys(whitesands_f4_column_names))
+        with measure_stage("read_ingested_data"):
+            filtered_whitesands_F4_data = read_incrementally_ingested_whitesands_f4_data(
+                whitesands_f4_filter_arguments["file_path"],
+                state_dir=incremental_ingestion_config["state_dir"],
+                date_column_name=whitesands_f4_filter_arguments["date_column_name"],
+                start_year=whitesands_f4_filter_arguments["start_year"],
+                end_year=whitesands_f4_filter_arguments["end_year"],
+                start_month=whitesands_f4_filter_arguments["start_month"],
+                end_month=whitesands_f4_filter_arguments["end_month"],
+                column_dtypes=whitesands_f4_filter_arguments["column_dtypes"],
+                columns=whitesands_f4_column_names,
+            )
     else:
-        end_month = config["NFDB_data"]["time_of_interest"]["end_month"]
-
-    # Filter NFDB data according to the data cleaning parameters
-    filtered_nfdb_data = filter_nfdb_data(
-        file_path=nfdb_data_path,
-        province_or_territory_column_name=config["NFDB_data"]["region_of_interest"]["province_or_territory_column_name"],
-        province_or_territory=config["NFDB_data"]["region_of_interest"]["province_or_territory_name"],
-        region_centre_latitude_column_name=config["NFDB_data"]["region_of_interest"]["region_centre_latitude_column_name"],
-        region_centre_lat=lat,
-        region_centre_longitude_column_name=config["NFDB_data"]["region_of_interest"]["region_centre_longitude_column_name"],
-        region_centre_lon=lon,
-        region_radius=float(config["NFDB_data"]["region_of_interest"]["region_radius"]),
-        year_column=config["NFDB_data"]["time_of_interest"]["year_column_name"],
-        start_year=config["NFDB_data"]["time_of_interest"]["start_year"],
-        end_year=config["NFDB_data"]["time_of_interest"]["end_year"],
-        month_column=config["NFDB_data"]["time_of_interest"]["month_column_name"],
-        start_month=start_month,
-        end_month=end_month,
-    )
+        filtered_whitesands_F4_data = cleaning_results["Whitesands F4"]
 
     print(
         f"NFDB data has been filtered according to the data cleaning parameters."
         f" The filtered data contains {filtered_nfdb_data.shape[0]} rows. \n"
     )
-
-    # ----- Clean the Whitesands F4 data ----- #
-    # create  Whitesands F4 data file path
-    whitesands_f4_data_path = create_data_file_path(
-        data_package_dir=config["data_package_dir"],
-        file_name=config["Whitesands_F4_data"]["file_name"],
-    )
-
-    # convert month to integer if it is a string
-    if isinstance(config["Whitesands_F4_data"]["time_of_interest"]["start_month"], str):
-        start_month = convert_month_to_int(
-            month=config["Whitesands_F4_data"]["time_of_interest"]["start_month"]
-        )
-    else:
-        start_month = config["Whitesands_F4_data"]["time_of_interest"]["start_month"]
-    if isinstance(config["Whitesands_F4_data"]["time_of_interest"]["end_month"], str):
-        end_month = convert_month_to_int(
-            month=config["Whitesands_F4_data"]["time_of_interest"]["end_month"]
-        )
-    else:
-        end_month = config["Whitesands_F4_data"]["time_of_interest"]["end_month"]
-
-    # Filter Whitesands F4 data according to the data cleaning parameters
-    filtered_whitesands_F4_data = filter_whitesands_f4_data(
-        file_path=whitesands_f4_data_path,
-        date_column_name=config["Whitesands_F4_data"]["time_of_interest"]["date_column_name"],
-        start_year=config["Whitesands_F4_data"]["time_of_interest"]["start_year"],
-        end_year=config["Whitesands_F4_data"]["time_of_interest"]["end_year"],
-        start_month=start_month,
-        end_month=end_month,
-    )
-
     print(
         f"Whitesands F4 data has been filtered according to the data cleaning parameters."
         f" The filtered data contains {filtered_whitesands_F4_data.shape[0]} rows. \n"
     )
+    # the cleaning may run in worker processes, so the memory saved by the
+    # compact dtypes is reported here
+    for data_name, filtered_data in [
+        ("The filtered NFDB data", filtered_nfdb_data),
+        ("The filtered Whitesands F4 data", filtered_whitesands_F4_data),
+    ]:
+        memory_usage_message = create_memory_usage_message(filtered_data, data_name=data_name)
+        if memory_usage_message is not None:
+            print(memory_usage_message)
 
     # Optionally save the cleaned data to a file
-    if config["save_results"]["save_results"]:
-        # write the filtered NFDB data to a shapefile
-        filtered_nfdb_data.to_file(
-            create_data_file_path(
-                data_package_dir=config["save_results"]["results_dir"],
-                file_name=config["save_results"]["cleaned_NFDB_data_file_name"],
+    with measure_stage("save_cleaned_data"):
+        if config["save_results"]["save_results"]:
+            # write the filtered NFDB data to a shapefile
+            filtered_nfdb_data.to_file(
+                create_data_file_path(
+                    data_package_dir=config["save_results"]["results_dir"],
+                    file_name=config["save_results"]["cleaned_NFDB_data_file_name"],
+                )
             )
+            # write the filtered Whitesands F4 data to a shapefile, with the
+            # compact datetime column in the date format of the source file
+            filtered_whitesands_F4_data.to_csv(
+                create_data_file_path(
+                    data_package_dir=config["save_results"]["results_dir"],
+                    file_name=config["save_results"]["cleaned_Whitesands_F4_data_file_name"],
+                ),
+                index=False,
+                date_format="%Y-%m-%d %H:%M",
+            )
+
+    # Aggregate the NFDB data by year and month and the Whitesands F4 data by
+    # month, year, and wind direction in one pass each
+    # The stored summary of the incremental ingestion is used as it is
+    aggregate_cube = create_aggregate_cube(
+        config,
+        filtered_nfdb_data=filtered_nfdb_data,
+        filtered_whitesands_f4_data=filtered_whitesands_F4_data,
+        whitesands_f4_summary=whitesands_f4_summary,
+    )
+
+    # Optionally save the aggregate cube so that the figures can be drawn
+    # later without the raw data (see --from_cube)
+    with measure_stage("save_aggregate_cube"):
+        if cube_config.get("save_cube", False):
+            write_aggregate_cube(aggregate_cube, cube_dir=cube_config["cube_dir"], config=config)
+            print(f"The aggregate cube has been saved in {cube_config['cube_dir']}. \n")
+
+    # Optionally clean and aggregate every weather station file listed in the
+    # config, one station per worker process
+    multi_station_config = config.get("multi_station", {})
+    if multi_station_config.get("multi_station", False):
+        with measure_stage("multi_station_processing"):
+            station_summary = process_weather_stations(
+                config,
+                station_file_paths=find_station_files(multi_station_config["station_files"]),
+                max_workers=multi_station_config.get("max_workers") if instrumentation_report_path is None else 1,
+                use_cache=use_cache,
+                rebuild_cache=rebuild_cache,
+            )
+        print(
+            f"{station_summary['station_id'].nunique()} weather stations have been cleaned and aggregated."
+            f" The station summary contains {station_summary.shape[0]} rows. \n"
         )
-        # write the filtered Whitesands F4 data to a shapefile
-        filtered_whitesands_F4_data.to_csv(
-            create_data_file_path(
-                data_package_dir=config["save_results"]["results_dir"],
-                file_name=config["save_results"]["cleaned_Whitesands_F4_data_file_name"],
-            ),
-            index=False,
-        )
+        if config["save_results"]["save_results"]:
+            station_summary.to_parquet(
+                create_data_file_path(
+                    data_package_dir=config["save_results"]["results_dir"],
+                    file_name=multi_station_config["results_file_name"],
+                ),
+                index=False,
+            )
+
+    # Optionally calculate the daily Fire Weather Index system codes from the
+    # hourly Whitesands F4 data
+    fire_weather_config = config.get("fire_weather", {})
+    fire_weather = None
+    if fire_weather_config.get("fire_weather", False):
+        with measure_stage("fire_weather"):
+            fire_weather = calculate_fire_weather_indices(
+                create_daily_fire_weather(
+                    filtered_whitesands_F4_data,
+                    date_column_name=config["Whitesands_F4_data"]["time_of_interest"]["date_column_name"],
+                    temperature_column_name=fire_weather_config["temperature_column_name"],
+                    relative_humidity_column_name=fire_weather_config["relative_humidity_column_name"],
+                    wind_speed_column_name=config["Whitesands_F4_data"]["weather_data"]["wind_speed_column_name"],
+                    precipitation_column_name=fire_weather_config["precipitation_column_name"],
+                    observation_hour=fire_weather_config.get("observation_hour", 12),
+                ),
+                max_gap_days=fire_weather_config.get("max_gap_days", 30),
+            )
+        print(f"The fire weather codes have been calculated for {fire_weather.shape[0]} days. \n")
+        if config["save_results"]["save_results"]:
+            fire_weather.to_csv(
+                create_data_file_path(
+                    data_package_dir=config["save_results"]["results_dir"],
+                    file_name=fire_weather_config["results_file_name"],
+                ),
+                index=False,
+            )
     print("\n *** Data cleaning has been completed! *** \n")
 
     # ---------------------------------------------------------------------------
@@ -192,45 +463,38 @@ if __name__ == "__main__":
     )
 
     # Optionally save the filtered NFDB data to a file
-    if config["save_results"]["save_results"]:
-        # write the filtered NFDB data to a shapefile
-        filtered_nfdb_data_large_fires.to_file(
-            create_data_file_path(
-                data_package_dir=config["save_results"]["results_dir"],
-                file_name=config["save_results"]["filtered_nfdb_data_large_fires_file_name"],
+    with measure_stage("save_large_fires"):
+        if config["save_results"]["save_results"]:
+            # write the filtered NFDB data to a shapefile
+            filtered_nfdb_data_large_fires.to_file(
+                create_data_file_path(
+                    data_package_dir=config["save_results"]["results_dir"],
+                    file_name=config["save_results"]["filtered_nfdb_data_large_fires_file_name"],
+                )
             )
-        )
 
     if config["visualize_results"]:
-        # Visualize the filtered NFDB data results
-        visualize_nfdb_results(config, filtered_nfdb_data_large_fires)
-
-    # # ----- Visualize cleaned Whitesands F4 data results from 2014 to 2021 ----- #
-    # # Filter Whitesands F4 data for years between 2014 and 2021
-    # monthly_filtered_whitesands_F4_data = []
-    # for month_num in range(start_month, end_month + 1):
-    #     one_month_filtered_whitesands_F4_data = filtered_whitesands_F4_data[
-    #         (filtered_whitesands_F4_data["year"] >= 2014)
-    #         & (filtered_whitesands_F4_data["year"] <= 2021)
-    #         & (filtered_whitesands_F4_data["month"] == month_num)
-    #     ]
-    #     monthly_filtered_whitesands_F4_data.append(one_month_filtered_whitesands_F4_data)
-
-    # if config["visualize_results"]:
-    #     # Visualize the filtered Whitesands F4 data results
-    #     visualize_whitesands_F4_results(config, monthly_filtered_whitesands_F4_data)
-
-    # ----- Visualize cleaned Whitesands F4 data results from 2010 to 2021 ----- #
-    # Filter Whitesands F4 data for years between 2010 and 2021
-    monthly_filtered_whitesands_F4_data = []
-    for month_num in range(start_month, end_month + 1):
-        one_month_filtered_whitesands_F4_data = filtered_whitesands_F4_data[
-            (filtered_whitesands_F4_data["month"] == month_num)
-        ]
-        monthly_filtered_whitesands_F4_data.append(one_month_filtered_whitesands_F4_data)
-
-    if config["visualize_results"]:
-        # Visualize the filtered Whitesands F4 data results
-        visualize_whitesands_F4_results(config, monthly_filtered_whitesands_F4_data)
+        # Visualize the filtered NFDB and Whitesands F4 data results
+        with measure_stage("visualization"):
+            figure_tasks = create_nfdb_figure_tasks(
+                config, filtered_nfdb_data_large_fires
+            ) + create_whitesands_f4_figure_tasks(
+                config, aggregate_cube["whitesands_f4"], aggregate_cube["wind_rose"]
+            )
+            if fire_weather is not None:
+                figure_tasks += create_fire_weather_figure_tasks(config, fire_weather, aggregate_cube["nfdb"])
+            # render all figures headless and concurrently if a render directory is set
+            figure_paths = visualize_figures(
+                figure_tasks,
+                output_dir=render_dir,
+                file_formats=render_config.get("file_formats", ["png"]),
+                max_workers=render_config.get("max_workers"),
+            )
+            if render_dir is not None:
+                print(f"{len(figure_paths)} figure files have been saved in {render_dir}. \n")
 
     print("\n *** Data visualization has been completed! *** \n")
+
+    if instrumentation_report_path is not None:
+        write_instrumentation_report(instrumentation_report_path)
+        print(f"The instrumentation report has been saved in {instrumentation_report_path}. \n")
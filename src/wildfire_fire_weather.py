@@ -0,0 +1,568 @@
+import math
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from wildfire_instrumentation import instrument_function
+from wildfire_processing_functions import (
+    validate_type,
+    set_plot_font_size,
+)
+
+
+# the start-up values of the moisture codes at the start of a fire season
+FIRE_WEATHER_START_UP_CODES = {"FFMC": 85.0, "DMC": 6.0, "DC": 15.0}
+# the effective day lengths of the DMC and the day length factors of the DC
+# of each month (Van Wagner 1987)
+DMC_DAY_LENGTHS = np.array([6.5, 7.5, 9.0, 12.8, 13.9, 13.9, 12.4, 10.9, 9.4, 8.0, 7.0, 6.0])
+DC_DAY_LENGTH_FACTORS = np.array([-1.6, -1.6, -1.6, 0.9, 3.8, 5.8, 6.4, 5.0, 2.4, 0.4, -1.6, -1.6])
+FIRE_WEATHER_INDEX_NAMES = ["FFMC", "DMC", "DC", "ISI", "BUI", "FWI"]
+DAILY_FIRE_WEATHER_COLUMN_NAMES = ["temperature", "relative_humidity", "wind_speed", "precipitation"]
+
+
+@instrument_function
+def create_daily_fire_weather(
+    weather_df: pd.DataFrame,
+    date_column_name: str,
+    temperature_column_name: str = "temperature",
+    relative_humidity_column_name: str = "relative_humidity",
+    wind_speed_column_name: str = "wind_speed_kmh",
+    precipitation_column_name: str = "precipitation",
+    station_column_name: str = None,
+    observation_hour: int = 12,
+    date_format: str = "%Y-%m-%d %H:%M",
+) -> pd.DataFrame:
+    """
+    Create the daily fire weather observations from hourly weather
+
+    The Fire Weather Index system uses the temperature, relative humidity, and
+    wind speed observed at noon and the precipitation of the 24 hours before
+    noon. The latest hourly value at or before the observation hour of each
+    day is taken, and the precipitation is summed from the hour after the
+    previous day's observation to the observation hour.
+
+    Parameters
+    ----------
+    weather_df : DataFrame
+        The hourly weather, e.g. the output of `filter_whitesands_f4_data`
+    date_column_name : str
+        The name of the date column
+    temperature_column_name : str, optional
+        The name of the temperature column in °C. Default is "temperature".
+    relative_humidity_column_name : str, optional
+        The name of the relative humidity column in %. Default is "relative_humidity".
+    wind_speed_column_name : str, optional
+        The name of the wind speed column in km/h. Default is "wind_speed_kmh".
+    precipitation_column_name : str, optional
+        The name of the hourly precipitation column in mm. Default is "precipitation".
+    station_column_name : str, optional
+        The name of the station column of weather from many stations.
+        Default is None, which treats all rows as one station.
+    observation_hour : int, optional
+        The local hour of the daily observation. Default is 12.
+    date_format : str, optional
+        The format of the dates, if they are strings. Default is "%Y-%m-%d %H:%M".
+
+    Returns
+    -------
+    daily_fire_weather : DataFrame
+        One row per station and day with the station column (if given),
+        "date", "temperature", "relative_humidity", "wind_speed", and
+        "precipitation", sorted by station and date
+    """
+    validate_type(weather_df, pd.DataFrame, "weather_df")
+    validate_type(date_column_name, str, "date_column_name")
+    validate_type(observation_hour, int, "observation_hour")
+    if not 0 <= observation_hour <= 23:
+        raise ValueError(f"The observation_hour should be between 0 and 23 not {observation_hour}.")
+    # The codes need the noon temperature; a daily maximum would bias them high
+    missing_column_names = [
+        column_name
+        for column_name in [
+            date_column_name,
+            temperature_column_name,
+            relative_humidity_column_name,
+            wind_speed_column_name,
+            precipitation_column_name,
+        ]
+        if column_name not in weather_df.columns
+    ]
+    if missing_column_names:
+        raise ValueError(f"The weather_df has no {missing_column_names} columns.")
+
+    weather_times = weather_df[date_column_name]
+    if not pd.api.types.is_datetime64_any_dtype(weather_times):
+        weather_times = pd.to_datetime(weather_times, format=date_format, errors="coerce")
+    hourly_weather = pd.DataFrame(
+        {
+            "station": weather_df[station_column_name].to_numpy() if station_column_name is not None else 0,
+            "time": weather_times.to_numpy(),
+            "temperature": pd.to_numeric(weather_df[temperature_column_name], errors="coerce").to_numpy(dtype=float),
+            "relative_humidity": pd.to_numeric(weather_df[relative_humidity_column_name], errors="coerce").to_numpy(dtype=float),
+            "wind_speed": pd.to_numeric(weather_df[wind_speed_column_name], errors="coerce").to_numpy(dtype=float),
+            "precipitation": pd.to_numeric(weather_df[precipitation_column_name], errors="coerce").to_numpy(dtype=float),
+        }
+    ).dropna(subset=["time"]).sort_values(["station", "time"], kind="stable")
+
+    # the observation of each day, from the hours up to the observation hour
+    noon_weather = hourly_weather[hourly_weather["time"].dt.hour <= observation_hour]
+    noon_weather = noon_weather.groupby(
+        ["station", noon_weather["time"].dt.floor("D").rename("date")],
+        sort=True,
+    )[["temperature", "relative_humidity", "wind_speed"]].last()
+    # the precipitation of the 24 hours ending at the observation hour of each day
+    rain_dates = (hourly_weather["time"] + pd.Timedelta(hours=23 - observation_hour)).dt.floor("D").rename("date")
+    daily_precipitation = hourly_weather.groupby(["station", rain_dates], sort=True)["precipitation"].sum()
+
+    daily_fire_weather = noon_weather.join(daily_precipitation, how="left").reset_index()
+    daily_fire_weather["precipitation"] = daily_fire_weather["precipitation"].fillna(0.0)
+    if station_column_name is None:
+        daily_fire_weather = daily_fire_weather.drop(columns="station")
+    else:
+        daily_fire_weather = daily_fire_weather.rename(columns={"station": station_column_name})
+
+    return daily_fire_weather
+
+
+def calculate_fine_fuel_moisture_code(
+    previous_ffmc: np.ndarray,
+    temperature: np.ndarray,
+    relative_humidity: np.ndarray,
+    wind_speed: np.ndarray,
+    precipitation: np.ndarray,
+) -> np.ndarray:
+    """
+    Calculate the Fine Fuel Moisture Code (FFMC) of a day (Van Wagner 1987)
+
+    Parameters
+    ----------
+    previous_ffmc : numpy.ndarray
+        The FFMC of the previous day
+    temperature : numpy.ndarray
+        The noon temperature in °C
+    relative_humidity : numpy.ndarray
+        The noon relative humidity in %
+    wind_speed : numpy.ndarray
+        The noon wind speed in km/h
+    precipitation : numpy.ndarray
+        The 24-hour precipitation in mm
+
+    Returns
+    -------
+    ffmc : numpy.ndarray
+        The FFMC of the day
+    """
+    moisture = 147.2 * (101.0 - previous_ffmc) / (59.5 + previous_ffmc)
+
+    # the rain wetting, with the first 0.5 mm intercepted by the canopy
+    effective_rain = np.maximum(precipitation - 0.5, 0.0)
+    is_raining = effective_rain > 0
+    with np.errstate(divide="ignore"):
+        rain_wetting = 42.5 * effective_rain * np.exp(-100.0 / (251.0 - moisture)) * (
+            1.0 - np.exp(-6.93 / np.where(is_raining, effective_rain, 1.0))
+        )
+    rain_wetting += np.where(moisture > 150.0, 0.0015 * (moisture - 150.0) ** 2 * np.sqrt(effective_rain), 0.0)
+    moisture = np.where(is_raining, np.minimum(moisture + rain_wetting, 250.0), moisture)
+
+    # the drying towards the drying equilibrium, or the wetting towards the
+    # wetting equilibrium
+    humidity_term = 0.18 * (21.1 - temperature) * (1.0 - np.exp(-0.115 * relative_humidity))
+    drying_equilibrium = (
+        0.942 * relative_humidity ** 0.679 + 11.0 * np.exp((relative_humidity - 100.0) / 10.0) + humidity_term
+    )
+    wetting_equilibrium = (
+        0.618 * relative_humidity ** 0.753 + 10.0 * np.exp((relative_humidity - 100.0) / 10.0) + humidity_term
+    )
+    drying_rate = 0.581 * np.exp(0.0365 * temperature) * (
+        0.424 * (1.0 - (relative_humidity / 100.0) ** 1.7)
+        + 0.0694 * np.sqrt(wind_speed) * (1.0 - (relative_humidity / 100.0) ** 8)
+    )
+    wetting_rate = 0.581 * np.exp(0.0365 * temperature) * (
+        0.424 * (1.0 - ((100.0 - relative_humidity) / 100.0) ** 1.7)
+        + 0.0694 * np.sqrt(wind_speed) * (1.0 - ((100.0 - relative_humidity) / 100.0) ** 8)
+    )
+    moisture = np.select(
+        [moisture > drying_equilibrium, moisture < wetting_equilibrium],
+        [
+            drying_equilibrium + (moisture - drying_equilibrium) / 10.0 ** drying_rate,
+            wetting_equilibrium - (wetting_equilibrium - moisture) / 10.0 ** wetting_rate,
+        ],
+        default=moisture,
+    )
+
+    ffmc = np.clip(59.5 * (250.0 - moisture) / (147.2 + moisture), 0.0, 101.0)
+
+    return ffmc
+
+
+def calculate_duff_moisture_code(
+    previous_dmc: np.ndarray,
+    temperature: np.ndarray,
+    relative_humidity: np.ndarray,
+    precipitation: np.ndarray,
+    month: np.ndarray,
+) -> np.ndarray:
+    """
+    Calculate the Duff Moisture Code (DMC) of a day (Van Wagner 1987)
+
+    Parameters
+    ----------
+    previous_dmc : numpy.ndarray
+        The DMC of the previous day
+    temperature : numpy.ndarray
+        The noon temperature in °C
+    relative_humidity : numpy.ndarray
+        The noon relative humidity in %
+    precipitation : numpy.ndarray
+        The 24-hour precipitation in mm
+    month : numpy.ndarray
+        The month of the day (1 to 12)
+
+    Returns
+    -------
+    dmc : numpy.ndarray
+        The DMC of the day
+    """
+    drying = 1.894 * (np.maximum(temperature, -1.1) + 1.1) * (100.0 - relative_humidity) \
+        * DMC_DAY_LENGTHS[month - 1] * 1e-4
+
+    # the rain wetting, with the first 1.5 mm intercepted by the canopy
+    is_raining = precipitation > 1.5
+    effective_rain = 0.92 * precipitation - 1.27
+    initial_moisture = 20.0 + 280.0 / np.exp(0.023 * previous_dmc)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_dmc = np.log(previous_dmc)
+        slope = np.select(
+            [previous_dmc <= 33.0, previous_dmc <= 65.0],
+            [100.0 / (0.5 + 0.3 * previous_dmc), 14.0 - 1.3 * log_dmc],
+            default=6.2 * log_dmc - 17.2,
+        )
+        rain_moisture = initial_moisture + 1000.0 * effective_rain / (48.77 + slope * effective_rain)
+        rain_dmc = 43.43 * (5.6348 - np.log(rain_moisture - 20.0))
+    previous_dmc = np.maximum(np.where(is_raining, rain_dmc, previous_dmc), 0.0)
+
+    dmc = np.maximum(previous_dmc + drying, 0.0)
+
+    return dmc
+
+
+def calculate_drought_code(
+    previous_dc: np.ndarray,
+    temperature: np.ndarray,
+    precipitation: np.ndarray,
+    month: np.ndarray,
+) -> np.ndarray:
+    """
+    Calculate the Drought Code (DC) of a day (Van Wagner 1987)
+
+    Parameters
+    ----------
+    previous_dc : numpy.ndarray
+        The DC of the previous day
+    temperature : numpy.ndarray
+        The noon temperature in °C
+    precipitation : numpy.ndarray
+        The 24-hour precipitation in mm
+    month : numpy.ndarray
+        The month of the day (1 to 12)
+
+    Returns
+    -------
+    dc : numpy.ndarray
+        The DC of the day
+    """
+    evapotranspiration = np.maximum(
+        (0.36 * (np.maximum(temperature, -2.8) + 2.8) + DC_DAY_LENGTH_FACTORS[month - 1]) / 2.0,
+        0.0,
+    )
+
+    # the rain wetting, with the first 2.8 mm intercepted by the canopy
+    is_raining = precipitation > 2.8
+    effective_rain = 0.83 * precipitation - 1.27
+    moisture_equivalent = 800.0 * np.exp(-previous_dc / 400.0)
+    with np.errstate(invalid="ignore"):
+        rain_dc = previous_dc - 400.0 * np.log(1.0 + 3.937 * effective_rain / moisture_equivalent)
+    previous_dc = np.maximum(np.where(is_raining, rain_dc, previous_dc), 0.0)
+
+    dc = np.maximum(previous_dc + evapotranspiration, 0.0)
+
+    return dc
+
+
+def calculate_initial_spread_index(
+    ffmc: np.ndarray,
+    wind_speed: np.ndarray,
+) -> np.ndarray:
+    """
+    Calculate the Initial Spread Index (ISI) (Van Wagner 1987)
+
+    Parameters
+    ----------
+    ffmc : numpy.ndarray
+        The FFMC
+    wind_speed : numpy.ndarray
+        The noon wind speed in km/h
+
+    Returns
+    -------
+    isi : numpy.ndarray
+        The ISI
+    """
+    moisture = 147.2 * (101.0 - ffmc) / (59.5 + ffmc)
+    fine_fuel_function = 19.115 * np.exp(-0.1386 * moisture) * (1.0 + moisture ** 5.31 / 4.93e7)
+
+    return fine_fuel_function * np.exp(0.05039 * wind_speed)
+
+
+def calculate_buildup_index(
+    dmc: np.ndarray,
+    dc: np.ndarray,
+) -> np.ndarray:
+    """
+    Calculate the Buildup Index (BUI) (Van Wagner 1987)
+
+    Parameters
+    ----------
+    dmc : numpy.ndarray
+        The DMC
+    dc : numpy.ndarray
+        The DC
+
+    Returns
+    -------
+    bui : numpy.ndarray
+        The BUI
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bui = np.where(
+            dmc <= 0.4 * dc,
+            0.8 * dmc * dc / (dmc + 0.4 * dc),
+            dmc - (1.0 - 0.8 * dc / (dmc + 0.4 * dc)) * (0.92 + (0.0114 * dmc) ** 1.7),
+        )
+    bui = np.where((dmc == 0) & (dc == 0), 0.0, np.maximum(bui, 0.0))
+
+    return bui
+
+
+def calculate_fire_weather_index(
+    isi: np.ndarray,
+    bui: np.ndarray,
+) -> np.ndarray:
+    """
+    Calculate the Fire Weather Index (FWI) (Van Wagner 1987)
+
+    Parameters
+    ----------
+    isi : numpy.ndarray
+        The ISI
+    bui : numpy.ndarray
+        The BUI
+
+    Returns
+    -------
+    fwi : numpy.ndarray
+        The FWI
+    """
+    duff_function = np.where(
+        bui <= 80.0,
+        0.626 * bui ** 0.809 + 2.0,
+        1000.0 / (25.0 + 108.64 * np.exp(-0.023 * bui)),
+    )
+    intermediate_fwi = 0.1 * isi * duff_function
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fwi = np.where(
+            intermediate_fwi > 1.0,
+            np.exp(2.72 * (0.434 * np.log(intermediate_fwi)) ** 0.647),
+            intermediate_fwi,
+        )
+
+    return fwi
+
+
+@instrument_function
+def calculate_fire_weather_indices(
+    daily_fire_weather: pd.DataFrame,
+    station_column_name: str = None,
+    max_gap_days: int = 30,
+) -> pd.DataFrame:
+    """
+    Calculate the Fire Weather Index system codes of the daily weather of many stations
+
+    The daily weather is laid out as a (day, station) grid. The moisture
+    codes (FFMC, DMC, and DC) depend on the previous day, so the grid is
+    walked one day at a time, but every step updates all stations with one
+    array operation. The ISI, BUI, and FWI only depend on the codes of the
+    same day and are calculated for the whole grid at once.
+
+    A station keeps its codes over days without weather, and restarts from
+    the start-up codes (FFMC 85, DMC 6, and DC 15) after more than
+    `max_gap_days` days without weather, e.g. at the start of each fire season.
+
+    Parameters
+    ----------
+    daily_fire_weather : DataFrame
+        The output of `create_daily_fire_weather`
+    station_column_name : str, optional
+        The name of the station column. Default is None, which treats all
+        rows as one station.
+    max_gap_days : int, optional
+        The longest gap in days after which the codes are carried over.
+        Default is 30.
+
+    Returns
+    -------
+    fire_weather : DataFrame
+        The daily fire weather with the FFMC, DMC, DC, ISI, BUI, and FWI
+        columns, and the year and month of each day
+    """
+    validate_type(daily_fire_weather, pd.DataFrame, "daily_fire_weather")
+    validate_type(max_gap_days, int, "max_gap_days")
+
+    fire_weather = daily_fire_weather.dropna(
+        subset=["date", "temperature", "relative_humidity", "wind_speed"]
+    ).reset_index(drop=True)
+    if station_column_name is not None:
+        station_codes, station_ids = pd.factorize(fire_weather[station_column_name], sort=True)
+    else:
+        station_codes, station_ids = np.zeros(len(fire_weather), dtype=np.int64), [None]
+    day_numbers = fire_weather["date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    days, day_positions = np.unique(day_numbers, return_inverse=True)
+
+    # the (day, station) grids of the inputs, with NaN on days without weather
+    weather_grids = {}
+    for column_name in DAILY_FIRE_WEATHER_COLUMN_NAMES:
+        weather_grids[column_name] = np.full((len(days), len(station_ids)), np.nan)
+        weather_grids[column_name][day_positions, station_codes] = fire_weather[column_name].to_numpy(dtype=float)
+    weather_grids["relative_humidity"] = np.clip(weather_grids["relative_humidity"], 0.0, 100.0)
+    weather_grids["wind_speed"] = np.maximum(weather_grids["wind_speed"], 0.0)
+    weather_grids["precipitation"] = np.maximum(np.nan_to_num(weather_grids["precipitation"]), 0.0)
+    has_weather = ~np.isnan(weather_grids["temperature"])
+    months = (days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64) % 12 + 1)
+
+    code_grids = {code_name: np.full((len(days), len(station_ids)), np.nan) for code_name in FIRE_WEATHER_START_UP_CODES}
+    codes = {code_name: np.full(len(station_ids), start_up_code) for code_name, start_up_code in FIRE_WEATHER_START_UP_CODES.items()}
+    last_days = np.full(len(station_ids), np.iinfo(np.int64).min // 2)
+    for day_position, (day, month) in enumerate(zip(days, months)):
+        is_observed = has_weather[day_position]
+        is_restarted = is_observed & (day - last_days > max_gap_days)
+        for code_name, start_up_code in FIRE_WEATHER_START_UP_CODES.items():
+            codes[code_name] = np.where(is_restarted, start_up_code, codes[code_name])
+        temperature = weather_grids["temperature"][day_position]
+        relative_humidity = weather_grids["relative_humidity"][day_position]
+        precipitation = weather_grids["precipitation"][day_position]
+        # the stations without weather keep the codes of the previous day
+        codes["FFMC"] = np.where(
+            is_observed,
+            calculate_fine_fuel_moisture_code(
+                codes["FFMC"], temperature, relative_humidity, weather_grids["wind_speed"][day_position], precipitation
+            ),
+            codes["FFMC"],
+        )
+        codes["DMC"] = np.where(
+            is_observed,
+            calculate_duff_moisture_code(codes["DMC"], temperature, relative_humidity, precipitation, month),
+            codes["DMC"],
+        )
+        codes["DC"] = np.where(
+            is_observed,
+            calculate_drought_code(codes["DC"], temperature, precipitation, month),
+            codes["DC"],
+        )
+        last_days = np.where(is_observed, day, last_days)
+        for code_name in FIRE_WEATHER_START_UP_CODES:
+            code_grids[code_name][day_position] = codes[code_name]
+
+    code_grids["ISI"] = calculate_initial_spread_index(code_grids["FFMC"], weather_grids["wind_speed"])
+    code_grids["BUI"] = calculate_buildup_index(code_grids["DMC"], code_grids["DC"])
+    code_grids["FWI"] = calculate_fire_weather_index(code_grids["ISI"], code_grids["BUI"])
+
+    for index_name in FIRE_WEATHER_INDEX_NAMES:
+        fire_weather[index_name] = code_grids[index_name][day_positions, station_codes]
+    fire_weather["year"] = fire_weather["date"].dt.year
+    fire_weather["month"] = fire_weather["date"].dt.month
+
+    return fire_weather
+
+
+def plot_fire_weather_correlations(
+    config: dict,
+    fire_weather: pd.DataFrame,
+    nfdb_summary: pd.DataFrame,
+) -> plt.Figure:
+    """
+    Plot the number of fires of each month and year against the mean fire weather codes
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    fire_weather : DataFrame
+        The output of `calculate_fire_weather_indices`
+    nfdb_summary : DataFrame
+        The aggregated NFDB data (see `aggregate_nfdb_data`)
+
+    Returns
+    -------
+    fig : Figure
+        The figure with one graph per fire weather code
+    """
+    set_plot_font_size(font_size=11)
+    validate_type(config, dict, "config")
+    validate_type(fire_weather, pd.DataFrame, "fire_weather")
+    validate_type(nfdb_summary, pd.DataFrame, "nfdb_summary")
+
+    monthly_fire_weather = fire_weather.groupby(["year", "month"])[FIRE_WEATHER_INDEX_NAMES].mean()
+    monthly_fires = monthly_fire_weather.join(
+        nfdb_summary.set_index(["year", "month"])["number_of_fires"],
+        how="left",
+    ).fillna({"number_of_fires": 0})
+    region_name = config["NFDB_data"]["region_of_interest"]["region_name"]
+
+    fig, axs = plt.subplots(math.ceil(len(FIRE_WEATHER_INDEX_NAMES) / 2), 2, squeeze=False)
+    fig.suptitle(f"Number of fires in the {region_name} against the monthly mean fire weather codes")
+
+    for i, index_name in enumerate(FIRE_WEATHER_INDEX_NAMES):
+        ax = axs[i // 2, i % 2]
+        ax.scatter(monthly_fires[index_name], monthly_fires["number_of_fires"], c="orange", s=20)
+        if len(monthly_fires) > 1:
+            # Add regression line and correlation coefficient to plot
+            reg_coef = np.polyfit(monthly_fires[index_name], monthly_fires["number_of_fires"], 1)
+            p_reg = np.poly1d(reg_coef)
+            index_range = np.linspace(monthly_fires[index_name].min(), monthly_fires[index_name].max(), 2)
+            ax.plot(index_range, p_reg(index_range), c="red", linestyle='dashed')
+            correlation = np.corrcoef(monthly_fires[index_name], monthly_fires["number_of_fires"])[0, 1]
+            ax.set_title(f"{index_name} (r = {correlation:.2f})")
+        else:
+            ax.set_title(index_name)
+        ax.set_xlabel(f"Monthly mean {index_name}")
+        ax.set_ylabel("Number of fires")
+
+    return fig
+
+
+def create_fire_weather_figure_tasks(
+    config: dict,
+    fire_weather: pd.DataFrame,
+    nfdb_summary: pd.DataFrame,
+) -> list:
+    """
+    Create the figure tasks of the fire weather results
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    fire_weather : DataFrame
+        The output of `calculate_fire_weather_indices`
+    nfdb_summary : DataFrame
+        The aggregated NFDB data (see `aggregate_nfdb_data`)
+
+    Returns
+    -------
+    figure_tasks : list
+        A list of (figure name, plot function, plot arguments) tuples
+    """
+    figure_tasks = [
+        ("fire_weather_correlations", plot_fire_weather_correlations, (config, fire_weather, nfdb_summary)),
+    ]
+
+    return figure_tasks
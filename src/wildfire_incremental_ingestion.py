@@ -0,0 +1,897 @@
+import os
+import io
+import csv
+import re
+import json
+import hashlib
+import pandas as pd
+import pyarrow.parquet as pq
+from wildfire_instrumentation import instrument_function
+from wildfire_processing_functions import (
+    validate_type,
+    filter_df_by_date,
+    aggregate_whitesands_f4_data,
+    compact_dtypes,
+    create_temporary_file_path,
+)
+
+
+# file name of the watermarks of all source files in a state directory
+WATERMARKS_FILE_NAME = "watermarks.json"
+# number of bytes before a watermark hashed to detect a replaced source file
+WATERMARK_TAIL_LENGTH = 4096
+# the parts of the cleaned dataset are named by the byte range of the source
+# file they were cleaned from, and the summary tables by the byte offset they cover
+PART_FILE_NAME_PATTERN = r"part-(\d{15})-(\d{15})\.parquet"
+SUMMARY_FILE_NAME_PATTERN = r"summary-\d{15}\.parquet"
+# the number of parts of a source file above which they are compacted into one
+MAX_PARTS = 8
+
+
+def create_watermark_key(
+    file_path: str,
+    start_year: int,
+    end_year: int,
+    start_month: int,
+    end_month: int,
+) -> str:
+    """
+    Create the key of the watermark and stored results of a source file and its filters
+
+    The filters are part of the key, so that changing them starts a new
+    ingestion instead of mixing rows cleaned with different filters.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the source CSV file
+    start_year : int
+        The start year of interest
+    end_year : int
+        The end year of interest
+    start_month : int
+        The start month of interest
+    end_month : int
+        The end month of interest
+
+    Returns
+    -------
+    watermark_key : str
+        The key as a JSON list of the absolute file path and the filters
+    """
+    validate_type(file_path, str, "file_path")
+
+    watermark_key = json.dumps(
+        [os.path.abspath(file_path), start_year, end_year, start_month, end_month]
+    )
+
+    return watermark_key
+
+
+def create_source_state_dir(
+    state_dir: str,
+    watermark_key: str,
+) -> str:
+    """
+    Create the path to the directory holding the cleaned data and aggregates of one source file
+
+    Parameters
+    ----------
+    state_dir : str
+        The directory of the incremental ingestion state
+    watermark_key : str
+        The output of `create_watermark_key`
+
+    Returns
+    -------
+    source_state_dir : str
+        The directory of the source file state
+    """
+    validate_type(state_dir, str, "state_dir")
+    validate_type(watermark_key, str, "watermark_key")
+
+    file_path = json.loads(watermark_key)[0]
+    file_stem = os.path.splitext(os.path.basename(file_path))[0]
+    key_hash = hashlib.sha256(watermark_key.encode()).hexdigest()[:8]
+    source_state_dir = os.path.join(state_dir, f"{file_stem}_{key_hash}")
+
+    return source_state_dir
+
+
+def load_watermarks(
+    state_dir: str,
+) -> dict:
+    """
+    Load the watermarks of all source files of a state directory
+
+    Parameters
+    ----------
+    state_dir : str
+        The directory of the incremental ingestion state
+
+    Returns
+    -------
+    watermarks : dict
+        The watermarks as {watermark key: watermark}. Empty if
+        nothing has been ingested yet.
+    """
+    validate_type(state_dir, str, "state_dir")
+
+    watermarks_path = os.path.join(state_dir, WATERMARKS_FILE_NAME)
+    if not os.path.exists(watermarks_path):
+        return {}
+    with open(watermarks_path, "r") as f:
+        watermarks = json.load(f)
+
+    return watermarks
+
+
+def save_watermarks(
+    watermarks: dict,
+    state_dir: str,
+) -> None:
+    """
+    Save the watermarks of all source files of a state directory
+
+    Parameters
+    ----------
+    watermarks : dict
+        The watermarks as {watermark key: watermark}
+    state_dir : str
+        The directory of the incremental ingestion state
+    """
+    validate_type(watermarks, dict, "watermarks")
+    validate_type(state_dir, str, "state_dir")
+
+    os.makedirs(state_dir, exist_ok=True)
+    watermarks_path = os.path.join(state_dir, WATERMARKS_FILE_NAME)
+    # replace the file in one step so that a crash never leaves half a watermark
+    temporary_watermarks_path = create_temporary_file_path(watermarks_path)
+    with open(temporary_watermarks_path, "w") as f:
+        json.dump(watermarks, f, indent=4)
+    os.replace(temporary_watermarks_path, watermarks_path)
+
+
+def merge_whitesands_f4_summaries(
+    whitesands_f4_summary: pd.DataFrame,
+    new_whitesands_f4_summary: pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    Merge two Whitesands F4 summary tables
+
+    The summary tables only hold counts and sums, so the summary of the old
+    and the new rows is the sum of their summaries.
+
+    Parameters
+    ----------
+    whitesands_f4_summary : DataFrame
+        The output of `aggregate_whitesands_f4_data` for the old rows
+    new_whitesands_f4_summary : DataFrame
+        The output of `aggregate_whitesands_f4_data` for the new rows
+
+    Returns
+    -------
+    merged_whitesands_f4_summary : DataFrame
+        The summary table of all rows
+    """
+    validate_type(whitesands_f4_summary, pd.DataFrame, "whitesands_f4_summary")
+    validate_type(new_whitesands_f4_summary, pd.DataFrame, "new_whitesands_f4_summary")
+
+    merged_whitesands_f4_summary = pd.concat(
+        [whitesands_f4_summary, new_whitesands_f4_summary],
+        ignore_index=True,
+    ).groupby(
+        ["month", "year", "wind_direction"],
+        dropna=False,
+        observed=True,
+        sort=True,
+    ).sum().reset_index()
+
+    return merged_whitesands_f4_summary
+
+
+def read_appended_csv_rows(
+    file_path: str,
+    watermark: dict,
+    date_column_name: str = None,
+):
+    """
+    Read the complete CSV lines appended to a file since its watermark
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the CSV file
+    watermark : dict
+        The watermark of the file, or None to read the whole file
+    date_column_name : str, optional
+        The name of the date column, which is read as text like in
+        `filter_whitesands_f4_data`. Default is None.
+
+    Returns
+    -------
+    appended_rows : DataFrame
+        The appended rows
+    start_byte_offset : int
+        The byte offset of the first appended row
+    new_watermark : dict
+        The watermark after the appended rows. A last line without a newline
+        is read if it has all the columns of the header, e.g. the last row of
+        a finished file, and otherwise left for the next run, since it may
+        still be written.
+    is_reset : bool
+        True if the whole file was read because there was no watermark, the
+        file was replaced, truncated, or its header changed, or a last row
+        read without a newline was continued
+    """
+    validate_type(file_path, str, "file_path")
+    if watermark is not None:
+        validate_type(watermark, dict, "watermark")
+
+    with open(file_path, "rb") as f:
+        header_line = f.readline()
+        header_hash = hashlib.sha256(header_line).hexdigest()
+        file_size = os.fstat(f.fileno()).st_size
+
+        # the last bytes before the watermark should not have changed if rows
+        # were only appended
+        is_reset = (
+            watermark is None
+            or watermark["header_hash"] != header_hash
+            or watermark["byte_offset"] > file_size
+        )
+        if not is_reset:
+            tail_start = max(len(header_line), watermark["byte_offset"] - WATERMARK_TAIL_LENGTH)
+            f.seek(tail_start)
+            tail_bytes = f.read(watermark["byte_offset"] - tail_start)
+            is_reset = hashlib.sha256(tail_bytes).hexdigest() != watermark["tail_hash"]
+        if not is_reset and not watermark.get("is_line_terminated", True):
+            # a last row read without a newline should not have been continued
+            is_reset = f.read(1) not in (b"", b"\r", b"\n")
+        if is_reset:
+            watermark = {"header_hash": header_hash, "byte_offset": len(header_line), "last_timestamp": None}
+
+        f.seek(watermark["byte_offset"])
+        appended_bytes = f.read(file_size - watermark["byte_offset"])
+
+    column_names = pd.read_csv(io.BytesIO(header_line), nrows=0).columns.tolist()
+    complete_length = appended_bytes.rfind(b"\n") + 1
+    last_line = appended_bytes[complete_length:].decode(errors="replace")
+    if last_line.strip() and len(next(csv.reader([last_line]))) == len(column_names):
+        complete_length = len(appended_bytes)
+    new_byte_offset = watermark["byte_offset"] + complete_length
+    with open(file_path, "rb") as f:
+        tail_start = max(len(header_line), new_byte_offset - WATERMARK_TAIL_LENGTH)
+        f.seek(tail_start)
+        tail_bytes = f.read(new_byte_offset - tail_start)
+    new_watermark = {
+        **watermark,
+        "byte_offset": new_byte_offset,
+        "tail_hash": hashlib.sha256(tail_bytes).hexdigest(),
+        "is_line_terminated": (
+            appended_bytes[:complete_length].endswith(b"\n") if complete_length > 0
+            else watermark.get("is_line_terminated", True)
+        ),
+    }
+
+    if complete_length == 0:
+        return pd.DataFrame(columns=column_names), watermark["byte_offset"], new_watermark, is_reset
+
+    appended_rows = pd.read_csv(
+        io.BytesIO(appended_bytes[:complete_length]),
+        header=None,
+        names=column_names,
+        dtype=None if date_column_name is None else {date_column_name: str},
+    )
+
+    return appended_rows, watermark["byte_offset"], new_watermark, is_reset
+
+
+def filter_appended_whitesands_f4_rows(
+    appended_rows: pd.DataFrame,
+    date_column_name: str,
+    start_year: int,
+    end_year: int,
+    start_month: int,
+    end_month: int,
+    column_dtypes: dict = None,
+) -> pd.DataFrame:
+    """
+    Filter appended Whitesands F4 rows with the dtypes of `filter_whitesands_f4_data`
+
+    Parameters
+    ----------
+    appended_rows : DataFrame
+        The output of `read_appended_csv_rows`
+    date_column_name : str
+        The name of the date column
+    start_year : int
+        The start year of interest
+    end_year : int
+        The end year of interest
+    start_month : int
+        The start month of interest
+    end_month : int
+        The end month of interest
+    column_dtypes : dict, optional
+        The compact dtypes of the filtered data columns (see `compact_dtypes`).
+        Default is None, which keeps the dtypes.
+
+    Returns
+    -------
+    filtered_rows : DataFrame
+        The filtered rows with the year and month columns
+    """
+    validate_type(appended_rows, pd.DataFrame, "appended_rows")
+
+    filtered_rows = filter_df_by_date(
+        appended_rows,
+        date_column_name=date_column_name,
+        start_year=start_year,
+        end_year=end_year,
+        start_month=start_month,
+        end_month=end_month,
+    ).astype({"year": "int16", "month": "int8"})
+    if column_dtypes is not None:
+        filtered_rows = compact_dtypes(filtered_rows, column_dtypes=column_dtypes)
+
+    return filtered_rows
+
+
+def write_state_file(
+    data_df: pd.DataFrame,
+    state_file_path: str,
+) -> None:
+    """
+    Write a part or summary table of the ingestion state in one step
+
+    Parameters
+    ----------
+    data_df : DataFrame
+        The part or summary table
+    state_file_path : str
+        The path to the Parquet file
+    """
+    validate_type(data_df, pd.DataFrame, "data_df")
+
+    temporary_state_file_path = create_temporary_file_path(state_file_path)
+    data_df.to_parquet(temporary_state_file_path, index=False)
+    os.replace(temporary_state_file_path, state_file_path)
+
+
+def find_part_paths(
+    source_state_dir: str,
+    byte_offset: int = None,
+) -> tuple:
+    """
+    Find the parts of the cleaned dataset of a source file that are covered by its watermark
+
+    A part is committed when its byte range ends at or before the byte offset
+    of the watermark. Of parts that overlap, e.g. a compacted part and the
+    parts it was merged from, the one starting first and reaching furthest is
+    used, so every byte of the source file is read once.
+
+    Parameters
+    ----------
+    source_state_dir : str
+        The output of `create_source_state_dir`
+    byte_offset : int, optional
+        The byte offset of the watermark. Default is None, which commits no part.
+
+    Returns
+    -------
+    committed_part_paths : list
+        The paths to the committed parts in file order
+    stale_part_paths : list
+        The paths to the other parts, i.e. parts of an interrupted run and
+        parts replaced by a compacted part
+    """
+    validate_type(source_state_dir, str, "source_state_dir")
+
+    part_ranges = []
+    if os.path.isdir(source_state_dir):
+        for file_name in os.listdir(source_state_dir):
+            part_match = re.fullmatch(PART_FILE_NAME_PATTERN, file_name)
+            if part_match is not None:
+                part_ranges.append(
+                    (int(part_match.group(1)), -int(part_match.group(2)), os.path.join(source_state_dir, file_name))
+                )
+
+    committed_part_paths = []
+    stale_part_paths = []
+    covered_byte_offset = None
+    for part_start, negative_part_end, part_path in sorted(part_ranges):
+        is_committed = (
+            byte_offset is not None
+            and -negative_part_end <= byte_offset
+            and (covered_byte_offset is None or part_start >= covered_byte_offset)
+        )
+        if is_committed:
+            committed_part_paths.append(part_path)
+            covered_byte_offset = -negative_part_end
+        else:
+            stale_part_paths.append(part_path)
+
+    return committed_part_paths, stale_part_paths
+
+
+def remove_stale_state_files(
+    source_state_dir: str,
+    watermark: dict,
+) -> list:
+    """
+    Remove the parts and summary tables of a source file that its watermark does not cover
+
+    Parameters
+    ----------
+    source_state_dir : str
+        The output of `create_source_state_dir`
+    watermark : dict
+        The saved watermark of the source file, or None to remove all files
+
+    Returns
+    -------
+    committed_part_paths : list
+        The paths to the committed parts in file order (see `find_part_paths`)
+    """
+    validate_type(source_state_dir, str, "source_state_dir")
+
+    committed_part_paths, stale_part_paths = find_part_paths(
+        source_state_dir,
+        byte_offset=None if watermark is None else watermark["byte_offset"],
+    )
+    summary_file_name = None if watermark is None else watermark.get("summary_file_name")
+    stale_summary_paths = [
+        os.path.join(source_state_dir, file_name)
+        for file_name in (os.listdir(source_state_dir) if os.path.isdir(source_state_dir) else [])
+        if re.fullmatch(SUMMARY_FILE_NAME_PATTERN, file_name) is not None and file_name != summary_file_name
+    ]
+    for stale_path in stale_part_paths + stale_summary_paths:
+        os.remove(stale_path)
+
+    return committed_part_paths
+
+
+def read_parts(
+    part_paths: list,
+    columns: list = None,
+) -> pd.DataFrame:
+    """
+    Read and concatenate parts of the cleaned dataset of a source file
+
+    Parameters
+    ----------
+    part_paths : list
+        The paths to the parts in file order
+    columns : list, optional
+        The columns to read. Default is None, which reads all columns.
+
+    Returns
+    -------
+    data_df : DataFrame
+        The rows of all parts
+    """
+    validate_type(part_paths, list, "part_paths")
+    if columns is not None:
+        validate_type(columns, list, "columns")
+
+    parts = [pd.read_parquet(part_path, columns=columns) for part_path in part_paths]
+    data_df = pd.concat(parts, ignore_index=True)
+    # categorical columns with different categories are concatenated as objects
+    categorical_column_names = [
+        column_name for column_name, dtype in parts[0].dtypes.items()
+        if isinstance(dtype, pd.CategoricalDtype)
+    ]
+    if categorical_column_names:
+        data_df = data_df.astype({column_name: "category" for column_name in categorical_column_names})
+
+    return data_df
+
+
+def align_part_dtypes(
+    new_rows: pd.DataFrame,
+    part_path: str,
+) -> pd.DataFrame:
+    """
+    Convert new rows to the dtypes of a stored part
+
+    A few appended rows can be inferred with other dtypes than the whole file,
+    e.g. int64 instead of float64 for a column without decimals, so the new
+    parts are converted to the dtypes of the first part.
+
+    Parameters
+    ----------
+    new_rows : DataFrame
+        The filtered new rows
+    part_path : str
+        The path to the stored part
+
+    Returns
+    -------
+    aligned_rows : DataFrame
+        The new rows with the dtypes of the part
+    """
+    validate_type(new_rows, pd.DataFrame, "new_rows")
+    validate_type(part_path, str, "part_path")
+
+    part_dtypes = pq.read_schema(part_path).empty_table().to_pandas().dtypes
+    aligned_rows = new_rows.astype(
+        {
+            column_name: "category" if isinstance(dtype, pd.CategoricalDtype) else dtype
+            for column_name, dtype in part_dtypes.items()
+            if column_name in new_rows.columns and new_rows[column_name].dtype != dtype
+        }
+    )
+
+    return aligned_rows
+
+
+def compact_parts(
+    part_paths: list,
+) -> str:
+    """
+    Merge the committed parts of a source file into one part
+
+    The merged part covers the byte ranges of all parts, so it replaces them
+    when the parts are read (see `find_part_paths`) even if a run is
+    interrupted before they are removed.
+
+    Parameters
+    ----------
+    part_paths : list
+        The paths to the committed parts in file order
+
+    Returns
+    -------
+    compacted_part_path : str
+        The path to the merged part
+    """
+    validate_type(part_paths, list, "part_paths")
+
+    first_part_match = re.fullmatch(PART_FILE_NAME_PATTERN, os.path.basename(part_paths[0]))
+    last_part_match = re.fullmatch(PART_FILE_NAME_PATTERN, os.path.basename(part_paths[-1]))
+    compacted_part_path = os.path.join(
+        os.path.dirname(part_paths[0]),
+        f"part-{first_part_match.group(1)}-{last_part_match.group(2)}.parquet",
+    )
+    write_state_file(read_parts(part_paths), compacted_part_path)
+    for part_path in part_paths:
+        if part_path != compacted_part_path:
+            os.remove(part_path)
+
+    return compacted_part_path
+
+
+@instrument_function
+def ingest_whitesands_f4_data_incrementally(
+    file_path: str,
+    state_dir: str,
+    date_column_name: str,
+    start_year: int,
+    end_year: int,
+    start_month: int,
+    end_month: int,
+    wind_direction_column_name: str,
+    column_dtypes: dict = None,
+    max_parts: int = MAX_PARTS,
+) -> dict:
+    """
+    Clean only the Whitesands F4 rows appended since the last run and merge them into the stored results
+
+    A watermark (byte offset of the last complete line, last timestamp, header
+    hash, and summary table) is kept per source file. Each run reads only the
+    bytes after the watermark, filters them like `filter_whitesands_f4_data`,
+    stores them as a new part of the cleaned dataset named by their byte
+    range, and writes the merged summary table (see
+    `aggregate_whitesands_f4_data`) under the new byte offset. The part and
+    the summary only count once the watermark is saved, so the files of an
+    interrupted run are removed by the next run and its rows are not counted
+    twice. If the file was replaced or truncated, the stored results are
+    rebuilt from scratch.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the Whitesands F4 data
+    state_dir : str
+        The directory to store the watermarks, cleaned data, and aggregates
+    date_column_name : str
+        The name of the date column
+    start_year : int
+        The start year of interest
+    end_year : int
+        The end year of interest
+    start_month : int
+        The start month of interest
+    end_month : int
+        The end month of interest
+    wind_direction_column_name : str
+        The name of the wind direction column
+    column_dtypes : dict, optional
+        The compact dtypes of the filtered data columns (see `compact_dtypes`).
+        Default is None, which keeps the dtypes.
+    max_parts : int, optional
+        The number of parts above which they are compacted into one.
+        Default is 8.
+
+    Returns
+    -------
+    ingestion_result : dict
+        The number of appended rows ("number_of_new_rows"), the number of them
+        kept by the filters ("number_of_new_filtered_rows"), the kept rows
+        ("new_filtered_rows"), the merged summary table
+        ("whitesands_f4_summary", None if no rows were kept yet), and the new
+        watermark ("watermark")
+    """
+    validate_type(file_path, str, "Whitesands F4 data path")
+    validate_type(state_dir, str, "state_dir")
+    validate_type(date_column_name, str, "date_column_name")
+    validate_type(wind_direction_column_name, str, "wind_direction_column_name")
+    validate_type(max_parts, int, "max_parts")
+
+    watermark_key = create_watermark_key(file_path, start_year, end_year, start_month, end_month)
+    watermarks = load_watermarks(state_dir)
+    watermark = watermarks.get(watermark_key)
+    source_state_dir = create_source_state_dir(state_dir, watermark_key)
+
+    appended_rows, start_byte_offset, new_watermark, is_reset = read_appended_csv_rows(
+        file_path, watermark, date_column_name=date_column_name
+    )
+    if is_reset:
+        watermark = None
+    os.makedirs(source_state_dir, exist_ok=True)
+    committed_part_paths = remove_stale_state_files(source_state_dir, watermark)
+
+    new_filtered_rows = filter_appended_whitesands_f4_rows(
+        appended_rows,
+        date_column_name=date_column_name,
+        start_year=start_year,
+        end_year=end_year,
+        start_month=start_month,
+        end_month=end_month,
+        column_dtypes=column_dtypes,
+    ) if not appended_rows.empty else appended_rows
+
+    if watermark is not None and watermark.get("summary_file_name") is not None:
+        whitesands_f4_summary = pd.read_parquet(os.path.join(source_state_dir, watermark["summary_file_name"]))
+    else:
+        whitesands_f4_summary = None
+
+    if not new_filtered_rows.empty:
+        # store the new rows as the part of their byte range
+        if committed_part_paths:
+            new_filtered_rows = align_part_dtypes(new_filtered_rows, committed_part_paths[0])
+        part_path = os.path.join(
+            source_state_dir,
+            f"part-{start_byte_offset:015d}-{new_watermark['byte_offset']:015d}.parquet",
+        )
+        write_state_file(new_filtered_rows, part_path)
+        committed_part_paths.append(part_path)
+
+        new_whitesands_f4_summary = aggregate_whitesands_f4_data(
+            new_filtered_rows,
+            wind_direction_column_name=wind_direction_column_name,
+        )
+        if whitesands_f4_summary is None:
+            whitesands_f4_summary = new_whitesands_f4_summary
+        else:
+            whitesands_f4_summary = merge_whitesands_f4_summaries(
+                whitesands_f4_summary,
+                new_whitesands_f4_summary,
+            )
+        new_watermark["summary_file_name"] = f"summary-{new_watermark['byte_offset']:015d}.parquet"
+        write_state_file(whitesands_f4_summary, os.path.join(source_state_dir, new_watermark["summary_file_name"]))
+        new_watermark["last_timestamp"] = str(appended_rows[date_column_name].max())
+
+    # saving the watermark commits the new part and summary table
+    watermarks[watermark_key] = new_watermark
+    save_watermarks(watermarks, state_dir)
+    remove_stale_state_files(source_state_dir, new_watermark)
+    if len(committed_part_paths) > max_parts:
+        compact_parts(committed_part_paths)
+
+    ingestion_result = {
+        "number_of_new_rows": len(appended_rows),
+        "number_of_new_filtered_rows": len(new_filtered_rows),
+        "new_filtered_rows": new_filtered_rows,
+        "whitesands_f4_summary": whitesands_f4_summary,
+        "watermark": new_watermark,
+    }
+
+    return ingestion_result
+
+
+@instrument_function
+def read_incrementally_ingested_whitesands_f4_data(
+    file_path: str,
+    state_dir: str,
+    date_column_name: str,
+    start_year: int,
+    end_year: int,
+    start_month: int,
+    end_month: int,
+    column_dtypes: dict = None,
+    columns: list = None,
+) -> pd.DataFrame:
+    """
+    Read the cleaned Whitesands F4 data stored by `ingest_whitesands_f4_data_incrementally`
+
+    Unlike the ingestion, this reads every stored row, so it should only be
+    used by the stages that need the rows and not only the summary table.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the source Whitesands F4 data
+    state_dir : str
+        The directory of the incremental ingestion state
+    date_column_name : str
+        The name of the date column
+    start_year : int
+        The start year of interest the data was ingested with
+    end_year : int
+        The end year of interest the data was ingested with
+    start_month : int
+        The start month of interest the data was ingested with
+    end_month : int
+        The end month of interest the data was ingested with
+    column_dtypes : dict, optional
+        The compact dtypes the data was ingested with. Default is None.
+    columns : list, optional
+        The columns to read. Default is None, which reads all columns.
+
+    Returns
+    -------
+    filtered_whitesands_f4_data : DataFrame
+        The cleaned rows of all committed parts in file order. Without rows,
+        an empty DataFrame with the columns of the cleaned data.
+    """
+    validate_type(file_path, str, "Whitesands F4 data path")
+    validate_type(state_dir, str, "state_dir")
+    validate_type(date_column_name, str, "date_column_name")
+
+    watermark_key = create_watermark_key(file_path, start_year, end_year, start_month, end_month)
+    watermark = load_watermarks(state_dir).get(watermark_key)
+    committed_part_paths, _ = find_part_paths(
+        create_source_state_dir(state_dir, watermark_key),
+        byte_offset=None if watermark is None else watermark["byte_offset"],
+    )
+    if not committed_part_paths:
+        filtered_whitesands_f4_data = filter_appended_whitesands_f4_rows(
+            pd.read_csv(file_path, nrows=0, dtype={date_column_name: str}),
+            date_column_name=date_column_name,
+            start_year=start_year,
+            end_year=end_year,
+            start_month=start_month,
+            end_month=end_month,
+            column_dtypes=column_dtypes,
+        )
+        return filtered_whitesands_f4_data if columns is None else filtered_whitesands_f4_data[columns]
+    filtered_whitesands_f4_data = read_parts(committed_part_paths, columns=columns)
+    if column_dtypes is not None:
+        # Parquet has no second resolution, so datetime64[s] columns are read
+        # back as datetime64[ms]
+        filtered_whitesands_f4_data = compact_dtypes(filtered_whitesands_f4_data, column_dtypes=column_dtypes)
+
+    return filtered_whitesands_f4_data
+
+
+def read_incrementally_ingested_whitesands_f4_summary(
+    file_path: str,
+    state_dir: str,
+    start_year: int,
+    end_year: int,
+    start_month: int,
+    end_month: int,
+) -> pd.DataFrame:
+    """
+    Read the summary table stored by `ingest_whitesands_f4_data_incrementally`
+
+    The summary table is merged from the summaries of the appended rows, so
+    the aggregate cube can be created without aggregating all rows again.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the source Whitesands F4 data
+    state_dir : str
+        The directory of the incremental ingestion state
+    start_year : int
+        The start year of interest the data was ingested with
+    end_year : int
+        The end year of interest the data was ingested with
+    start_month : int
+        The start month of interest the data was ingested with
+    end_month : int
+        The end month of interest the data was ingested with
+
+    Returns
+    -------
+    whitesands_f4_summary : DataFrame
+        The output of `aggregate_whitesands_f4_data` for all ingested rows,
+        or None if no rows have been ingested
+    """
+    validate_type(file_path, str, "Whitesands F4 data path")
+    validate_type(state_dir, str, "state_dir")
+
+    watermark_key = create_watermark_key(file_path, start_year, end_year, start_month, end_month)
+    watermark = load_watermarks(state_dir).get(watermark_key)
+    if watermark is None or watermark.get("summary_file_name") is None:
+        return None
+    whitesands_f4_summary = pd.read_parquet(
+        os.path.join(create_source_state_dir(state_dir, watermark_key), watermark["summary_file_name"])
+    )
+
+    return whitesands_f4_summary
+
+
+def update_whitesands_f4_data_incrementally(
+    file_path: str,
+    state_dir: str,
+    date_column_name: str,
+    start_year: int,
+    end_year: int,
+    start_month: int,
+    end_month: int,
+    wind_direction_column_name: str,
+    column_dtypes: dict = None,
+    max_parts: int = MAX_PARTS,
+) -> dict:
+    """
+    Ingest the appended Whitesands F4 rows and report how many were kept
+
+    The cleaning task of the analysis pipeline when the incremental ingestion
+    is on (see `ingest_whitesands_f4_data_incrementally`). It only reads,
+    cleans, and aggregates the appended rows, so its time scales with the new
+    data. The whole cleaned dataset can be read back with
+    `read_incrementally_ingested_whitesands_f4_data` by the stages that need it.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the Whitesands F4 data
+    state_dir : str
+        The directory to store the watermarks, cleaned data, and aggregates
+    date_column_name : str
+        The name of the date column
+    start_year : int
+        The start year of interest
+    end_year : int
+        The end year of interest
+    start_month : int
+        The start month of interest
+    end_month : int
+        The end month of interest
+    wind_direction_column_name : str
+        The name of the wind direction column
+    column_dtypes : dict, optional
+        The compact dtypes of the filtered data columns (see `compact_dtypes`).
+        Default is None, which keeps the dtypes.
+    max_parts : int, optional
+        The number of parts above which they are compacted into one.
+        Default is 8.
+
+    Returns
+    -------
+    ingestion_result : dict
+        The output of `ingest_whitesands_f4_data_incrementally`, with the new
+        filtered rows and the merged summary table
+    """
+    ingestion_result = ingest_whitesands_f4_data_incrementally(
+        file_path,
+        state_dir=state_dir,
+        date_column_name=date_column_name,
+        start_year=start_year,
+        end_year=end_year,
+        start_month=start_month,
+        end_month=end_month,
+        wind_direction_column_name=wind_direction_column_name,
+        column_dtypes=column_dtypes,
+        max_parts=max_parts,
+    )
+    print(
+        f"{ingestion_result['number_of_new_rows']} new Whitesands F4 rows have been ingested,"
+        f" {ingestion_result['number_of_new_filtered_rows']} of them match the data cleaning parameters. \n"
+    )
+
+    return ingestion_result
@@ -0,0 +1,249 @@
+import os
+import json
+import time
+import cProfile
+import functools
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # the resource module is not available on Windows
+    resource = None
+
+
+# the instrumentation settings and the records of the measured stages
+INSTRUMENTATION_SETTINGS = {
+    "enabled": False,
+    "profile_stage": None,
+    "profile_dir": None,
+}
+STAGE_RECORDS = []
+_STAGE_STACK = threading.local()
+
+
+def enable_instrumentation(
+    profile_stage: str = None,
+    profile_dir: str = None,
+) -> None:
+    """
+    Enable the recording of stage measurements and clear previous records
+
+    Parameters
+    ----------
+    profile_stage : str, optional
+        The name of a stage to run under cProfile. Default is None.
+    profile_dir : str, optional
+        The directory to write the cProfile dump of the profiled stage to.
+        Default is None, which uses the current working directory.
+    """
+    INSTRUMENTATION_SETTINGS["enabled"] = True
+    INSTRUMENTATION_SETTINGS["profile_stage"] = profile_stage
+    INSTRUMENTATION_SETTINGS["profile_dir"] = profile_dir
+    STAGE_RECORDS.clear()
+
+
+def disable_instrumentation() -> None:
+    """
+    Disable the recording of stage measurements
+    """
+    INSTRUMENTATION_SETTINGS["enabled"] = False
+    INSTRUMENTATION_SETTINGS["profile_stage"] = None
+
+
+def get_peak_rss_mb() -> float:
+    """
+    Get the peak resident set size of the current process
+
+    Returns
+    -------
+    peak_rss_mb : float or None
+        The peak resident set size in MB. None if it is not available.
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / 1024 ** 2 if os.uname().sysname == "Darwin" else peak_rss / 1024
+
+    return peak_rss_mb
+
+
+def count_rows(
+    data,
+) -> int:
+    """
+    Count the rows of a DataFrame, Series, or array
+
+    Parameters
+    ----------
+    data : any
+        The data to count the rows of
+
+    Returns
+    -------
+    number_of_rows : int or None
+        The number of rows. None if the data has no rows.
+    """
+    shape = getattr(data, "shape", None)
+    if shape is None or len(shape) == 0:
+        return None
+
+    return int(shape[0])
+
+
+@contextmanager
+def measure_stage(
+    stage_name: str,
+    input_rows: int = None,
+):
+    """
+    Measure the wall time, CPU time, peak RSS increase, and row counts of a stage
+
+    The yielded record can be updated in the stage, e.g. to set its
+    "output_rows". Nothing is measured if the instrumentation is not enabled.
+
+    Parameters
+    ----------
+    stage_name : str
+        The name of the stage
+    input_rows : int, optional
+        The number of input rows of the stage. Default is None.
+
+    Yields
+    ------
+    stage_record : dict
+        The record of the stage
+    """
+    stage_record = {"stage": stage_name, "input_rows": input_rows, "output_rows": None}
+    if not INSTRUMENTATION_SETTINGS["enabled"]:
+        yield stage_record
+        return
+
+    stage_stack = getattr(_STAGE_STACK, "stages", [])
+    _STAGE_STACK.stages = stage_stack + [stage_name]
+    stage_record["parent_stage"] = stage_stack[-1] if stage_stack else None
+
+    profiler = None
+    if INSTRUMENTATION_SETTINGS["profile_stage"] == stage_name:
+        profiler = cProfile.Profile()
+
+    peak_rss_before = get_peak_rss_mb()
+    start_cpu_time = time.process_time()
+    start_wall_time = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield stage_record
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        stage_record["wall_time_s"] = time.perf_counter() - start_wall_time
+        stage_record["cpu_time_s"] = time.process_time() - start_cpu_time
+        peak_rss_after = get_peak_rss_mb()
+        stage_record["peak_rss_mb"] = peak_rss_after
+        stage_record["peak_rss_delta_mb"] = (
+            None if peak_rss_before is None else peak_rss_after - peak_rss_before
+        )
+        _STAGE_STACK.stages = stage_stack
+        if profiler is not None:
+            profile_path = os.path.join(
+                INSTRUMENTATION_SETTINGS["profile_dir"] or os.getcwd(),
+                f"{stage_name}.prof",
+            )
+            profiler.dump_stats(profile_path)
+            stage_record["profile_path"] = profile_path
+        STAGE_RECORDS.append(stage_record)
+
+
+def instrument_function(
+    function,
+):
+    """
+    Decorate a processing function to record it as a stage named after the function
+
+    The input rows are counted from the first DataFrame, Series, or array
+    argument and the output rows from the returned value.
+
+    Parameters
+    ----------
+    function : callable
+        The function to instrument
+
+    Returns
+    -------
+    instrumented_function : callable
+        The instrumented function
+    """
+    @functools.wraps(function)
+    def instrumented_function(*args, **kwargs):
+        if not INSTRUMENTATION_SETTINGS["enabled"]:
+            return function(*args, **kwargs)
+
+        input_rows = next(
+            (count_rows(value) for value in list(args) + list(kwargs.values()) if count_rows(value) is not None),
+            None,
+        )
+        with measure_stage(function.__name__, input_rows=input_rows) as stage_record:
+            result = function(*args, **kwargs)
+            stage_record["output_rows"] = count_rows(result)
+
+        return result
+
+    return instrumented_function
+
+
+def create_instrumentation_report() -> dict:
+    """
+    Create a report of the recorded stages
+
+    Returns
+    -------
+    instrumentation_report : dict
+        The stage records in the order they finished, and the total wall and
+        CPU time of each stage name
+    """
+    stage_totals = {}
+    for stage_record in STAGE_RECORDS:
+        stage_total = stage_totals.setdefault(
+            stage_record["stage"],
+            {"calls": 0, "wall_time_s": 0.0, "cpu_time_s": 0.0},
+        )
+        stage_total["calls"] += 1
+        stage_total["wall_time_s"] += stage_record["wall_time_s"]
+        stage_total["cpu_time_s"] += stage_record["cpu_time_s"]
+
+    instrumentation_report = {
+        "pid": os.getpid(),
+        "final_peak_rss_mb": get_peak_rss_mb(),
+        "stages": list(STAGE_RECORDS),
+        "stage_totals": stage_totals,
+    }
+
+    return instrumentation_report
+
+
+def write_instrumentation_report(
+    report_path: str,
+) -> dict:
+    """
+    Write the report of the recorded stages to a JSON file
+
+    Parameters
+    ----------
+    report_path : str
+        The path to the JSON report
+
+    Returns
+    -------
+    instrumentation_report : dict
+        The written report (see `create_instrumentation_report`)
+    """
+    instrumentation_report = create_instrumentation_report()
+    report_dir = os.path.dirname(os.path.abspath(report_path))
+    os.makedirs(report_dir, exist_ok=True)
+    with open(report_path, "w") as f:
+        json.dump(instrumentation_report, f, indent=4)
+
+    return instrumentation_report
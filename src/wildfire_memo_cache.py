@@ -0,0 +1,360 @@
+import os
+import glob
+import json
+import hashlib
+import geopandas as gpd
+import pandas as pd
+import pyarrow.parquet as pq
+from wildfire_instrumentation import instrument_function
+from wildfire_processing_functions import (
+    validate_type,
+    create_file_fingerprint,
+    run_tasks_concurrently,
+    create_temporary_file_path,
+)
+
+
+# the version of the memoized outputs, to be increased when the cleaning
+# functions change their outputs so that older entries are not read back
+MEMO_CACHE_VERSION = 1
+MEMO_CACHE_FILE_SUFFIX = ".memo.parquet"
+MEMO_CACHE_STATISTICS_FILE_NAME = "memo_cache_statistics.json"
+
+
+def create_memo_key(
+    function_name: str,
+    file_path: str,
+    config_section: dict,
+) -> str:
+    """
+    Create the content address of a cleaning output
+
+    The output of a cleaning function is determined by the version of its
+    input file and its config section, so the key is a hash of the file
+    fingerprint and the canonical JSON of the section.
+
+    Parameters
+    ----------
+    function_name : str
+        The name of the cleaning function, e.g. "filter_nfdb_data"
+    file_path : str
+        The path to the input data file
+    config_section : dict
+        The config section of the data, e.g. config["NFDB_data"]
+
+    Returns
+    -------
+    memo_key : str
+        A hexadecimal hash of the inputs
+    """
+    validate_type(function_name, str, "function_name")
+    validate_type(config_section, dict, "config_section")
+
+    memo_key = hashlib.sha256(
+        json.dumps(
+            {
+                "version": MEMO_CACHE_VERSION,
+                "function_name": function_name,
+                "fingerprint": create_file_fingerprint(file_path),
+                "config_section": config_section,
+            },
+            sort_keys=True,
+        ).encode()
+    ).hexdigest()[:32]
+
+    return memo_key
+
+
+def create_memo_file_path(
+    memo_cache_dir: str,
+    memo_key: str,
+) -> str:
+    """
+    Create the path to the memo file of a key
+
+    Parameters
+    ----------
+    memo_cache_dir : str
+        The directory of the memo cache
+    memo_key : str
+        The output of `create_memo_key`
+
+    Returns
+    -------
+    memo_file_path : str
+        The path to the Parquet or GeoParquet memo file
+    """
+    validate_type(memo_cache_dir, str, "memo_cache_dir")
+    validate_type(memo_key, str, "memo_key")
+
+    return os.path.join(memo_cache_dir, memo_key + MEMO_CACHE_FILE_SUFFIX)
+
+
+@instrument_function
+def read_memo_file(
+    memo_cache_dir: str,
+    memo_key: str,
+) -> pd.DataFrame:
+    """
+    Read a memoized cleaning output and mark it as recently used
+
+    Parameters
+    ----------
+    memo_cache_dir : str
+        The directory of the memo cache
+    memo_key : str
+        The output of `create_memo_key`
+
+    Returns
+    -------
+    data_df : DataFrame or GeoDataFrame
+        The memoized output, or None if there is no memo file of the key
+    """
+    memo_file_path = create_memo_file_path(memo_cache_dir, memo_key)
+    if not os.path.exists(memo_file_path):
+        return None
+
+    # GeoDataFrames are written as GeoParquet, which has "geo" metadata
+    memo_file_schema = pq.read_schema(memo_file_path)
+    if b"geo" in (memo_file_schema.metadata or {}):
+        data_df = gpd.read_parquet(memo_file_path)
+    else:
+        data_df = pd.read_parquet(memo_file_path)
+    # Parquet has no second resolution, so datetime64[s] columns are read
+    # back as datetime64[ms] and converted to their written dtype
+    for column_metadata in (memo_file_schema.pandas_metadata or {}).get("columns", []):
+        column_name = column_metadata["name"]
+        if column_name in data_df.columns and str(column_metadata["numpy_type"]).startswith("datetime64") \
+                and str(data_df[column_name].dtype) != column_metadata["numpy_type"]:
+            data_df[column_name] = data_df[column_name].astype(column_metadata["numpy_type"])
+    # the modification time is the last use of the file for the LRU eviction
+    os.utime(memo_file_path)
+
+    return data_df
+
+
+def evict_memo_files(
+    memo_cache_dir: str,
+    max_size_mb: float,
+) -> int:
+    """
+    Remove the least recently used memo files until the cache fits in its maximum size
+
+    Parameters
+    ----------
+    memo_cache_dir : str
+        The directory of the memo cache
+    max_size_mb : float
+        The maximum total size of the memo files in MB
+
+    Returns
+    -------
+    number_of_evictions : int
+        The number of removed memo files
+    """
+    validate_type(max_size_mb, (int, float), "max_size_mb")
+
+    memo_files = sorted(
+        (os.stat(memo_file_path).st_mtime_ns, os.path.getsize(memo_file_path), memo_file_path)
+        for memo_file_path in glob.glob(os.path.join(glob.escape(memo_cache_dir), "*" + MEMO_CACHE_FILE_SUFFIX))
+    )
+    total_size = sum(file_size for _, file_size, _ in memo_files)
+    number_of_evictions = 0
+    for _, file_size, memo_file_path in memo_files:
+        if total_size <= max_size_mb * 1024 ** 2:
+            break
+        os.remove(memo_file_path)
+        total_size -= file_size
+        number_of_evictions += 1
+
+    return number_of_evictions
+
+
+@instrument_function
+def write_memo_file(
+    data_df: pd.DataFrame,
+    memo_cache_dir: str,
+    memo_key: str,
+    max_size_mb: float,
+) -> int:
+    """
+    Write a cleaning output to the memo cache and evict the least recently used files
+
+    If the memo file cannot be written (e.g. a column mixes numbers and
+    strings), a message is printed and the output is left unmemoized.
+
+    Parameters
+    ----------
+    data_df : DataFrame or GeoDataFrame
+        The cleaning output
+    memo_cache_dir : str
+        The directory of the memo cache
+    memo_key : str
+        The output of `create_memo_key`
+    max_size_mb : float
+        The maximum total size of the memo files in MB
+
+    Returns
+    -------
+    number_of_evictions : int
+        The number of removed memo files
+    """
+    validate_type(data_df, pd.DataFrame, "data_df")
+
+    memo_file_path = create_memo_file_path(memo_cache_dir, memo_key)
+    temporary_memo_file_path = None
+    try:
+        os.makedirs(memo_cache_dir, exist_ok=True)
+        temporary_memo_file_path = create_temporary_file_path(memo_file_path)
+        data_df.to_parquet(temporary_memo_file_path)
+        os.replace(temporary_memo_file_path, memo_file_path)
+    # pyarrow raises ValueError and TypeError subclasses for unsupported columns
+    except (ImportError, OSError, ValueError, TypeError) as error:
+        print(f"Failed to write the memo file {memo_file_path}: {error}")
+        if temporary_memo_file_path is not None and os.path.exists(temporary_memo_file_path):
+            os.remove(temporary_memo_file_path)
+        return 0
+
+    return evict_memo_files(memo_cache_dir, max_size_mb=max_size_mb)
+
+
+def update_memo_cache_statistics(
+    memo_cache_dir: str,
+    hits: int = 0,
+    misses: int = 0,
+    evictions: int = 0,
+) -> dict:
+    """
+    Add the hits, misses, and evictions of a run to the statistics of the memo cache
+
+    Parameters
+    ----------
+    memo_cache_dir : str
+        The directory of the memo cache
+    hits : int, optional
+        The number of outputs read from the cache. Default is 0.
+    misses : int, optional
+        The number of outputs that had to be computed. Default is 0.
+    evictions : int, optional
+        The number of removed memo files. Default is 0.
+
+    Returns
+    -------
+    memo_cache_statistics : dict
+        The total hits, misses, and evictions, the hit rate, and the number
+        and total size in MB of the memo files
+    """
+    statistics_file_path = os.path.join(memo_cache_dir, MEMO_CACHE_STATISTICS_FILE_NAME)
+    memo_cache_statistics = {"hits": 0, "misses": 0, "evictions": 0}
+    if os.path.exists(statistics_file_path):
+        with open(statistics_file_path, "r") as f:
+            memo_cache_statistics.update(json.load(f))
+
+    memo_cache_statistics["hits"] += hits
+    memo_cache_statistics["misses"] += misses
+    memo_cache_statistics["evictions"] += evictions
+    number_of_lookups = memo_cache_statistics["hits"] + memo_cache_statistics["misses"]
+    memo_cache_statistics["hit_rate"] = (
+        memo_cache_statistics["hits"] / number_of_lookups if number_of_lookups > 0 else None
+    )
+    memo_file_paths = glob.glob(os.path.join(glob.escape(memo_cache_dir), "*" + MEMO_CACHE_FILE_SUFFIX))
+    memo_cache_statistics["entries"] = len(memo_file_paths)
+    memo_cache_statistics["size_mb"] = sum(os.path.getsize(path) for path in memo_file_paths) / 1024 ** 2
+
+    os.makedirs(memo_cache_dir, exist_ok=True)
+    with open(statistics_file_path, "w") as f:
+        json.dump(memo_cache_statistics, f, indent=4)
+
+    return memo_cache_statistics
+
+
+@instrument_function
+def run_memoized_tasks(
+    tasks: dict,
+    memo_keys: dict,
+    memo_cache_dir: str,
+    max_size_mb: float,
+    use_processes: bool = True,
+    max_workers: int = None,
+    recompute: bool = False,
+) -> dict:
+    """
+    Run cleaning tasks concurrently, reading the outputs of memoized tasks from the cache
+
+    Only the tasks without a memo file are run (see `run_tasks_concurrently`),
+    and their outputs are then written to the cache.
+
+    Parameters
+    ----------
+    tasks : dict
+        The tasks as {task name: (function, keyword arguments)}
+    memo_keys : dict
+        The memo keys of the memoized tasks as {task name: memo key}
+        (see `create_memo_key`). The other tasks always run.
+    memo_cache_dir : str
+        The directory of the memo cache
+    max_size_mb : float
+        The maximum total size of the memo files in MB
+    use_processes : bool, optional
+        Whether to run the tasks in a process pool instead of a thread pool.
+        Default is True.
+    max_workers : int, optional
+        The maximum number of workers. Default is None, which uses one worker
+        per task to run.
+    recompute : bool, optional
+        Whether to run the memoized tasks and overwrite their memo files
+        even if they exist. Default is False.
+
+    Returns
+    -------
+    results : dict
+        The results as {task name: result}, in the order of the tasks
+    """
+    validate_type(tasks, dict, "tasks")
+    validate_type(memo_keys, dict, "memo_keys")
+    validate_type(recompute, bool, "recompute")
+
+    memoized_results = {}
+    if not recompute:
+        for task_name, memo_key in memo_keys.items():
+            memoized_result = read_memo_file(memo_cache_dir, memo_key)
+            if memoized_result is not None:
+                memoized_results[task_name] = memoized_result
+
+    computed_results = {}
+    tasks_to_run = {task_name: task for task_name, task in tasks.items() if task_name not in memoized_results}
+    if len(tasks_to_run) > 0:
+        computed_results = run_tasks_concurrently(
+            tasks_to_run,
+            use_processes=use_processes,
+            max_workers=max_workers,
+        )
+
+    number_of_evictions = 0
+    for task_name, computed_result in computed_results.items():
+        if task_name in memo_keys:
+            number_of_evictions += write_memo_file(
+                computed_result,
+                memo_cache_dir,
+                memo_keys[task_name],
+                max_size_mb=max_size_mb,
+            )
+
+    memo_cache_statistics = update_memo_cache_statistics(
+        memo_cache_dir,
+        hits=len(memoized_results),
+        misses=len(memo_keys) - len(memoized_results),
+        evictions=number_of_evictions,
+    )
+    print(
+        f"{len(memoized_results)} of {len(memo_keys)} cleaning outputs have been read from the memo cache"
+        f" ({memo_cache_statistics['hits']} hits and {memo_cache_statistics['misses']} misses in total,"
+        f" {memo_cache_statistics['entries']} entries using {memo_cache_statistics['size_mb']:.2f} MB). \n"
+    )
+
+    results = {
+        task_name: memoized_results[task_name] if task_name in memoized_results else computed_results[task_name]
+        for task_name in tasks
+    }
+
+    return results
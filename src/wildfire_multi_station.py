@@ -0,0 +1,178 @@
+import os
+import glob
+import pandas as pd
+from wildfire_instrumentation import instrument_function
+from wildfire_processing_functions import (
+    validate_type,
+    aggregate_whitesands_f4_data,
+    filter_whitesands_f4_data,
+    create_whitesands_f4_filter_arguments,
+    run_tasks_concurrently,
+)
+
+
+def find_station_files(
+    station_files: str,
+) -> list:
+    """
+    Find the weather station files of a directory or glob pattern
+
+    Parameters
+    ----------
+    station_files : str
+        A directory of station CSV files or a glob pattern of station files,
+        e.g. "data_package/stations/*.csv"
+
+    Returns
+    -------
+    station_file_paths : list
+        The sorted paths of the station files
+    """
+    validate_type(station_files, str, "station_files")
+
+    if os.path.isdir(station_files):
+        station_files = os.path.join(glob.escape(station_files), "*.csv")
+    station_file_paths = sorted(glob.glob(station_files))
+    if len(station_file_paths) == 0:
+        raise ValueError(f"No weather station files found for {station_files}.")
+
+    return station_file_paths
+
+
+def create_station_id(
+    file_path: str,
+) -> str:
+    """
+    Create the id of a weather station from the name of its file
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the station file
+
+    Returns
+    -------
+    station_id : str
+        The file name without its extension, e.g. "Whitesands_F4"
+    """
+    validate_type(file_path, str, "file_path")
+
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+
+def process_weather_station(
+    station_id: str,
+    whitesands_f4_filter_arguments: dict,
+    wind_direction_column_name: str,
+    station_column_name: str = "station_id",
+) -> pd.DataFrame:
+    """
+    Clean and aggregate the data of one weather station
+
+    Only the aggregated data is returned, so a worker holds at most one
+    station's cleaned data at a time, or one chunk of it if the filter
+    arguments set a chunk size.
+
+    Parameters
+    ----------
+    station_id : str
+        The id of the station
+    whitesands_f4_filter_arguments : dict
+        The keyword arguments of `filter_whitesands_f4_data` for the station file
+    wind_direction_column_name : str
+        The name of the wind direction column
+    station_column_name : str, optional
+        The name of the station column. Default is "station_id".
+
+    Returns
+    -------
+    station_summary : DataFrame
+        The output of `aggregate_whitesands_f4_data` with the station column first
+    """
+    validate_type(station_id, str, "station_id")
+    validate_type(station_column_name, str, "station_column_name")
+
+    station_summary = aggregate_whitesands_f4_data(
+        filter_whitesands_f4_data(**whitesands_f4_filter_arguments),
+        wind_direction_column_name=wind_direction_column_name,
+    )
+    station_summary.insert(0, station_column_name, station_id)
+
+    return station_summary
+
+
+@instrument_function
+def process_weather_stations(
+    config: dict,
+    station_file_paths: list,
+    max_workers: int = None,
+    use_cache: bool = True,
+    rebuild_cache: bool = False,
+    station_column_name: str = "station_id",
+) -> pd.DataFrame:
+    """
+    Clean and aggregate many weather station files in a process pool
+
+    Every station file has the schema of the Whitesands F4 data and is cleaned
+    with the Whitesands_F4_data parameters of the config. Each station is one
+    task, so the throughput grows with the number of workers until the disk
+    is the bottleneck.
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    station_file_paths : list
+        The paths to the station files (see `find_station_files`)
+    max_workers : int, optional
+        The maximum number of worker processes. Default is None, which uses
+        one worker per CPU. If 1, the stations are processed one after the
+        other in the current process.
+    use_cache : bool, optional
+        Whether to read the files through the columnar cache. Default is True.
+    rebuild_cache : bool, optional
+        Whether to rebuild the columnar cache. Default is False.
+    station_column_name : str, optional
+        The name of the station column. Default is "station_id".
+
+    Returns
+    -------
+    station_summary : DataFrame
+        The aggregated data of all stations keyed on the station column
+        (see `aggregate_whitesands_f4_data`), in the order of the files
+    """
+    validate_type(config, dict, "config")
+    validate_type(station_file_paths, list, "station_file_paths")
+    if len(station_file_paths) == 0:
+        raise ValueError("At least one weather station file should be given.")
+    if max_workers is None:
+        max_workers = min(os.cpu_count() or 1, len(station_file_paths))
+
+    station_ids = [create_station_id(file_path) for file_path in station_file_paths]
+    if len(set(station_ids)) != len(station_ids):
+        raise ValueError("The weather station file names should be unique.")
+
+    whitesands_f4_filter_arguments = create_whitesands_f4_filter_arguments(
+        config, use_cache=use_cache, rebuild_cache=rebuild_cache
+    )
+    station_tasks = {
+        station_id: (
+            process_weather_station,
+            {
+                "station_id": station_id,
+                "whitesands_f4_filter_arguments": {**whitesands_f4_filter_arguments, "file_path": file_path},
+                "wind_direction_column_name": config["Whitesands_F4_data"]["weather_data"]["wind_direction_column_name"],
+                "station_column_name": station_column_name,
+            },
+        )
+        for station_id, file_path in zip(station_ids, station_file_paths)
+    }
+    station_summaries = run_tasks_concurrently(station_tasks, use_processes=True, max_workers=max_workers)
+
+    station_summary = pd.concat(station_summaries.values(), ignore_index=True)
+    station_summary[station_column_name] = pd.Categorical(
+        station_summary[station_column_name],
+        categories=station_ids,
+    )
+
+    return station_summary
@@ -0,0 +1,391 @@
+import os
+import copy
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from wildfire_instrumentation import instrument_function
+from wildfire_processing_functions import (
+    validate_type,
+    apply_query,
+    create_query,
+    create_nfdb_query,
+    create_whitesands_f4_query,
+    create_nfdb_filter_arguments,
+    create_whitesands_f4_filter_arguments,
+    read_vector_file_into_gdf,
+    read_csv_file_into_df,
+)
+
+
+# the filter arguments of the data files and columns, which are the same for
+# every configuration of a sweep since the data is only loaded once
+SWEEP_FIXED_ARGUMENT_NAMES = {
+    "NFDB": [
+        "file_path",
+        "province_or_territory_column_name",
+        "region_centre_latitude_column_name",
+        "region_centre_longitude_column_name",
+        "year_column",
+        "month_column",
+        "columns",
+    ],
+    "Whitesands F4": ["file_path", "date_column_name"],
+}
+
+# the filter arguments of how the data is read rather than filtered
+READ_ARGUMENT_NAMES = ["use_cache", "rebuild_cache", "cache_dir", "chunk_size", "column_dtypes"]
+
+# the datasets of the sweep, set once per worker process (see `set_sweep_data`)
+SWEEP_DATA = {}
+
+
+def apply_config_overrides(
+    config: dict,
+    overrides: dict,
+) -> dict:
+    """
+    Apply overrides of dotted keys to a copy of a config
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    overrides : dict
+        The new values as {dotted key: value}, e.g.
+        {"NFDB_data.region_of_interest.region_radius": 2}
+
+    Returns
+    -------
+    overridden_config : dict
+        A deep copy of the config with the new values
+    """
+    validate_type(config, dict, "config")
+    validate_type(overrides, dict, "overrides")
+
+    overridden_config = copy.deepcopy(config)
+    for dotted_key, value in overrides.items():
+        *section_keys, key = dotted_key.split(".")
+        section = overridden_config
+        for section_key in section_keys:
+            if not isinstance(section.get(section_key), dict):
+                raise ValueError(f"The config has no {dotted_key} parameter to override.")
+            section = section[section_key]
+        if key not in section:
+            raise ValueError(f"The config has no {dotted_key} parameter to override.")
+        section[key] = value
+
+    return overridden_config
+
+
+def create_sweep_configurations(
+    sweep: dict,
+) -> list:
+    """
+    Create the config overrides of every configuration of a sweep
+
+    Parameters
+    ----------
+    sweep : dict
+        The sweep parameters with a "configs" list of overrides, a "grid" of
+        {dotted key: list of values} whose every combination is one
+        configuration, or both, e.g.
+        {"grid": {"NFDB_data.region_of_interest.region_radius": [1, 2, 3],
+                  "NFDB_data.fire_conditions.min_fire_size": [100, 200]}}
+
+    Returns
+    -------
+    sweep_configurations : list
+        The overrides of each configuration, the "configs" list first
+    """
+    validate_type(sweep, dict, "sweep")
+
+    sweep_configurations = list(sweep.get("configs", []))
+    validate_type(sweep_configurations, list, "configs")
+    for overrides in sweep_configurations:
+        validate_type(overrides, dict, "config overrides")
+
+    grid = sweep.get("grid", {})
+    validate_type(grid, dict, "grid")
+    if len(grid) > 0:
+        for dotted_key, values in grid.items():
+            validate_type(values, list, f"grid values of {dotted_key}")
+        sweep_configurations += [
+            dict(zip(grid.keys(), values)) for values in itertools.product(*grid.values())
+        ]
+
+    if len(sweep_configurations) == 0:
+        raise ValueError("The sweep should have at least one configuration in its configs or grid.")
+
+    return sweep_configurations
+
+
+def create_sweep_filter_arguments(
+    config: dict,
+) -> dict:
+    """
+    Create the filter arguments of both datasets of a sweep configuration
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters of the sweep configuration
+
+    Returns
+    -------
+    sweep_filter_arguments : dict
+        The arguments of `create_nfdb_query` and `create_whitesands_f4_query`
+        as {"NFDB": arguments, "Whitesands F4": arguments}
+    """
+    filter_arguments = {
+        "NFDB": create_nfdb_filter_arguments(config),
+        "Whitesands F4": create_whitesands_f4_filter_arguments(config),
+    }
+    sweep_filter_arguments = {
+        data_name: {
+            argument_name: value for argument_name, value in arguments.items()
+            if argument_name not in READ_ARGUMENT_NAMES
+        }
+        for data_name, arguments in filter_arguments.items()
+    }
+
+    return sweep_filter_arguments
+
+
+@instrument_function
+def load_sweep_data(
+    config: dict,
+    use_cache: bool = True,
+    rebuild_cache: bool = False,
+) -> dict:
+    """
+    Load the NFDB and Whitesands F4 data of a sweep once, without filtering
+
+    The Whitesands F4 year and month columns are derived here, so the
+    configurations only filter the data.
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    use_cache : bool, optional
+        Whether to read the data through the columnar cache. Default is True.
+    rebuild_cache : bool, optional
+        Whether to rebuild the columnar cache. Default is False.
+
+    Returns
+    -------
+    sweep_data : dict
+        The data as {"NFDB": GeoDataFrame, "Whitesands F4": DataFrame}
+    """
+    validate_type(config, dict, "config")
+
+    sweep_filter_arguments = create_sweep_filter_arguments(config)
+    nfdb_arguments = sweep_filter_arguments["NFDB"]
+    whitesands_f4_arguments = sweep_filter_arguments["Whitesands F4"]
+    nfdb_columns = list(
+        dict.fromkeys(
+            [
+                nfdb_arguments["province_or_territory_column_name"],
+                nfdb_arguments["region_centre_latitude_column_name"],
+                nfdb_arguments["region_centre_longitude_column_name"],
+                nfdb_arguments["year_column"],
+                nfdb_arguments["month_column"],
+            ]
+            + nfdb_arguments["columns"]
+        )
+    )
+
+    sweep_data = {
+        "NFDB": read_vector_file_into_gdf(
+            nfdb_arguments["file_path"],
+            use_cache=use_cache,
+            rebuild_cache=rebuild_cache,
+            cache_dir=config.get("cache_dir"),
+            columns=nfdb_columns,
+        ),
+        "Whitesands F4": apply_query(
+            read_csv_file_into_df(
+                whitesands_f4_arguments["file_path"],
+                use_cache=use_cache,
+                rebuild_cache=rebuild_cache,
+                cache_dir=config.get("cache_dir"),
+            ),
+            create_query(
+                whitesands_f4_arguments["file_path"],
+                date_column_name=whitesands_f4_arguments["date_column_name"],
+            ),
+        ),
+    }
+
+    return sweep_data
+
+
+def set_sweep_data(
+    sweep_data: dict,
+) -> None:
+    """
+    Set the datasets of the sweep in the current process
+
+    This is the initializer of the worker processes. With the fork start
+    method the workers share the parent's data pages until they write to them,
+    and the configurations only read the data.
+
+    Parameters
+    ----------
+    sweep_data : dict
+        The output of `load_sweep_data`
+    """
+    SWEEP_DATA.clear()
+    SWEEP_DATA.update(sweep_data)
+
+
+def run_sweep_configuration(
+    configuration: tuple,
+) -> dict:
+    """
+    Filter the loaded datasets with one sweep configuration and summarize the result
+
+    Parameters
+    ----------
+    configuration : tuple
+        The (configuration index, overrides, config) of the configuration
+
+    Returns
+    -------
+    sweep_summary_row : dict
+        The configuration index, the overrides, and the summary of the
+        filtered data
+    """
+    configuration_index, overrides, config = configuration
+
+    sweep_filter_arguments = create_sweep_filter_arguments(config)
+    filtered_nfdb_data = apply_query(
+        SWEEP_DATA["NFDB"],
+        create_nfdb_query(**sweep_filter_arguments["NFDB"]),
+    )
+    whitesands_f4_query = create_whitesands_f4_query(**sweep_filter_arguments["Whitesands F4"])
+    # the year and month columns were derived when the data was loaded
+    filtered_whitesands_f4_data = apply_query(
+        SWEEP_DATA["Whitesands F4"],
+        {**whitesands_f4_query, "date_column_name": None},
+    )
+
+    fire_sizes = filtered_nfdb_data[config["NFDB_data"]["fire_conditions"]["fire_size_column_name"]]
+    is_large_fire = fire_sizes > config["NFDB_data"]["fire_conditions"]["min_fire_size"]
+    wind_directions = filtered_whitesands_f4_data[
+        config["Whitesands_F4_data"]["weather_data"]["wind_direction_column_name"]
+    ].value_counts(sort=True)
+    sweep_summary_row = {
+        "configuration_index": configuration_index,
+        **overrides,
+        "number_of_fires": len(filtered_nfdb_data),
+        "number_of_large_fires": int(is_large_fire.sum()),
+        "large_fire_area": float(fire_sizes[is_large_fire].sum()),
+        "number_of_measurements": len(filtered_whitesands_f4_data),
+        "minimum_temperature_mean": filtered_whitesands_f4_data["minimum_temperature"].mean(),
+        "maximum_temperature_mean": filtered_whitesands_f4_data["maximum_temperature"].mean(),
+        "relative_humidity_mean": filtered_whitesands_f4_data["relative_humidity"].mean(),
+        "wind_speed_mean": filtered_whitesands_f4_data[
+            config["Whitesands_F4_data"]["weather_data"]["wind_speed_column_name"]
+        ].mean(),
+        "predominant_wind_direction": wind_directions.index[0] if len(wind_directions) > 0 else None,
+    }
+
+    return sweep_summary_row
+
+
+@instrument_function
+def run_parameter_sweep(
+    config: dict,
+    sweep: dict,
+    max_workers: int = None,
+    use_cache: bool = True,
+    rebuild_cache: bool = False,
+) -> pd.DataFrame:
+    """
+    Run the cleaning of many configurations on datasets that are loaded once
+
+    Each configuration is the config with a set of overrides (see
+    `create_sweep_configurations`). The NFDB and Whitesands F4 data are read
+    once and shared read-only with a pool of worker processes, so every
+    configuration only costs one fused filter pass over each dataset in memory.
+
+    Parameters
+    ----------
+    config : dict
+        The base configuration parameters
+    sweep : dict
+        The sweep parameters (see `create_sweep_configurations`)
+    max_workers : int, optional
+        The maximum number of worker processes. Default is None, which uses
+        one worker per CPU. If 1, the configurations run one after the other
+        in the current process.
+    use_cache : bool, optional
+        Whether to read the data through the columnar cache. Default is True.
+    rebuild_cache : bool, optional
+        Whether to rebuild the columnar cache. Default is False.
+
+    Returns
+    -------
+    sweep_summary : DataFrame
+        One row per configuration with its index, its overrides, the number of
+        fires, large fires, and measurements, the large fire area, the means of
+        the weather variables, and the predominant wind direction
+    """
+    validate_type(config, dict, "config")
+    validate_type(sweep, dict, "sweep")
+
+    sweep_configurations = create_sweep_configurations(sweep)
+    if max_workers is None:
+        max_workers = min(os.cpu_count() or 1, len(sweep_configurations))
+    validate_type(max_workers, int, "max_workers")
+
+    configurations = []
+    base_filter_arguments = create_sweep_filter_arguments(config)
+    for configuration_index, overrides in enumerate(sweep_configurations):
+        overridden_config = apply_config_overrides(config, overrides)
+        sweep_filter_arguments = create_sweep_filter_arguments(overridden_config)
+        for data_name, argument_names in SWEEP_FIXED_ARGUMENT_NAMES.items():
+            for argument_name in argument_names:
+                if sweep_filter_arguments[data_name][argument_name] != base_filter_arguments[data_name][argument_name]:
+                    raise ValueError(
+                        f"The {data_name} {argument_name} should be the same for every configuration"
+                        f" of a sweep, but configuration {configuration_index} changes it."
+                    )
+        configurations.append((configuration_index, overrides, overridden_config))
+
+    sweep_data = load_sweep_data(config, use_cache=use_cache, rebuild_cache=rebuild_cache)
+
+    if max_workers <= 1:
+        set_sweep_data(sweep_data)
+        try:
+            sweep_summary_rows = [run_sweep_configuration(configuration) for configuration in configurations]
+        finally:
+            set_sweep_data({})
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=set_sweep_data,
+            initargs=(sweep_data,),
+        ) as executor:
+            sweep_summary_rows = list(
+                executor.map(
+                    run_sweep_configuration,
+                    configurations,
+                    # a few batches per worker keep the task overhead small
+                    chunksize=max(1, len(configurations) // (4 * max_workers)),
+                )
+            )
+
+    # the override columns come before the summary columns
+    override_column_names = list(
+        dict.fromkeys(dotted_key for overrides in sweep_configurations for dotted_key in overrides)
+    )
+    sweep_summary = pd.DataFrame(sweep_summary_rows)
+    sweep_summary = sweep_summary[
+        ["configuration_index"]
+        + override_column_names
+        + [column_name for column_name in sweep_summary.columns if column_name not in override_column_names][1:]
+    ]
+
+    return sweep_summary
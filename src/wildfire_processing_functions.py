@@ -1,9 +1,17 @@
 import os
+import re
 import json
+import math
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import geopandas as gpd
 import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
 import numpy as np
+import shapely
+from wildfire_instrumentation import instrument_function
 
 
 def set_plot_font_size(
@@ -20,125 +28,534 @@ def set_plot_font_size(
     plt.rcParams.update({'font.size': font_size})
 
 
-def visualize_whitesands_F4_results(
+@instrument_function
+def aggregate_whitesands_f4_data(
+    filtered_whitesands_f4_data: pd.DataFrame,
+    wind_direction_column_name: str,
+    variable_column_names: list = None,
+) -> pd.DataFrame:
+    """
+    Aggregate the filtered Whitesands F4 data in a single grouped pass
+
+    The rows are grouped once by month, year, and wind direction. The sums and
+    counts of each variable are kept (rather than means), so the monthly wind
+    direction counts and the per month/year means can be derived from this
+    small table without going back to the rows (see
+    `summarize_wind_directions` and `summarize_monthly_annual_means`).
+
+    Parameters
+    ----------
+    filtered_whitesands_f4_data : DataFrame
+        The filtered Whitesands F4 data with year and month columns
+    wind_direction_column_name : str
+        The name of the wind direction column
+    variable_column_names : list, optional
+        The names of the variables to average. Default is None, which uses
+        minimum_temperature, maximum_temperature, and relative_humidity.
+
+    Returns
+    -------
+    whitesands_f4_summary : DataFrame
+        One row per month, year, and wind direction with the
+        number_of_measurements and the <variable>_sum and <variable>_count
+        columns of each variable
+    """
+    validate_type(filtered_whitesands_f4_data, pd.DataFrame, "filtered_whitesands_f4_data")
+    validate_type(wind_direction_column_name, str, "wind_direction_column_name")
+    if variable_column_names is None:
+        variable_column_names = ["minimum_temperature", "maximum_temperature", "relative_humidity"]
+    validate_type(variable_column_names, list, "variable_column_names")
+
+    grouped_data = filtered_whitesands_f4_data.groupby(
+        ["month", "year", wind_direction_column_name],
+        dropna=False,
+        observed=True,
+        sort=True,
+    )
+    aggregations = {"number_of_measurements": (wind_direction_column_name, "size")}
+    for variable_column_name in variable_column_names:
+        aggregations[f"{variable_column_name}_sum"] = (variable_column_name, "sum")
+        aggregations[f"{variable_column_name}_count"] = (variable_column_name, "count")
+    whitesands_f4_summary = grouped_data.agg(**aggregations).reset_index()
+    whitesands_f4_summary = whitesands_f4_summary.rename(
+        columns={wind_direction_column_name: "wind_direction"}
+    )
+
+    return whitesands_f4_summary
+
+
+def summarize_wind_directions(
+    whitesands_f4_summary: pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    Count the wind direction measurements of each month from the summary table
+
+    Parameters
+    ----------
+    whitesands_f4_summary : DataFrame
+        The output of `aggregate_whitesands_f4_data`
+
+    Returns
+    -------
+    wind_direction_counts : DataFrame
+        The number of measurements with the months as the index and the wind
+        directions as the columns
+    """
+    validate_type(whitesands_f4_summary, pd.DataFrame, "whitesands_f4_summary")
+
+    wind_direction_counts = whitesands_f4_summary.dropna(subset=["wind_direction"]).pivot_table(
+        index="month",
+        columns="wind_direction",
+        values="number_of_measurements",
+        aggfunc="sum",
+        fill_value=0,
+        observed=True,
+    )
+
+    return wind_direction_counts
+
+
+def summarize_monthly_annual_means(
+    whitesands_f4_summary: pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    Average the variables of each month and year from the summary table
+
+    Parameters
+    ----------
+    whitesands_f4_summary : DataFrame
+        The output of `aggregate_whitesands_f4_data`
+
+    Returns
+    -------
+    monthly_annual_means : DataFrame
+        The mean of each variable with (month, year) as the index
+    """
+    validate_type(whitesands_f4_summary, pd.DataFrame, "whitesands_f4_summary")
+
+    variable_column_names = [
+        column_name[:-len("_sum")] for column_name in whitesands_f4_summary.columns
+        if column_name.endswith("_sum")
+    ]
+    monthly_annual_totals = whitesands_f4_summary.groupby(["month", "year"]).sum(numeric_only=True)
+    monthly_annual_means = pd.DataFrame(
+        {
+            variable_column_name: monthly_annual_totals[f"{variable_column_name}_sum"]
+            / monthly_annual_totals[f"{variable_column_name}_count"]
+            for variable_column_name in variable_column_names
+        }
+    )
+
+    return monthly_annual_means
+
+
+# the compass names of the wind direction sectors of 4, 8, and 16 sector wind roses
+COMPASS_DIRECTION_NAMES = {
+    4: ["N", "E", "S", "W"],
+    8: ["N", "NE", "E", "SE", "S", "SW", "W", "NW"],
+    16: ["N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE", "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"],
+}
+# the direction in degrees of the compass names of wind direction columns
+COMPASS_DIRECTION_DEGREES = {
+    direction_name: 22.5 * i for i, direction_name in enumerate(COMPASS_DIRECTION_NAMES[16])
+}
+CALM_WIND_DIRECTION_NAME = "CLM"
+WIND_ROSE_SPEED_CLASS_EDGES = [0, 10, 20, 30, 40]
+
+
+@instrument_function
+def aggregate_wind_rose(
+    weather_df: pd.DataFrame,
+    wind_direction_column_name: str,
+    wind_speed_column_name: str,
+    month_column_name: str = "month",
+    station_column_name: str = None,
+    number_of_sectors: int = 8,
+    speed_class_edges: list = None,
+) -> pd.DataFrame:
+    """
+    Count the wind measurements of each direction sector, speed class, and month in a single pass
+
+    Every measurement is given an integer direction sector, speed class,
+    month, and station, which are combined into one cell number and counted
+    with `numpy.bincount`. The wind directions can be in degrees or compass
+    names (e.g. "NE"). A direction on the edge of two sectors, e.g. "NNE" in
+    an 8 sector wind rose, is counted half in each of them, so the counts
+    can end in .5. Calm measurements (a wind speed of 0 or the "CLM"
+    direction) are counted in the "CLM" direction, and measurements without a
+    direction or speed are left out. The number of compass names that are
+    not known (see `COMPASS_DIRECTION_DEGREES`) is printed.
+
+    Parameters
+    ----------
+    weather_df : DataFrame
+        The weather with a month column, e.g. the output of `filter_whitesands_f4_data`
+    wind_direction_column_name : str
+        The name of the wind direction column
+    wind_speed_column_name : str
+        The name of the wind speed column
+    month_column_name : str, optional
+        The name of the month column. Default is "month".
+    station_column_name : str, optional
+        The name of the station column of weather from many stations.
+        Default is None, which treats all rows as one station.
+    number_of_sectors : int, optional
+        The number of direction sectors, 4, 8, or 16. Default is 8.
+    speed_class_edges : list, optional
+        The lower edges of the speed classes, the last class being open-ended.
+        Default is None, which uses [0, 10, 20, 30, 40].
+
+    Returns
+    -------
+    wind_rose : DataFrame
+        One row per station (if given), month, direction, and speed class
+        with measurements, with the "direction" and "speed_class" columns as
+        ordered categories and the (float) "number_of_measurements" column
+    """
+    validate_type(weather_df, pd.DataFrame, "weather_df")
+    validate_type(wind_direction_column_name, str, "wind_direction_column_name")
+    validate_type(wind_speed_column_name, str, "wind_speed_column_name")
+    validate_type(number_of_sectors, int, "number_of_sectors")
+    if number_of_sectors not in COMPASS_DIRECTION_NAMES:
+        raise ValueError(f"The number_of_sectors should be one of {list(COMPASS_DIRECTION_NAMES)} not {number_of_sectors}.")
+    if speed_class_edges is None:
+        speed_class_edges = WIND_ROSE_SPEED_CLASS_EDGES
+    validate_type(speed_class_edges, list, "speed_class_edges")
+    speed_class_edges = np.asarray(speed_class_edges, dtype=float)
+    if len(speed_class_edges) == 0 or np.any(np.diff(speed_class_edges) <= 0):
+        raise ValueError("The speed_class_edges should be increasing.")
+
+    wind_directions = weather_df[wind_direction_column_name]
+    if pd.api.types.is_numeric_dtype(wind_directions):
+        direction_degrees = wind_directions.to_numpy(dtype=float)
+        is_calm_direction = np.zeros(len(weather_df), dtype=bool)
+    else:
+        direction_names = wind_directions.astype("string").str.strip().str.upper()
+        direction_degrees = direction_names.map(COMPASS_DIRECTION_DEGREES).to_numpy(dtype=float, na_value=np.nan)
+        is_calm_direction = (direction_names == CALM_WIND_DIRECTION_NAME).to_numpy(dtype=bool, na_value=False)
+        unknown_direction_names = direction_names[
+            direction_names.notna().to_numpy() & np.isnan(direction_degrees) & ~is_calm_direction
+        ]
+        if len(unknown_direction_names) > 0:
+            print(
+                f"{len(unknown_direction_names)} wind measurements with unknown directions"
+                f" ({', '.join(sorted(unknown_direction_names.unique())[:10])}) have been left out of the wind rose. \n"
+            )
+    wind_speeds = pd.to_numeric(weather_df[wind_speed_column_name], errors="coerce").to_numpy(dtype=float)
+    months = pd.to_numeric(weather_df[month_column_name], errors="coerce").to_numpy(dtype=float)
+    if station_column_name is not None:
+        station_codes, station_ids = pd.factorize(weather_df[station_column_name], sort=True)
+    else:
+        station_codes, station_ids = np.zeros(len(weather_df), dtype=np.int64), [None]
+
+    # the integer bins of each measurement, with the calm direction after the sectors
+    sector_width = 360.0 / number_of_sectors
+    is_calm = is_calm_direction | (wind_speeds == 0)
+    with np.errstate(invalid="ignore"):
+        sector_positions = (direction_degrees + sector_width / 2) % 360 / sector_width
+        sectors = np.where(is_calm, number_of_sectors, np.floor(sector_positions))
+        is_on_sector_edge = ~is_calm & (sector_positions == np.floor(sector_positions))
+    speed_classes = np.searchsorted(speed_class_edges, np.where(is_calm, speed_class_edges[0], wind_speeds), side="right") - 1
+    is_counted = (
+        (~np.isnan(direction_degrees) | is_calm)
+        & ~np.isnan(wind_speeds) & (speed_classes >= 0)
+        & (months >= 1) & (months <= 12)
+        & (station_codes >= 0)
+    )
+
+    # one cell number per measurement, and a second one in the sector
+    # anticlockwise of the edge for the directions on a sector edge, which
+    # are counted half in each, counted in one pass
+    is_split = is_counted & is_on_sector_edge
+    grid_shape = (len(station_ids), 12, number_of_sectors + 1, len(speed_class_edges))
+    cell_numbers = np.ravel_multi_index(
+        (
+            np.concatenate([station_codes[is_counted], station_codes[is_split]]),
+            np.concatenate([months[is_counted], months[is_split]]).astype(np.int64) - 1,
+            np.concatenate([sectors[is_counted], (sectors[is_split] - 1) % number_of_sectors]).astype(np.int64),
+            np.concatenate([speed_classes[is_counted], speed_classes[is_split]]),
+        ),
+        grid_shape,
+    )
+    cell_weights = np.concatenate(
+        [np.where(is_on_sector_edge[is_counted], 0.5, 1.0), np.full(is_split.sum(), 0.5)]
+    )
+    cell_counts = np.bincount(cell_numbers, weights=cell_weights, minlength=int(np.prod(grid_shape)))
+    cells = np.flatnonzero(cell_counts)
+    station_positions, month_positions, sector_positions, speed_class_positions = np.unravel_index(cells, grid_shape)
+
+    speed_class_names = [
+        f"{lower_edge:g}-{upper_edge:g}" for lower_edge, upper_edge in zip(speed_class_edges[:-1], speed_class_edges[1:])
+    ] + [f"{speed_class_edges[-1]:g}+"]
+    wind_rose = pd.DataFrame(
+        {
+            "month": month_positions + 1,
+            "direction": pd.Categorical.from_codes(
+                sector_positions,
+                categories=COMPASS_DIRECTION_NAMES[number_of_sectors] + [CALM_WIND_DIRECTION_NAME],
+                ordered=True,
+            ),
+            "speed_class": pd.Categorical.from_codes(speed_class_positions, categories=speed_class_names, ordered=True),
+            "number_of_measurements": cell_counts[cells],
+        }
+    )
+    if station_column_name is not None:
+        wind_rose.insert(0, station_column_name, np.asarray(station_ids)[station_positions])
+
+    return wind_rose
+
+
+def summarize_predominant_wind_directions(
+    wind_rose: pd.DataFrame,
+    station_column_name: str = None,
+) -> pd.DataFrame:
+    """
+    Find the predominant wind direction of each month from the wind rose
+
+    Parameters
+    ----------
+    wind_rose : DataFrame
+        The output of `aggregate_wind_rose`
+    station_column_name : str, optional
+        The name of the station column. Default is None.
+
+    Returns
+    -------
+    predominant_wind_directions : DataFrame
+        One row per station (if given) and month with the
+        "number_of_measurements", the "predominant_direction" (the most
+        frequent direction other than calm), and its
+        "predominant_direction_percentage" of all measurements
+    """
+    validate_type(wind_rose, pd.DataFrame, "wind_rose")
+
+    group_column_names = ([station_column_name] if station_column_name is not None else []) + ["month"]
+    direction_counts = wind_rose.groupby(
+        group_column_names + ["direction"],
+        observed=True,
+        sort=True,
+    )["number_of_measurements"].sum().reset_index()
+    number_of_measurements = direction_counts.groupby(group_column_names)["number_of_measurements"].sum()
+    # the first of the most frequent directions, in compass order
+    predominant_directions = direction_counts[
+        direction_counts["direction"] != CALM_WIND_DIRECTION_NAME
+    ].sort_values(
+        group_column_names + ["number_of_measurements", "direction"],
+        ascending=[True] * len(group_column_names) + [False, True],
+        kind="stable",
+    ).drop_duplicates(group_column_names).set_index(group_column_names)
+
+    predominant_wind_directions = pd.DataFrame(
+        {
+            "number_of_measurements": number_of_measurements,
+            "predominant_direction": predominant_directions["direction"],
+            "predominant_direction_percentage": (
+                predominant_directions["number_of_measurements"] / number_of_measurements * 100
+            ),
+        }
+    ).reset_index()
+
+    return predominant_wind_directions
+
+
+@instrument_function
+def aggregate_nfdb_data(
+    filtered_nfdb_data: pd.DataFrame,
+    year_column: str,
+    month_column: str,
+    fire_size_column: str,
+    min_fire_size: float,
+) -> pd.DataFrame:
+    """
+    Count the fires and the large fires of each year and month in a single grouped pass
+
+    Parameters
+    ----------
+    filtered_nfdb_data : DataFrame or GeoDataFrame
+        The filtered NFDB data
+    year_column : str
+        The name of the year column
+    month_column : str
+        The name of the month column
+    fire_size_column : str
+        The name of the fire size column
+    min_fire_size : float
+        The fire size above which a fire is counted as a large fire
+
+    Returns
+    -------
+    nfdb_summary : DataFrame
+        One row per year and month with the number_of_fires and
+        number_of_large_fires columns
+    """
+    validate_type(filtered_nfdb_data, pd.DataFrame, "filtered_nfdb_data")
+    validate_type(year_column, str, "year_column")
+    validate_type(month_column, str, "month_column")
+    validate_type(fire_size_column, str, "fire_size_column")
+    validate_type(min_fire_size, (int, float), "min_fire_size")
+
+    nfdb_summary = pd.DataFrame(
+        {
+            "year": filtered_nfdb_data[year_column],
+            "month": filtered_nfdb_data[month_column],
+            "is_large_fire": filtered_nfdb_data[fire_size_column] > min_fire_size,
+        }
+    ).groupby(["year", "month"], sort=True).agg(
+        number_of_fires=("is_large_fire", "size"),
+        number_of_large_fires=("is_large_fire", "sum"),
+    ).reset_index()
+
+    return nfdb_summary
+
+
+def plot_whitesands_f4_wind_directions(
     config: dict,
-    monthly_filtered_whitesands_F4_data: list,
-) -> None:
+    wind_rose: pd.DataFrame,
+) -> plt.Figure:
     """
-    A wrapper function to visualize the Whitesands F4 results
+    Plot the wind direction distribution of each month, stacked by wind speed class
 
     Parameters
     ----------
     config : dict
         The configuration parameters
-    monthly_filtered_whitesands_F4_data : list
-        The filtered Whitesands F4 data by month
+    wind_rose : DataFrame
+        The binned Whitesands F4 wind data (see `aggregate_wind_rose`)
+
+    Returns
+    -------
+    fig : Figure
+        The figure with one graph per month
     """
     set_plot_font_size(font_size=11)
     validate_type(config, dict, "config")
-    validate_type(monthly_filtered_whitesands_F4_data, list, "filtered_whitesands_f4_data")
+    validate_type(wind_rose, pd.DataFrame, "wind_rose")
+
+    predominant_wind_directions = summarize_predominant_wind_directions(wind_rose).set_index("month")
+    months = sorted(wind_rose["month"].unique())
+    start_year = config["Whitesands_F4_data"]["time_of_interest"]["start_year"]
+    end_year = config["Whitesands_F4_data"]["time_of_interest"]["end_year"]
+
+    # Create one graph per month aggregating wind direction data categorized by month
+    fig, axs = plt.subplots(math.ceil(len(months) / 2), 2, squeeze=False)
+    fig.suptitle(f"Wind direction distribution between {start_year} and {end_year} categorized by month")
+
+    for i, month in enumerate(months):
+        ax = axs[i // 2, i % 2]
+        wind_dir_aggregated = wind_rose[wind_rose["month"] == month].pivot_table(
+            index="direction",
+            columns="speed_class",
+            values="number_of_measurements",
+            aggfunc="sum",
+            fill_value=0,
+            observed=False,
+        )
+        wind_dir_aggregated = wind_dir_aggregated[wind_dir_aggregated.sum(axis=1) > 0]
+        bar_bottoms = np.zeros(len(wind_dir_aggregated))
+        for speed_class in wind_dir_aggregated.columns:
+            ax.bar(
+                wind_dir_aggregated.index.astype(str),
+                wind_dir_aggregated[speed_class],
+                bottom=bar_bottoms,
+                label=f"{speed_class} km/h",
+            )
+            bar_bottoms += wind_dir_aggregated[speed_class].to_numpy()
+        ax.set_xlabel("Wind direction")
+        ax.set_ylabel("Number of measurements")
+        predominant_wind_dir = predominant_wind_directions.loc[month, "predominant_direction"]
+        if pd.isna(predominant_wind_dir):
+            # only calm measurements in this month
+            ax.set_title(f"Month {month} (no wind data)")
+        else:
+            predominant_wind_dir_percentage = round(
+                predominant_wind_directions.loc[month, "predominant_direction_percentage"]
+            )
+            ax.annotate(
+                f"{wind_dir_aggregated.loc[predominant_wind_dir].sum():g}",
+                (str(predominant_wind_dir), wind_dir_aggregated.loc[predominant_wind_dir].sum()),
+                xytext=(0, 0),
+                textcoords="offset points",
+                ha='center',
+                va='bottom',
+                color="red",
+            )
+            ax.set_title(f"Month {month} (predominant wdir: {predominant_wind_dir} occuring ~{predominant_wind_dir_percentage}% of the time)")
+        if i == 0:
+            ax.legend(title="Wind speed", fontsize=8)
 
-    # Create 4 graphs aggregating wind speed and direction data from 2014-2021 categorized by month
-    fig, axs = plt.subplots(2, 2)
-    fig.suptitle("Wind direction distribution between 2010 and 2021 categorized by month")
+    return fig
 
-    i = 0
-    for r in range(2):
-        for c in range(2):
-            wind_dir_aggregated = monthly_filtered_whitesands_F4_data[i].groupby(
-                config["Whitesands_F4_data"]["weather_data"]["wind_direction_column_name"]
-            ).size()
-            bars = axs[r, c].bar(wind_dir_aggregated.index, wind_dir_aggregated)
-            axs[r, c].set_xlabel("Wind direction")
-            axs[r, c].set_ylabel("Number of measurements")
-            for j, bar in enumerate(bars):
-                if bar.get_height() == wind_dir_aggregated.max():
-                    bar.set_color("red")
-                    # bar.set_label(f"Most frequent wind direction: {wind_dir_aggregated.max()}")
-                    y_value = bar.get_height()
-                    x_value = bar.get_x() + bar.get_width() / 2
-                    axs[r, c].annotate(
-                        wind_dir_aggregated.max(),
-                        (x_value, y_value),
-                        xytext=(0, 0),
-                        textcoords="offset points",
-                        ha='center',
-                        va='bottom',
-                    )
-                    predominant_wind_dir = wind_dir_aggregated[wind_dir_aggregated == wind_dir_aggregated.max()].index[0]
-                    predominant_wind_dir_percentage = round(wind_dir_aggregated.max() / wind_dir_aggregated.sum() * 100)
-                    axs[r, c].set_title(f"Month {i + 5} (predominant wdir: {predominant_wind_dir} occuring ~{predominant_wind_dir_percentage}% of the time)")
-            i += 1
-    plt.show()
 
-    # Create 4 graphs averaging minimum and maximum temperatures of the month from 2014-2021
-    fig, axs = plt.subplots(2, 2)
-    fig.suptitle("Monthly averaged min and max temperatures between 2010 and 2021")
+def plot_whitesands_f4_monthly_means(
+    config: dict,
+    whitesands_f4_summary: pd.DataFrame,
+) -> plt.Figure:
+    """
+    Plot the annual averages of min and max temperatures and relative humidity of each month
 
-    i = 0
-    for r in range(2):
-        for c in range(2):
-            annual_aggregated = monthly_filtered_whitesands_F4_data[i].groupby("year").size().index
-            average_min_temp = monthly_filtered_whitesands_F4_data[i].groupby("year")["minimum_temperature"].mean()
-            average_max_temp = monthly_filtered_whitesands_F4_data[i].groupby("year")["maximum_temperature"].mean()
-            relative_humidity = monthly_filtered_whitesands_F4_data[i].groupby("year")["relative_humidity"].mean()
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    whitesands_f4_summary : DataFrame
+        The aggregated Whitesands F4 data (see `aggregate_whitesands_f4_data`)
+
+    Returns
+    -------
+    fig : Figure
+        The figure with one graph per month
+    """
+    set_plot_font_size(font_size=11)
+    validate_type(config, dict, "config")
+    validate_type(whitesands_f4_summary, pd.DataFrame, "whitesands_f4_summary")
+
+    monthly_annual_means = summarize_monthly_annual_means(whitesands_f4_summary)
+    months = sorted(whitesands_f4_summary["month"].unique())
+    start_year = config["Whitesands_F4_data"]["time_of_interest"]["start_year"]
+    end_year = config["Whitesands_F4_data"]["time_of_interest"]["end_year"]
+
+    # Create one graph per month averaging minimum and maximum temperatures of the month
+    fig, axs = plt.subplots(math.ceil(len(months) / 2), 2, squeeze=False)
+    fig.suptitle(f"Monthly averaged min and max temperatures between {start_year} and {end_year}")
+
+    for i, month in enumerate(months):
+        ax = axs[i // 2, i % 2]
+        annual_means = monthly_annual_means.loc[month]
+        annual_aggregated = annual_means.index
+        for variable_column_name, color, label in [
+            ("minimum_temperature", "green", "Min temperature"),
+            ("maximum_temperature", "red", "Max temperature"),
+            ("relative_humidity", "blue", "Relative humidity"),
+        ]:
             # Add regression line to plot
-            min_reg_coef = np.polyfit(annual_aggregated, average_min_temp, 1)
-            p_min = np.poly1d(min_reg_coef)
-            max_reg_coef = np.polyfit(annual_aggregated, average_max_temp, 1)
-            p_max = np.poly1d(max_reg_coef)
-            humidity_reg_coef = np.polyfit(annual_aggregated, relative_humidity, 1)
-            p_humidity = np.poly1d(humidity_reg_coef)
-            axs[r, c].plot(
-                annual_aggregated,
-                average_min_temp,
-                c='green',
-            )
-            axs[r, c].plot(
-                annual_aggregated,
-                average_max_temp,
-                c='red',
-            )
-            axs[r, c].plot(
-                annual_aggregated,
-                relative_humidity,
-                c='blue',
-            )
-            axs[r, c].plot(
+            reg_coef = np.polyfit(annual_aggregated, annual_means[variable_column_name], 1)
+            p_reg = np.poly1d(reg_coef)
+            ax.plot(
                 annual_aggregated,
-                p_min(annual_aggregated),
-                c='green',
-                linestyle='dashed',
-                label=f'Min temperature regression line ({min_reg_coef[0]:.2f} slope)',
+                annual_means[variable_column_name],
+                c=color,
             )
-            axs[r, c].plot(
+            ax.plot(
                 annual_aggregated,
-                p_max(annual_aggregated),
-                c='red',
+                p_reg(annual_aggregated),
+                c=color,
                 linestyle='dashed',
-                label=f'Max temperature regression line ({max_reg_coef[0]:.2f} slope)',
+                label=f'{label} regression line ({reg_coef[0]:.2f} slope)',
             )
-            axs[r, c].plot(
-                annual_aggregated,
-                p_humidity(annual_aggregated),
-                c='blue',
-                linestyle='dashed',
-                label=f'Relative humidity regression line ({humidity_reg_coef[0]:.2f} slope)',
-            )
-            axs[r, c].set_xlabel("Year")
-            axs[r, c].set_ylabel("Average min and max temperatures \n and relative humidity")
-            axs[r, c].set_title(f"Month {i + 5}")
-            axs[r, c].legend()
-            i += 1
-    plt.show()
+        ax.set_xlabel("Year")
+        ax.set_ylabel("Average min and max temperatures \n and relative humidity")
+        ax.set_title(f"Month {month}")
+        ax.legend()
 
+    return fig
 
-def visualize_nfdb_results(
+
+def plot_nfdb_fire_map(
     config: dict,
     filtered_nfdb_data_large_fires: gpd.GeoDataFrame,
-) -> None:
+) -> plt.Figure:
     """
-    A wrapper function to visualize the NFDB results
+    Plot a map of all wildfires in the filtered NFDB dataset > 200 hectars
 
     Parameters
     ----------
@@ -146,33 +563,67 @@ def visualize_nfdb_results(
         The configuration parameters
     filtered_nfdb_data_large_fires : GeoDataFrame
         The filtered NFDB data for large fires
+
+    Returns
+    -------
+    fig : Figure
+        The figure of the map
     """
     set_plot_font_size(font_size=13)
     validate_type(config, dict, "config")
     validate_type(filtered_nfdb_data_large_fires, gpd.GeoDataFrame, "filtered_nfdb_data_large_fires")
 
     # create a map of all wildfires in the filtered NFDB dataset > 200 hectars according to their lat and lon
+    fig, ax = plt.subplots()
     filtered_nfdb_data_large_fires.plot(
         x=config["NFDB_data"]["region_of_interest"]["region_centre_longitude_column_name"],
         y=config["NFDB_data"]["region_of_interest"]["region_centre_latitude_column_name"],
         kind='scatter',
         color='red',
-        label='Wildfires > 200 hectars'
+        label='Wildfires > 200 hectars',
+        ax=ax,
     )
-    plt.title('Map of all wildfires in the filtered NFDB dataset > 200 hectars')
-    plt.xlabel('Longitude')
-    plt.ylabel('Latitude')
-    plt.show()
+    ax.set_title('Map of all wildfires in the filtered NFDB dataset > 200 hectars')
+    ax.set_xlabel('Longitude')
+    ax.set_ylabel('Latitude')
+
+    return fig
+
+
+def plot_nfdb_fires_by_year(
+    config: dict,
+    nfdb_summary: pd.DataFrame,
+) -> plt.Figure:
+    """
+    Plot the number of wildfires in the filtered NFDB dataset > 200 hectars by year
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    nfdb_summary : DataFrame
+        The aggregated NFDB data (see `aggregate_nfdb_data`)
+
+    Returns
+    -------
+    fig : Figure
+        The figure of the bar chart
+    """
+    set_plot_font_size(font_size=13)
+    validate_type(config, dict, "config")
+    validate_type(nfdb_summary, pd.DataFrame, "nfdb_summary")
 
     # show the number of wildfires in the filtered NFDB dataset > 200 hectars by year
-    filtered_nfdb_data_large_fires_by_year = filtered_nfdb_data_large_fires.groupby(
-        config["NFDB_data"]["time_of_interest"]["year_column_name"]
-    ).size()
-    bars = plt.bar(filtered_nfdb_data_large_fires_by_year.index, filtered_nfdb_data_large_fires_by_year)
-    for j, bar in enumerate(bars):
+    filtered_nfdb_data_large_fires_by_year = nfdb_summary.groupby("year")["number_of_large_fires"].sum()
+    filtered_nfdb_data_large_fires_by_year = filtered_nfdb_data_large_fires_by_year[
+        filtered_nfdb_data_large_fires_by_year > 0
+    ]
+    fig, ax = plt.subplots()
+    bars = ax.bar(filtered_nfdb_data_large_fires_by_year.index, filtered_nfdb_data_large_fires_by_year)
+    for bar in bars:
         y_value = bar.get_height()
         x_value = bar.get_x() + bar.get_width() / 2
-        plt.annotate(
+        ax.annotate(
             bar.get_height(),
             (x_value, y_value),
             xytext=(0, 0),
@@ -180,20 +631,42 @@ def visualize_nfdb_results(
             ha='center',
             va='bottom',
         )
-    # filtered_nfdb_data_large_fires_by_year.plot(kind='bar')
-    plt.title('Number of wildfires in the filtered NFDB dataset > 200 hectars by year')
-    plt.xlabel('Year')
-    plt.ylabel('Number of wildfires')
-    plt.show()
+    ax.set_title('Number of wildfires in the filtered NFDB dataset > 200 hectars by year')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Number of wildfires')
+
+    return fig
+
+
+def plot_nfdb_fires_by_month_and_year(
+    config: dict,
+    nfdb_summary: pd.DataFrame,
+) -> plt.Figure:
+    """
+    Plot the number of wildfires in the filtered NFDB dataset > 200 hectars by month and year
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    nfdb_summary : DataFrame
+        The aggregated NFDB data (see `aggregate_nfdb_data`)
+
+    Returns
+    -------
+    fig : Figure
+        The figure of the monthly and the stacked annual bar charts
+    """
+    set_plot_font_size(font_size=13)
+    validate_type(config, dict, "config")
+    validate_type(nfdb_summary, pd.DataFrame, "nfdb_summary")
 
     # show the number of wildfires in the filtered NFDB dataset > 200 hectars by month and year
-    filtered_nfdb_data_large_fires_by_month = filtered_nfdb_data_large_fires.groupby(
-        config["NFDB_data"]["time_of_interest"]["month_column_name"]
-    ).size()
-    filtered_nfdb_data_large_fires_by_month_and_year = filtered_nfdb_data_large_fires.groupby(
-        [config["NFDB_data"]["time_of_interest"]["year_column_name"],
-         config["NFDB_data"]["time_of_interest"]["month_column_name"]]
-    ).size()
+    large_fires_summary = nfdb_summary.loc[nfdb_summary["number_of_large_fires"] > 0]
+    filtered_nfdb_data_large_fires_by_month = large_fires_summary.groupby("month")["number_of_large_fires"].sum()
+    filtered_nfdb_data_large_fires_by_month_and_year = large_fires_summary.set_index(
+        ["year", "month"]
+    )["number_of_large_fires"]
     fig, (ax1, ax2) = plt.subplots(1, 2)
     filtered_nfdb_data_large_fires_by_month.plot(kind='bar', ax=ax1)
     ax1.set_title('# of wildfires in the filtered NFDB dataset > 200 hectars by month')
@@ -203,9 +676,35 @@ def visualize_nfdb_results(
     ax2.set_title('# of wildfires in the filtered NFDB dataset > 200 hectars by month and year')
     ax2.set_xlabel('Year')
     ax2.set_ylabel('Number of wildfires')
-    plt.show()
+
+    return fig
+
+
+def plot_nfdb_fire_map_by_year(
+    config: dict,
+    filtered_nfdb_data_large_fires: gpd.GeoDataFrame,
+) -> plt.Figure:
+    """
+    Plot a map of all wildfires in the filtered NFDB dataset > 200 hectars colored by year
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    filtered_nfdb_data_large_fires : GeoDataFrame
+        The filtered NFDB data for large fires
+
+    Returns
+    -------
+    fig : Figure
+        The figure of the map
+    """
+    set_plot_font_size(font_size=13)
+    validate_type(config, dict, "config")
+    validate_type(filtered_nfdb_data_large_fires, gpd.GeoDataFrame, "filtered_nfdb_data_large_fires")
 
     # show the map of all wildfires in the filtered NFDB dataset > 200 hectars colored by year
+    fig, ax = plt.subplots()
     filtered_nfdb_data_large_fires.plot(
         x=config["NFDB_data"]["region_of_interest"]["region_centre_longitude_column_name"],
         y=config["NFDB_data"]["region_of_interest"]["region_centre_latitude_column_name"],
@@ -215,21 +714,791 @@ def visualize_nfdb_results(
         label='Wildfires > 200 hectars',
         marker='o',
         s=100,
+        ax=ax,
+    )
+    ax.set_title('Map of all wildfires in the filtered NFDB dataset > 200 hectars colored by year')
+    ax.set_xlabel('Longitude')
+    ax.set_ylabel('Latitude')
+
+    return fig
+
+
+def create_fire_density_grid(
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    number_of_cells: int = 400,
+    weights: np.ndarray = None,
+    extent: tuple = None,
+) -> dict:
+    """
+    Bin points into a latitude/longitude grid in a single pass
+
+    The cell of every point is calculated with integer arithmetic and the
+    points are counted (and their weights summed) with `numpy.bincount`, so
+    the grid, rather than the points, is drawn.
+
+    Parameters
+    ----------
+    latitudes : numpy.ndarray
+        The latitudes of the points in degrees
+    longitudes : numpy.ndarray
+        The longitudes of the points in degrees
+    number_of_cells : int, optional
+        The number of cells along the longer side of the extent. The cells
+        are square in degrees. Default is 400.
+    weights : numpy.ndarray, optional
+        The weights of the points, e.g. the fire sizes or the years.
+        Default is None, which sums no weights.
+    extent : tuple, optional
+        The (min lon, max lon, min lat, max lat) of the grid. Default is None,
+        which uses the extent of the points.
+
+    Returns
+    -------
+    density_grid : dict
+        The "counts" and, if weights are given, the "weight_sums" of the cells
+        as (latitude, longitude) arrays with the lowest latitude first, and
+        the "extent" of the grid
+    """
+    validate_type(latitudes, np.ndarray, "latitudes")
+    validate_type(longitudes, np.ndarray, "longitudes")
+    validate_type(number_of_cells, int, "number_of_cells")
+    if number_of_cells < 1:
+        raise ValueError(f"The number_of_cells should be at least 1 not {number_of_cells}.")
+
+    latitudes = latitudes.astype(np.float64)
+    longitudes = longitudes.astype(np.float64)
+    is_located = ~(np.isnan(latitudes) | np.isnan(longitudes))
+    if extent is None:
+        if is_located.any():
+            extent = (
+                longitudes[is_located].min(), longitudes[is_located].max(),
+                latitudes[is_located].min(), latitudes[is_located].max(),
+            )
+        else:
+            extent = (-180.0, 180.0, -90.0, 90.0)
+    min_lon, max_lon, min_lat, max_lat = extent
+    # a single point or a line of points still gets an extent of one cell
+    cell_size = max(max_lon - min_lon, max_lat - min_lat) / number_of_cells or 1.0
+    number_of_rows = max(int(np.ceil((max_lat - min_lat) / cell_size)), 1)
+    number_of_columns = max(int(np.ceil((max_lon - min_lon) / cell_size)), 1)
+
+    with np.errstate(invalid="ignore"):
+        rows = np.floor((latitudes - min_lat) / cell_size)
+        columns = np.floor((longitudes - min_lon) / cell_size)
+    # the points on the upper edges belong to the last cells
+    rows = np.where(latitudes == max_lat, number_of_rows - 1, rows)
+    columns = np.where(longitudes == max_lon, number_of_columns - 1, columns)
+    is_in_grid = is_located & (rows >= 0) & (rows < number_of_rows) & (columns >= 0) & (columns < number_of_columns)
+    cell_numbers = rows[is_in_grid].astype(np.int64) * number_of_columns + columns[is_in_grid].astype(np.int64)
+
+    grid_shape = (number_of_rows, number_of_columns)
+    density_grid = {
+        "counts": np.bincount(cell_numbers, minlength=number_of_rows * number_of_columns).reshape(grid_shape),
+        "extent": (min_lon, min_lon + number_of_columns * cell_size, min_lat, min_lat + number_of_rows * cell_size),
+    }
+    if weights is not None:
+        density_grid["weight_sums"] = np.bincount(
+            cell_numbers,
+            weights=np.nan_to_num(np.asarray(weights, dtype=np.float64)[is_in_grid]),
+            minlength=number_of_rows * number_of_columns,
+        ).reshape(grid_shape)
+
+    return density_grid
+
+
+def plot_nfdb_fire_density_map(
+    config: dict,
+    filtered_nfdb_data_large_fires: gpd.GeoDataFrame,
+) -> plt.Figure:
+    """
+    Plot a rasterized density map of all wildfires in the filtered NFDB dataset > 200 hectars
+
+    The fires are binned into a grid (see `create_fire_density_grid`) and
+    drawn as one image, so the drawing time does not grow with the number of
+    fires. The cells show the number of fires, or their total size if
+    weight_by_fire_size is set in the density_map section of the config.
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    filtered_nfdb_data_large_fires : GeoDataFrame
+        The filtered NFDB data for large fires
+
+    Returns
+    -------
+    fig : Figure
+        The figure of the map
+    """
+    set_plot_font_size(font_size=13)
+    validate_type(config, dict, "config")
+    validate_type(filtered_nfdb_data_large_fires, gpd.GeoDataFrame, "filtered_nfdb_data_large_fires")
+
+    density_map_config = config.get("density_map", {})
+    weight_by_fire_size = density_map_config.get("weight_by_fire_size", False)
+    density_grid = create_fire_density_grid(
+        filtered_nfdb_data_large_fires[
+            config["NFDB_data"]["region_of_interest"]["region_centre_latitude_column_name"]
+        ].to_numpy(dtype=float),
+        filtered_nfdb_data_large_fires[
+            config["NFDB_data"]["region_of_interest"]["region_centre_longitude_column_name"]
+        ].to_numpy(dtype=float),
+        number_of_cells=density_map_config.get("number_of_cells", 400),
+        weights=filtered_nfdb_data_large_fires[
+            config["NFDB_data"]["fire_conditions"]["fire_size_column_name"]
+        ].to_numpy(dtype=float) if weight_by_fire_size else None,
+    )
+    cell_values = density_grid["weight_sums"] if weight_by_fire_size else density_grid["counts"]
+
+    # create a density map of all wildfires in the filtered NFDB dataset > 200 hectars,
+    # with the empty cells left blank
+    fig, ax = plt.subplots()
+    if (cell_values > 0).any():
+        image = ax.imshow(
+            np.ma.masked_less_equal(cell_values, 0),
+            origin="lower",
+            extent=density_grid["extent"],
+            aspect="auto",
+            interpolation="nearest",
+            cmap="inferno",
+            norm=LogNorm(),
+        )
+        fig.colorbar(image, ax=ax, label="Total fire size (hectars)" if weight_by_fire_size else "Number of wildfires")
+    else:
+        # the log scale of a grid without fires is undefined
+        ax.text(0.5, 0.5, "No wildfires > 200 hectars", transform=ax.transAxes, ha="center", va="center")
+    ax.set_title('Density map of all wildfires in the filtered NFDB dataset > 200 hectars')
+    ax.set_xlabel('Longitude')
+    ax.set_ylabel('Latitude')
+
+    return fig
+
+
+def plot_nfdb_fire_density_map_by_year(
+    config: dict,
+    filtered_nfdb_data_large_fires: gpd.GeoDataFrame,
+) -> plt.Figure:
+    """
+    Plot a rasterized map of all wildfires in the filtered NFDB dataset > 200 hectars colored by mean year
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    filtered_nfdb_data_large_fires : GeoDataFrame
+        The filtered NFDB data for large fires
+
+    Returns
+    -------
+    fig : Figure
+        The figure of the map
+    """
+    set_plot_font_size(font_size=13)
+    validate_type(config, dict, "config")
+    validate_type(filtered_nfdb_data_large_fires, gpd.GeoDataFrame, "filtered_nfdb_data_large_fires")
+
+    density_grid = create_fire_density_grid(
+        filtered_nfdb_data_large_fires[
+            config["NFDB_data"]["region_of_interest"]["region_centre_latitude_column_name"]
+        ].to_numpy(dtype=float),
+        filtered_nfdb_data_large_fires[
+            config["NFDB_data"]["region_of_interest"]["region_centre_longitude_column_name"]
+        ].to_numpy(dtype=float),
+        number_of_cells=config.get("density_map", {}).get("number_of_cells", 400),
+        weights=filtered_nfdb_data_large_fires[
+            config["NFDB_data"]["time_of_interest"]["year_column_name"]
+        ].to_numpy(dtype=float),
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_years = density_grid["weight_sums"] / density_grid["counts"]
+
+    # show the map of all wildfires in the filtered NFDB dataset > 200 hectars colored by year
+    fig, ax = plt.subplots()
+    if (density_grid["counts"] > 0).any():
+        image = ax.imshow(
+            np.ma.masked_where(density_grid["counts"] == 0, mean_years),
+            origin="lower",
+            extent=density_grid["extent"],
+            aspect="auto",
+            interpolation="nearest",
+            cmap="viridis",
+        )
+        fig.colorbar(image, ax=ax, label="Mean year")
+    else:
+        ax.text(0.5, 0.5, "No wildfires > 200 hectars", transform=ax.transAxes, ha="center", va="center")
+    ax.set_title('Map of all wildfires in the filtered NFDB dataset > 200 hectars colored by year')
+    ax.set_xlabel('Longitude')
+    ax.set_ylabel('Latitude')
+
+    return fig
+
+
+def use_agg_backend() -> None:
+    """
+    Switch matplotlib to the non-interactive Agg backend in a worker process
+    """
+    plt.switch_backend("Agg")
+
+
+def render_figure(
+    figure_name: str,
+    plot_function,
+    plot_args: tuple,
+    output_dir: str,
+    file_formats: list,
+) -> list:
+    """
+    Render one figure and save it to files
+
+    The figure is drawn with the backend of the current process and closed
+    after saving, so it is never shown. The worker processes of
+    `render_figures` use the non-interactive Agg backend.
+
+    Parameters
+    ----------
+    figure_name : str
+        The name of the figure, used as the file name without extension
+    plot_function : callable
+        A function that takes `plot_args` and returns a Figure
+    plot_args : tuple
+        The arguments of the plot function
+    output_dir : str
+        The directory to save the figure in
+    file_formats : list
+        The file formats of the figure, e.g. ["png", "svg"]
+
+    Returns
+    -------
+    figure_paths : list
+        The paths of the saved figure files
+    """
+    validate_type(figure_name, str, "figure_name")
+    validate_type(output_dir, str, "output_dir")
+    validate_type(file_formats, list, "file_formats")
+
+    fig = plot_function(*plot_args)
+    figure_paths = []
+    for file_format in file_formats:
+        figure_path = os.path.join(output_dir, f"{figure_name}.{file_format}")
+        fig.savefig(figure_path, format=file_format, bbox_inches="tight")
+        figure_paths.append(figure_path)
+    plt.close(fig)
+
+    return figure_paths
+
+
+@instrument_function
+def render_figures(
+    figure_tasks: list,
+    output_dir: str,
+    file_formats: list = None,
+    max_workers: int = None,
+) -> list:
+    """
+    Render independent figures concurrently in a process pool and save them to files
+
+    Parameters
+    ----------
+    figure_tasks : list
+        A list of (figure name, plot function, plot arguments) tuples
+    output_dir : str
+        The directory to save the figures in. It is created if it does not exist.
+    file_formats : list, optional
+        The file formats of the figures. Default is None, which saves PNG files.
+    max_workers : int, optional
+        The maximum number of worker processes. Default is None, which uses
+        one process per figure up to the number of CPUs. If 1, the figures
+        are rendered one after the other in the current process, which keeps
+        its backend.
+
+    Returns
+    -------
+    figure_paths : list
+        The paths of all saved figure files
+    """
+    validate_type(figure_tasks, list, "figure_tasks")
+    validate_type(output_dir, str, "output_dir")
+    if file_formats is None:
+        file_formats = ["png"]
+    if max_workers is None:
+        max_workers = min(len(figure_tasks), os.cpu_count() or 1)
+    validate_type(max_workers, int, "max_workers")
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    if max_workers <= 1:
+        figure_paths = []
+        for figure_name, plot_function, plot_args in figure_tasks:
+            figure_paths += render_figure(figure_name, plot_function, plot_args, output_dir, file_formats)
+        return figure_paths
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=use_agg_backend) as executor:
+        futures = [
+            executor.submit(render_figure, figure_name, plot_function, plot_args, output_dir, file_formats)
+            for figure_name, plot_function, plot_args in figure_tasks
+        ]
+        figure_paths = [figure_path for future in futures for figure_path in future.result()]
+
+    return figure_paths
+
+
+@instrument_function
+def show_figures(
+    figure_tasks: list,
+) -> None:
+    """
+    Show figures one after the other in interactive windows
+
+    Parameters
+    ----------
+    figure_tasks : list
+        A list of (figure name, plot function, plot arguments) tuples
+    """
+    validate_type(figure_tasks, list, "figure_tasks")
+
+    for _, plot_function, plot_args in figure_tasks:
+        plot_function(*plot_args)
+        plt.show()
+
+
+def visualize_figures(
+    figure_tasks: list,
+    output_dir: str = None,
+    file_formats: list = None,
+    max_workers: int = None,
+) -> list:
+    """
+    Show figures interactively, or render them headless to files if an output directory is given
+
+    Parameters
+    ----------
+    figure_tasks : list
+        A list of (figure name, plot function, plot arguments) tuples
+    output_dir : str, optional
+        If given, the figures are rendered headless and saved in this
+        directory instead of being shown. Default is None.
+    file_formats : list, optional
+        The file formats of the saved figures. Default is None, which saves PNG files.
+    max_workers : int, optional
+        The maximum number of processes rendering the figures. Default is None.
+
+    Returns
+    -------
+    figure_paths : list
+        The paths of the saved figure files. Empty if the figures are shown.
+    """
+    validate_type(figure_tasks, list, "figure_tasks")
+
+    if output_dir is None:
+        show_figures(figure_tasks)
+        return []
+
+    figure_paths = render_figures(figure_tasks, output_dir, file_formats, max_workers)
+
+    return figure_paths
+
+
+def create_whitesands_f4_figure_tasks(
+    config: dict,
+    whitesands_f4_summary: pd.DataFrame,
+    wind_rose: pd.DataFrame,
+) -> list:
+    """
+    Create the figure tasks of the Whitesands F4 results
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    whitesands_f4_summary : DataFrame
+        The aggregated Whitesands F4 data (see `aggregate_whitesands_f4_data`)
+    wind_rose : DataFrame
+        The binned Whitesands F4 wind data (see `aggregate_wind_rose`)
+
+    Returns
+    -------
+    figure_tasks : list
+        A list of (figure name, plot function, plot arguments) tuples
+    """
+    figure_tasks = [
+        ("whitesands_f4_wind_directions", plot_whitesands_f4_wind_directions, (config, wind_rose)),
+        ("whitesands_f4_monthly_means", plot_whitesands_f4_monthly_means, (config, whitesands_f4_summary)),
+    ]
+
+    return figure_tasks
+
+
+def create_nfdb_summary_figure_tasks(
+    config: dict,
+    nfdb_summary: pd.DataFrame,
+) -> list:
+    """
+    Create the figure tasks of the NFDB results that only need the aggregated data
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    nfdb_summary : DataFrame
+        The aggregated NFDB data (see `aggregate_nfdb_data`)
+
+    Returns
+    -------
+    figure_tasks : list
+        A list of (figure name, plot function, plot arguments) tuples
+    """
+    figure_tasks = [
+        ("nfdb_fires_by_year", plot_nfdb_fires_by_year, (config, nfdb_summary)),
+        ("nfdb_fires_by_month_and_year", plot_nfdb_fires_by_month_and_year, (config, nfdb_summary)),
+    ]
+
+    return figure_tasks
+
+
+def create_nfdb_figure_tasks(
+    config: dict,
+    filtered_nfdb_data_large_fires: gpd.GeoDataFrame,
+) -> list:
+    """
+    Create the figure tasks of the NFDB results
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    filtered_nfdb_data_large_fires : GeoDataFrame
+        The filtered NFDB data for large fires
+
+    Returns
+    -------
+    figure_tasks : list
+        A list of (figure name, plot function, plot arguments) tuples
+    """
+    nfdb_summary = aggregate_nfdb_data(
+        filtered_nfdb_data_large_fires,
+        year_column=config["NFDB_data"]["time_of_interest"]["year_column_name"],
+        month_column=config["NFDB_data"]["time_of_interest"]["month_column_name"],
+        fire_size_column=config["NFDB_data"]["fire_conditions"]["fire_size_column_name"],
+        min_fire_size=config["NFDB_data"]["fire_conditions"]["min_fire_size"],
+    )
+    if config.get("density_map", {}).get("density_map", False):
+        # draw the fires as rasterized density maps, e.g. for national-scale subsets
+        fire_map_task = ("nfdb_fire_density_map", plot_nfdb_fire_density_map)
+        fire_map_by_year_task = ("nfdb_fire_density_map_by_year", plot_nfdb_fire_density_map_by_year)
+    else:
+        fire_map_task = ("nfdb_fire_map", plot_nfdb_fire_map)
+        fire_map_by_year_task = ("nfdb_fire_map_by_year", plot_nfdb_fire_map_by_year)
+    figure_tasks = [
+        (*fire_map_task, (config, filtered_nfdb_data_large_fires)),
+    ] + create_nfdb_summary_figure_tasks(config, nfdb_summary) + [
+        (*fire_map_by_year_task, (config, filtered_nfdb_data_large_fires)),
+    ]
+
+    return figure_tasks
+
+
+def visualize_whitesands_F4_results(
+    config: dict,
+    whitesands_f4_summary: pd.DataFrame,
+    wind_rose: pd.DataFrame,
+    output_dir: str = None,
+    file_formats: list = None,
+    max_workers: int = None,
+) -> list:
+    """
+    A wrapper function to visualize the Whitesands F4 results
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    whitesands_f4_summary : DataFrame
+        The aggregated Whitesands F4 data (see `aggregate_whitesands_f4_data`)
+    wind_rose : DataFrame
+        The binned Whitesands F4 wind data (see `aggregate_wind_rose`)
+    output_dir : str, optional
+        If given, the figures are rendered headless and saved in this
+        directory instead of being shown. Default is None.
+    file_formats : list, optional
+        The file formats of the saved figures. Default is None, which saves PNG files.
+    max_workers : int, optional
+        The maximum number of processes rendering the figures. Default is None.
+
+    Returns
+    -------
+    figure_paths : list
+        The paths of the saved figure files. Empty if the figures are shown.
+    """
+    validate_type(config, dict, "config")
+    validate_type(whitesands_f4_summary, pd.DataFrame, "whitesands_f4_summary")
+    validate_type(wind_rose, pd.DataFrame, "wind_rose")
+
+    figure_tasks = create_whitesands_f4_figure_tasks(config, whitesands_f4_summary, wind_rose)
+    figure_paths = visualize_figures(figure_tasks, output_dir, file_formats, max_workers)
+
+    return figure_paths
+
+
+def visualize_nfdb_results(
+    config: dict,
+    filtered_nfdb_data_large_fires: gpd.GeoDataFrame,
+    output_dir: str = None,
+    file_formats: list = None,
+    max_workers: int = None,
+) -> list:
+    """
+    A wrapper function to visualize the NFDB results
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    filtered_nfdb_data_large_fires : GeoDataFrame
+        The filtered NFDB data for large fires
+    output_dir : str, optional
+        If given, the figures are rendered headless and saved in this
+        directory instead of being shown. Default is None.
+    file_formats : list, optional
+        The file formats of the saved figures. Default is None, which saves PNG files.
+    max_workers : int, optional
+        The maximum number of processes rendering the figures. Default is None.
+
+    Returns
+    -------
+    figure_paths : list
+        The paths of the saved figure files. Empty if the figures are shown.
+    """
+    validate_type(config, dict, "config")
+    validate_type(filtered_nfdb_data_large_fires, gpd.GeoDataFrame, "filtered_nfdb_data_large_fires")
+
+    figure_tasks = create_nfdb_figure_tasks(config, filtered_nfdb_data_large_fires)
+    figure_paths = visualize_figures(figure_tasks, output_dir, file_formats, max_workers)
+
+    return figure_paths
+
+
+def parse_fixed_width_date_format(
+    date_format: str,
+) -> list:
+    """
+    Parse a fixed-width date format into the positions of its fields
+
+    Only the %Y, %m, %d, %H, %M, and %S directives have a fixed width. Formats
+    with any other directive (e.g. %b or %y) are not fixed-width.
+
+    Parameters
+    ----------
+    date_format : str
+        The date format, e.g. "%Y-%m-%d %H:%M"
+
+    Returns
+    -------
+    format_fields : list or None
+        A list of (field, start position, width) tuples. The field is either
+        a directive like "%Y" or a literal character. None if the format is
+        not fixed-width.
+    """
+    validate_type(date_format, str, "date_format")
+
+    directive_widths = {"%Y": 4, "%m": 2, "%d": 2, "%H": 2, "%M": 2, "%S": 2}
+    format_fields = []
+    position = 0
+    i = 0
+    while i < len(date_format):
+        if date_format[i] == "%":
+            directive = date_format[i:i + 2]
+            if directive not in directive_widths:
+                return None
+            format_fields.append((directive, position, directive_widths[directive]))
+            position += directive_widths[directive]
+            i += 2
+        else:
+            if not date_format[i].isascii():
+                return None
+            format_fields.append((date_format[i], position, 1))
+            position += 1
+            i += 1
+
+    return format_fields
+
+
+def create_fixed_width_byte_matrix(
+    string_series: pd.Series,
+    width: int,
+) -> np.ndarray:
+    """
+    Create a (rows x width) uint8 matrix of the bytes of a series of strings
+
+    Arrow-backed string series are viewed without copying the strings. Other
+    series are copied once into a fixed-width byte array.
+
+    Parameters
+    ----------
+    string_series : pandas.Series
+        The series of strings
+    width : int
+        The expected length of every string
+
+    Returns
+    -------
+    byte_matrix : numpy.ndarray or None
+        The byte matrix. None if the series is not a string series or any
+        value is missing, is not ASCII, or is not exactly `width` bytes long.
+    """
+    validate_type(string_series, pd.Series, "string_series")
+    validate_type(width, int, "width")
+
+    if len(string_series) == 0:
+        return None
+
+    if isinstance(string_series.dtype, pd.StringDtype) and string_series.dtype.storage == "pyarrow":
+        import pyarrow as pa
+
+        string_array = pa.array(string_series.array)
+        if isinstance(string_array, pa.ChunkedArray):
+            string_array = string_array.combine_chunks()
+        if string_array.null_count > 0:
+            return None
+        offset_dtype = np.int64 if pa.types.is_large_string(string_array.type) else np.int32
+        _, offset_buffer, data_buffer = string_array.buffers()
+        offsets = np.frombuffer(offset_buffer, dtype=offset_dtype)[
+            string_array.offset:string_array.offset + len(string_array) + 1
+        ]
+        if (np.diff(offsets) != width).any():
+            return None
+        byte_matrix = np.frombuffer(data_buffer, dtype=np.uint8)[
+            offsets[0]:offsets[-1]
+        ].reshape(-1, width)
+        return byte_matrix
+
+    if not (string_series.dtype == object or isinstance(string_series.dtype, pd.StringDtype)):
+        return None
+    try:
+        # one extra byte per row to detect strings longer than the width.
+        # Missing values become b"nan"/b"None" and fail the length check.
+        string_bytes = np.asarray(string_series.to_numpy(dtype=object), dtype=f"S{width + 1}")
+    except (UnicodeEncodeError, TypeError, ValueError):
+        return None
+    byte_matrix = string_bytes.view(np.uint8).reshape(-1, width + 1)
+    if (byte_matrix[:, width] != 0).any() or (byte_matrix[:, width - 1] == 0).any():
+        return None
+    byte_matrix = byte_matrix[:, :width]
+
+    return byte_matrix
+
+
+def separate_fixed_width_date_series(
+    date_series: pd.Series,
+    date_format: str,
+) -> pd.DataFrame:
+    """
+    Separate a series of fixed-width date strings into year, month, day, and hour
+
+    The strings are copied once into a fixed-width byte matrix and the fields
+    are read with vectorized slicing, without creating datetime objects.
+
+    Parameters
+    ----------
+    date_series : pandas.Series
+        The series of date strings
+    date_format : str
+        The fixed-width format of the dates, e.g. "%Y-%m-%d %H:%M"
+
+    Returns
+    -------
+    separated_date_dataframe : DataFrame or None
+        A DataFrame with int16 year and int8 month, day (and hour if the
+        format has %H) columns. None if the format is not fixed-width or any
+        value does not match it, so that the caller can fall back to
+        `pd.to_datetime`.
+    """
+    validate_type(date_series, pd.Series, "date_series")
+    validate_type(date_format, str, "date_format")
+
+    format_fields = parse_fixed_width_date_format(date_format)
+    if format_fields is None:
+        return None
+    directives = [field for field, _, _ in format_fields if field.startswith("%")]
+    if not {"%Y", "%m", "%d"}.issubset(directives) or len(directives) != len(set(directives)):
+        return None
+
+    width = sum(field_width for _, _, field_width in format_fields)
+    byte_matrix = create_fixed_width_byte_matrix(date_series, width)
+    if byte_matrix is None:
+        return None
+
+    # check the literal characters and digits of all rows at once
+    literal_positions = [start for field, start, _ in format_fields if not field.startswith("%")]
+    literal_bytes = np.frombuffer(
+        "".join(field for field, _, _ in format_fields if not field.startswith("%")).encode(),
+        dtype=np.uint8,
+    )
+    if (byte_matrix[:, literal_positions] != literal_bytes).any():
+        return None
+    digit_positions = [
+        start + k for field, start, field_width in format_fields
+        if field.startswith("%") for k in range(field_width)
+    ]
+    # bytes below "0" wrap around to large values in uint8
+    digit_matrix = byte_matrix - np.uint8(ord("0"))
+    if (digit_matrix[:, digit_positions] > 9).any():
+        return None
+
+    date_fields = {}
+    for field, start, field_width in format_fields:
+        if field.startswith("%"):
+            value = digit_matrix[:, start].astype(np.int16)
+            for k in range(1, field_width):
+                value = value * 10 + digit_matrix[:, start + k]
+            date_fields[field] = value
+
+    year = date_fields["%Y"]
+    month = date_fields["%m"]
+    day = date_fields["%d"]
+    if ((month < 1) | (month > 12)).any():
+        return None
+    days_in_month = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int16)[month - 1]
+    is_leap_year = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    days_in_month = days_in_month + ((month == 2) & is_leap_year)
+    if ((day < 1) | (day > days_in_month)).any():
+        return None
+    if "%H" in date_fields and (date_fields["%H"] > 23).any():
+        return None
+    if "%M" in date_fields and (date_fields["%M"] > 59).any():
+        return None
+    if "%S" in date_fields and (date_fields["%S"] > 59).any():
+        return None
+
+    separated_date_dataframe = pd.DataFrame(
+        {
+            "year": year,
+            "month": month.astype(np.int8),
+            "day": day.astype(np.int8),
+        },
+        index=date_series.index,
     )
-    plt.title('Map of all wildfires in the filtered NFDB dataset > 200 hectars colored by year')
-    plt.xlabel('Longitude')
-    plt.ylabel('Latitude')
-    plt.show()
+    if "%H" in date_fields:
+        separated_date_dataframe["hour"] = date_fields["%H"].astype(np.int8)
+
+    return separated_date_dataframe
 
 
+@instrument_function
 def separate_date_series_to_Y_m_d(
     date_series: pd.Series,
     date_format: str = "%Y-%m-%d %H:%M",
     errors: str = "raise",
+    use_fast_path: bool = True,
 ) -> pd.DataFrame:
     """
     Separate a series of dates into year, month, and day
 
+    For fixed-width formats (only %Y, %m, %d, %H, %M, and %S directives), the
+    fields are sliced directly from the strings into compact integer columns
+    (see `separate_fixed_width_date_series`). Other formats, and series with
+    any value that does not match the format, use `pd.to_datetime`.
+
     Parameters:
     ----------
     date_series : pandas.Series
@@ -241,15 +1510,27 @@ def separate_date_series_to_Y_m_d(
             'raise': invalid parsing will raise an exception.
             'coerce': invalid parsing will be set as NaT.
             'ignore': invalid parsing will return the input.
+    use_fast_path : bool, optional
+        Whether to try the fixed-width fast path first. Default is True.
 
     Returns:
     -------
     pandas.Series
-        A DataFrame with columns for year, month, and day
+        A DataFrame with columns for year, month, and day, and hour if the
+        format includes %H
     """
     validate_type(date_series, pd.Series, "date_series")
     validate_type(date_format, str, "date_format")
     validate_type(errors, str, "errors")
+    validate_type(use_fast_path, bool, "use_fast_path")
+
+    if use_fast_path:
+        separated_date_dataframe = separate_fixed_width_date_series(
+            date_series=date_series,
+            date_format=date_format,
+        )
+        if separated_date_dataframe is not None:
+            return separated_date_dataframe
 
     date_series = pd.to_datetime(
         date_series,
@@ -264,18 +1545,576 @@ def separate_date_series_to_Y_m_d(
             "day": date_series.dt.day,
         }
     )
+    if "%H" in date_format:
+        separated_date_dataframe["hour"] = date_series.dt.hour
 
     return separated_date_dataframe
 
 
-def filter_whitesands_f4_data(
+# the columns derived from the date column of a query (see `create_query`)
+DATE_DERIVED_COLUMN_NAMES = ["year", "month"]
+# the comparison operators of the query filters and their Series methods
+FILTER_OPERATORS = {
+    "==": "eq",
+    "!=": "ne",
+    "<": "lt",
+    "<=": "le",
+    ">": "gt",
+    ">=": "ge",
+}
+
+
+def create_filter_mask(
+    data_df: pd.DataFrame,
+    filters: list,
+    mask_functions: list = None,
+) -> np.ndarray:
+    """
+    Evaluate attribute filters and mask functions as one boolean mask
+
+    The conditions are combined in place into a single boolean array, so no
+    intermediate DataFrame is created per condition.
+
+    Parameters
+    ----------
+    data_df : DataFrame or GeoDataFrame
+        The data to filter
+    filters : list
+        A list of (column name, operator, value) tuples combined with AND.
+        The operator should be one of "==", "!=", "<", "<=", ">", ">=", "in",
+        with a list of values for "in".
+    mask_functions : list, optional
+        Functions that take the data and return a boolean array, combined
+        with AND. Default is None.
+
+    Returns
+    -------
+    mask : numpy.ndarray
+        The boolean mask of the rows that pass all conditions
+    """
+    validate_type(data_df, pd.DataFrame, "data_df")
+    validate_type(filters, list, "filters")
+
+    mask = np.ones(len(data_df), dtype=bool)
+    for column_name, operator, value in filters:
+        column = data_df[column_name]
+        if operator == "in":
+            validate_type(value, list, "in filter values")
+            mask &= column.isin(value).to_numpy(dtype=bool)
+        elif operator in FILTER_OPERATORS:
+            # missing values fail every comparison, as in the reader filters
+            mask &= getattr(column, FILTER_OPERATORS[operator])(value).to_numpy(dtype=bool, na_value=False)
+        else:
+            raise ValueError(
+                f"The filter operator should be one of {list(FILTER_OPERATORS) + ['in']} not {operator}."
+            )
+    for mask_function in mask_functions or []:
+        mask &= np.asarray(mask_function(data_df), dtype=bool)
+
+    return mask
+
+
+def create_query(
     file_path: str,
+    columns: list = None,
+    date_column_name: str = None,
+) -> dict:
+    """
+    Create a lazy query of a vector or CSV data file
+
+    Filters are added with `add_query_filter` and `add_query_mask`, which
+    return a new query, and nothing is read until `collect_query` is called.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the data file. CSV files are read as DataFrames and any
+        other file as a GeoDataFrame.
+    columns : list, optional
+        The columns to read in addition to the filter columns.
+        Default is None, which reads all columns.
+    date_column_name : str, optional
+        The name of a "%Y-%m-%d %H:%M" date column to derive year and month
+        columns from, so that they can be filtered. Default is None.
+
+    Returns
+    -------
+    query : dict
+        The query plan
+    """
+    validate_type(file_path, str, "file_path")
+    if columns is not None:
+        validate_type(columns, list, "columns")
+    if date_column_name is not None:
+        validate_type(date_column_name, str, "date_column_name")
+
+    query = {
+        "file_path": file_path,
+        "columns": columns,
+        "date_column_name": date_column_name,
+        "filters": [],
+        "mask_functions": [],
+    }
+
+    return query
+
+
+def add_query_filter(
+    query: dict,
+    column_name: str,
+    operator: str,
+    value,
+) -> dict:
+    """
+    Add an attribute filter to a query
+
+    Parameters
+    ----------
+    query : dict
+        The query plan (see `create_query`)
+    column_name : str
+        The name of the filtered column
+    operator : str
+        One of "==", "!=", "<", "<=", ">", ">=", "in", or "between"
+    value : any
+        The value to compare with, a list of values for "in", or a
+        (start, end) tuple for the inclusive "between"
+
+    Returns
+    -------
+    query : dict
+        A new query plan with the filter
+    """
+    validate_type(query, dict, "query")
+    validate_type(column_name, str, "column_name")
+    validate_type(operator, str, "operator")
+
+    if operator == "between":
+        validate_type(value, tuple, "between filter values")
+        new_filters = [(column_name, ">=", value[0]), (column_name, "<=", value[1])]
+    elif operator in FILTER_OPERATORS or operator == "in":
+        new_filters = [(column_name, operator, value)]
+    else:
+        raise ValueError(
+            f"The filter operator should be one of {list(FILTER_OPERATORS) + ['in', 'between']} not {operator}."
+        )
+
+    return {**query, "filters": query["filters"] + new_filters}
+
+
+def add_query_mask(
+    query: dict,
+    mask_function,
+) -> dict:
+    """
+    Add a condition that cannot be expressed as an attribute filter to a query
+
+    The mask functions are evaluated with the attribute filters in the fused
+    mask, but they are not pushed down into the read.
+
+    Parameters
+    ----------
+    query : dict
+        The query plan (see `create_query`)
+    mask_function : callable
+        A function that takes the data and returns a boolean array
+
+    Returns
+    -------
+    query : dict
+        A new query plan with the condition
+    """
+    validate_type(query, dict, "query")
+
+    return {**query, "mask_functions": query["mask_functions"] + [mask_function]}
+
+
+@instrument_function
+def collect_query(
+    query: dict,
+    use_cache: bool = True,
+    rebuild_cache: bool = False,
+    cache_dir: str = None,
+) -> pd.DataFrame:
+    """
+    Read the data of a query and filter it with one fused mask
+
+    The filters of columns in the file are pushed down into the read. All
+    filters, including those of the date-derived year and month columns and
+    the mask functions, are then evaluated as one boolean mask on the (already
+    reduced) data, which is materialised once.
+
+    Parameters
+    ----------
+    query : dict
+        The query plan (see `create_query`)
+    use_cache : bool, optional
+        Whether to read the data through the columnar cache. Default is True.
+    rebuild_cache : bool, optional
+        Whether to rebuild the columnar cache. Default is False.
+    cache_dir : str, optional
+        The directory to store the cache files. Default is None, which uses
+        a `.wildfire_cache` folder next to the data file.
+
+    Returns
+    -------
+    filtered_data : DataFrame or GeoDataFrame
+        The filtered data, with year and month columns if the query has a date column
+    """
+    validate_type(query, dict, "query")
+
+    date_column_name = query["date_column_name"]
+    derived_column_names = DATE_DERIVED_COLUMN_NAMES if date_column_name is not None else []
+    pushed_down_filters = [
+        query_filter for query_filter in query["filters"] if query_filter[0] not in derived_column_names
+    ]
+    columns = query["columns"]
+    if columns is not None:
+        filter_columns = [
+            column_name for column_name, _, _ in pushed_down_filters
+        ] + ([date_column_name] if date_column_name is not None else [])
+        columns = list(dict.fromkeys(filter_columns + columns))
+
+    read_function = read_csv_file_into_df if query["file_path"].lower().endswith(".csv") else read_vector_file_into_gdf
+    data_df = read_function(
+        query["file_path"],
+        use_cache=use_cache,
+        rebuild_cache=rebuild_cache,
+        cache_dir=cache_dir,
+        columns=columns,
+        filters=pushed_down_filters or None,
+    )
+
+    # the pushed-down filters are applied again, so the output does not
+    # depend on how the reader handled them
+    filtered_data = apply_query(data_df, query)
+
+    return filtered_data
+
+
+def apply_query(
+    data_df: pd.DataFrame,
+    query: dict,
+) -> pd.DataFrame:
+    """
+    Filter data that is already in memory with the fused mask of a query
+
+    Parameters
+    ----------
+    data_df : DataFrame or GeoDataFrame
+        The data to filter. The year and month columns are added to it if the
+        query has a date column.
+    query : dict
+        The query plan (see `create_query`). Its file path is not used.
+
+    Returns
+    -------
+    filtered_data : DataFrame or GeoDataFrame
+        The filtered data
+    """
+    validate_type(data_df, pd.DataFrame, "data_df")
+    validate_type(query, dict, "query")
+
+    date_column_name = query["date_column_name"]
+    if date_column_name is not None:
+        separated_date_dataframe = separate_date_series_to_Y_m_d(
+            date_series=data_df[date_column_name]
+        )
+        data_df["year"] = separated_date_dataframe["year"]
+        data_df["month"] = separated_date_dataframe["month"]
+
+    filtered_data = data_df.loc[
+        create_filter_mask(data_df, query["filters"], query["mask_functions"])
+    ]
+
+    return filtered_data
+
+
+@instrument_function
+def compact_dtypes(
+    data_df: pd.DataFrame,
+    column_dtypes: dict,
+) -> pd.DataFrame:
+    """
+    Convert the columns of a DataFrame to compact dtypes and measure the memory saved
+
+    Typical compact dtypes are "category" for repeated codes like provinces and
+    wind directions, "int8" or "int16" for years, months, days, and hours,
+    "float32" for measurements with less than 7 significant digits, and
+    "datetime64[s]" for date strings that are no longer parsed. The saving
+    depends on the string storage of pandas: with Arrow-backed strings (the
+    default of pandas 3) the string columns are already compact, so most of
+    the saving comes from the numeric columns.
+
+    The memory use is not printed, since the cleaning functions may run in
+    worker processes. It is stored in the `attrs` of the output, so the
+    caller can report it (see `create_memory_usage_message`).
+
+    Parameters
+    ----------
+    data_df : DataFrame or GeoDataFrame
+        The data to convert
+    column_dtypes : dict
+        The dtypes of the columns, e.g. {"SRC_AGENCY": "category", "YEAR": "int16"}.
+        Columns that are not in the data are skipped.
+
+    Returns
+    -------
+    compact_data_df : DataFrame or GeoDataFrame
+        The data with the converted columns, and the deep memory use before
+        and after the conversion in MB as
+        `compact_data_df.attrs["memory_usage_mb"] = {"before": ..., "after": ...}`
+    """
+    validate_type(data_df, pd.DataFrame, "data_df")
+    validate_type(column_dtypes, dict, "column_dtypes")
+
+    column_dtypes = {
+        column_name: dtype for column_name, dtype in column_dtypes.items()
+        if column_name in data_df.columns
+    }
+    if not column_dtypes:
+        return data_df
+
+    memory_before = data_df.memory_usage(index=True, deep=True).sum()
+    compact_data_df = data_df.astype(column_dtypes)
+    memory_after = compact_data_df.memory_usage(index=True, deep=True).sum()
+    compact_data_df.attrs["memory_usage_mb"] = {
+        "before": float(memory_before / 1e6),
+        "after": float(memory_after / 1e6),
+    }
+
+    return compact_data_df
+
+
+def create_memory_usage_message(
+    data_df: pd.DataFrame,
+    data_name: str = "The data",
+) -> str:
+    """
+    Create the report of the memory saved by `compact_dtypes`
+
+    Parameters
+    ----------
+    data_df : DataFrame or GeoDataFrame
+        The output of `compact_dtypes`, e.g. of a cleaning function
+    data_name : str, optional
+        The name of the data in the report. Default is "The data".
+
+    Returns
+    -------
+    memory_usage_message : str
+        The report, or None if the data was not converted by `compact_dtypes`
+    """
+    validate_type(data_df, pd.DataFrame, "data_df")
+    validate_type(data_name, str, "data_name")
+
+    memory_usage_mb = data_df.attrs.get("memory_usage_mb")
+    if memory_usage_mb is None:
+        return None
+    memory_usage_message = (
+        f"{data_name} memory use has been reduced from {memory_usage_mb['before']:.2f} MB"
+        f" to {memory_usage_mb['after']:.2f} MB"
+        f" ({memory_usage_mb['before'] / max(memory_usage_mb['after'], 1e-6):.1f}x smaller). \n"
+    )
+
+    return memory_usage_message
+
+
+@instrument_function
+def filter_df_by_date(
+    data_df: pd.DataFrame,
     date_column_name: str,
     start_year: int,
     end_year: int,
     start_month: int,
     end_month: int,
 ) -> pd.DataFrame:
+    """
+    Add year and month columns to a DataFrame and filter it by year and month
+
+    Parameters
+    ----------
+    data_df : DataFrame
+        The data with a date column
+    date_column_name : str
+        The name of the date column
+    start_year : int
+        The start year of interest
+    end_year : int
+        The end year of interest
+    start_month : int
+        The start month of interest
+    end_month : int
+        The end month of interest
+
+    Returns
+    -------
+    filtered_data_df : DataFrame
+        The filtered data with the added year and month columns
+    """
+    validate_type(data_df, pd.DataFrame, "data_df")
+    validate_type(date_column_name, str, "date_column_name")
+
+    separated_date_dataframe = separate_date_series_to_Y_m_d(
+        date_series=data_df[date_column_name]
+    )
+
+    data_df["year"] = separated_date_dataframe["year"]
+    data_df["month"] = separated_date_dataframe["month"]
+
+    # filter according to the years and months of interest in one pass
+    filtered_data_df = data_df.loc[
+        create_filter_mask(
+            data_df,
+            [
+                ("year", ">=", start_year),
+                ("year", "<=", end_year),
+                ("month", ">=", start_month),
+                ("month", "<=", end_month),
+            ],
+        )
+    ]
+
+    return filtered_data_df
+
+
+def filter_whitesands_f4_data_in_chunks(
+    file_path: str,
+    date_column_name: str,
+    start_year: int,
+    end_year: int,
+    start_month: int,
+    end_month: int,
+    chunk_size: int = 100000,
+    columns: list = None,
+    dtypes: dict = None,
+):
+    """
+    Read and filter Whitesands F4 data in bounded chunks
+
+    The CSV file is streamed in chunks of `chunk_size` rows and each chunk is
+    filtered by year and month before the next one is read, so the peak memory
+    is bounded by the chunk size rather than the file size. The columnar cache
+    is not used in this mode.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the Whitesands F4 data
+    date_column_name : str
+        The name of the date column
+    start_year : int
+        The start year of interest
+    end_year : int
+        The end year of interest
+    start_month : int
+        The start month of interest
+    end_month : int
+        The end month of interest
+    chunk_size : int, optional
+        The number of rows read per chunk. Default is 100000.
+    columns : list, optional
+        The columns to read in addition to the date column.
+        Default is None, which reads all columns.
+    dtypes : dict, optional
+        The dtypes of the columns, e.g. {"wind_speed_kmh": "float32"}.
+        Default is None, which lets pandas infer the dtypes.
+
+    Yields
+    ------
+    filtered_chunk : DataFrame
+        The filtered Whitesands F4 data of each chunk that has matching rows
+    """
+    validate_type(file_path, str, "Whitesands F4 data path")
+    validate_type(date_column_name, str, "date_column_name")
+    validate_type(chunk_size, int, "chunk_size")
+    if columns is not None:
+        validate_type(columns, list, "columns")
+        columns = list(dict.fromkeys([date_column_name] + columns))
+    if dtypes is not None:
+        validate_type(dtypes, dict, "dtypes")
+    # the date is parsed from the text, so avoid any dtype inference on it
+    dtypes = {**(dtypes or {}), date_column_name: str}
+
+    with pd.read_csv(
+        file_path,
+        usecols=columns,
+        dtype=dtypes,
+        chunksize=chunk_size,
+    ) as chunk_reader:
+        for chunk in chunk_reader:
+            filtered_chunk = filter_df_by_date(
+                chunk,
+                date_column_name=date_column_name,
+                start_year=start_year,
+                end_year=end_year,
+                start_month=start_month,
+                end_month=end_month,
+            )
+            if not filtered_chunk.empty:
+                yield filtered_chunk
+
+
+def create_whitesands_f4_query(
+    file_path: str,
+    date_column_name: str,
+    start_year: int,
+    end_year: int,
+    start_month: int,
+    end_month: int,
+) -> dict:
+    """
+    Create the query of the Whitesands F4 data cleaning parameters
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the Whitesands F4 data
+    date_column_name : str
+        The name of the date column
+    start_year : int
+        The start year of interest
+    end_year : int
+        The end year of interest
+    start_month : int
+        The start month of interest
+    end_month : int
+        The end month of interest
+
+    Returns
+    -------
+    whitesands_f4_query : dict
+        The query plan (see `create_query`)
+    """
+    validate_type(start_year, int, "start_year")
+    validate_type(end_year, int, "end_year")
+    validate_type(start_month, int, "start_month")
+    validate_type(end_month, int, "end_month")
+
+    whitesands_f4_query = create_query(file_path, date_column_name=date_column_name)
+    whitesands_f4_query = add_query_filter(whitesands_f4_query, "year", "between", (start_year, end_year))
+    whitesands_f4_query = add_query_filter(whitesands_f4_query, "month", "between", (start_month, end_month))
+
+    return whitesands_f4_query
+
+
+@instrument_function
+def filter_whitesands_f4_data(
+    file_path: str,
+    date_column_name: str,
+    start_year: int,
+    end_year: int,
+    start_month: int,
+    end_month: int,
+    use_cache: bool = True,
+    rebuild_cache: bool = False,
+    cache_dir: str = None,
+    chunk_size: int = None,
+    columns: list = None,
+    dtypes: dict = None,
+    return_chunks: bool = False,
+    column_dtypes: dict = None,
+):
     """
     Filter Whitesands F4 data according to the data cleaning parameters
 
@@ -293,10 +2132,34 @@ def filter_whitesands_f4_data(
         The start month of interest
     end_month : int
         The end month of interest
+    use_cache : bool, optional
+        Whether to read the data through the columnar cache. Default is True.
+    rebuild_cache : bool, optional
+        Whether to rebuild the columnar cache. Default is False.
+    cache_dir : str, optional
+        The directory to store the cache files. Default is None, which uses
+        a `.wildfire_cache` folder next to the data file.
+    chunk_size : int, optional
+        If given, the data is streamed in chunks of this many rows
+        (see `filter_whitesands_f4_data_in_chunks`). Default is None,
+        which reads the whole file at once.
+    columns : list, optional
+        The columns to read in streaming mode in addition to the date column.
+        Default is None, which reads all columns.
+    dtypes : dict, optional
+        The dtypes of the columns in streaming mode. Default is None.
+    return_chunks : bool, optional
+        In streaming mode, whether to return a generator of the filtered
+        chunks instead of one DataFrame. Default is False.
+    column_dtypes : dict, optional
+        The compact dtypes of the filtered data columns (see `compact_dtypes`),
+        e.g. {"c_wnd_drct_type": "category", "year": "int16"}. They are not
+        applied to the chunks returned with `return_chunks`.
+        Default is None, which keeps the dtypes.
 
     Returns
     -------
-    filtered_whitesands_f4_data : DataFrame
+    filtered_whitesands_f4_data : DataFrame or generator of DataFrame
         The filtered Whitesands F4 data
     """
     # read in the Whitesands F4 data
@@ -306,27 +2169,128 @@ def filter_whitesands_f4_data(
     validate_type(end_year, int, "end_year")
     validate_type(start_month, int, "start_month")
     validate_type(end_month, int, "end_month")
+    validate_type(return_chunks, bool, "return_chunks")
+
+    if chunk_size is not None:
+        filtered_chunks = filter_whitesands_f4_data_in_chunks(
+            file_path,
+            date_column_name=date_column_name,
+            start_year=start_year,
+            end_year=end_year,
+            start_month=start_month,
+            end_month=end_month,
+            chunk_size=chunk_size,
+            columns=columns,
+            dtypes=dtypes,
+        )
+        if return_chunks:
+            return filtered_chunks
+        filtered_chunks = list(filtered_chunks)
+        if not filtered_chunks:
+            # keep the columns of the file when no rows match
+            empty_df = pd.read_csv(
+                file_path,
+                usecols=None if columns is None else list(dict.fromkeys([date_column_name] + columns)),
+                nrows=0,
+            )
+            filtered_whitesands_f4_data = empty_df.assign(
+                year=pd.Series(dtype="int16"),
+                month=pd.Series(dtype="int8"),
+            )
+        else:
+            filtered_whitesands_f4_data = pd.concat(filtered_chunks)
+    else:
+        filtered_whitesands_f4_data = collect_query(
+            create_whitesands_f4_query(
+                file_path,
+                date_column_name=date_column_name,
+                start_year=start_year,
+                end_year=end_year,
+                start_month=start_month,
+                end_month=end_month,
+            ),
+            use_cache=use_cache,
+            rebuild_cache=rebuild_cache,
+            cache_dir=cache_dir,
+        )
 
-    whitesands_f4_data_df = pd.read_csv(file_path)
+    if column_dtypes is not None:
+        filtered_whitesands_f4_data = compact_dtypes(
+            filtered_whitesands_f4_data,
+            column_dtypes=column_dtypes,
+        )
 
-    separated_date_dataframe = separate_date_series_to_Y_m_d(
-        date_series=whitesands_f4_data_df[date_column_name]
+    return filtered_whitesands_f4_data
+
+
+# lookup table of the accepted (casefolded) English and French month names
+MONTH_NAMES_TO_INT = {
+    month_name: int_month
+    for int_month, month_names in enumerate(
+        [
+            ["jan", "january", "janv", "janvier", "1"],
+            ["feb", "february", "fév", "février", "fev", "fevrier", "2"],
+            ["mar", "march", "mars", "3"],
+            ["apr", "april", "avr", "avril", "4"],
+            ["may", "mai", "5"],
+            ["jun", "june", "juin", "6"],
+            ["jul", "july", "juil", "juillet", "7"],
+            ["aug", "august", "août", "aout", "8"],
+            ["sep", "september", "sept", "septembre", "9"],
+            ["oct", "october", "octobre", "10"],
+            ["nov", "november", "novembre", "11"],
+            ["dec", "december", "déc", "décembre", "12"],
+        ],
+        start=1,
     )
+    for month_name in month_names
+}
 
-    whitesands_f4_data_df["year"] = separated_date_dataframe["year"]
-    whitesands_f4_data_df["month"] = separated_date_dataframe["month"]
+# pattern of the "deg°min'sec''direction" coordinates, e.g. "50°30'30''N"
+COORDINATE_PATTERN = (
+    r"^\s*(?P<deg>\d+(?:\.\d*)?)°(?P<min>\d+(?:\.\d*)?)'(?P<sec>\d+(?:\.\d*)?)''"
+    r"\s*(?P<direction>[NSEWnsew])\s*$"
+)
 
-    # filter according to the years of interest
-    filtered_whitesands_f4_data = whitesands_f4_data_df.loc[
-        whitesands_f4_data_df["year"].between(start_year, end_year)
-    ]
+# the mean radius of the Earth used for great-circle distances
+EARTH_RADIUS_KM = 6371.0088
 
-    # filter according to the months of interest
-    filtered_whitesands_f4_data = filtered_whitesands_f4_data.loc[
-        filtered_whitesands_f4_data["month"].between(start_month, end_month)
-    ]
 
-    return filtered_whitesands_f4_data
+def create_invalid_rows_message(
+    values: pd.Series,
+    invalid_rows: np.ndarray,
+    arg_name: str,
+    max_reported_rows: int = 10,
+) -> str:
+    """
+    Create an error message listing the rows that could not be converted
+
+    Parameters
+    ----------
+    values : pandas.Series
+        The values that were converted
+    invalid_rows : numpy.ndarray
+        A boolean array that is True for the rows that could not be converted
+    arg_name : str
+        The name of the converted values to be used in the error message
+    max_reported_rows : int, optional
+        The maximum number of rows listed in the message. Default is 10.
+
+    Returns
+    -------
+    message : str
+        The error message
+    """
+    invalid_values = values[invalid_rows]
+    reported_rows = ", ".join(
+        f"{index}: {value!r}" for index, value in invalid_values.head(max_reported_rows).items()
+    )
+    message = f"{len(invalid_values)} of {len(values)} {arg_name} values could not be converted ({reported_rows}"
+    if len(invalid_values) > max_reported_rows:
+        message += ", ..."
+    message += ")."
+
+    return message
 
 
 def convert_month_to_int(
@@ -347,35 +2311,12 @@ def convert_month_to_int(
     """
     validate_type(month, str, "month")
 
-    if month.casefold() in ["jan", "january", "janv", "janvier", "1"]:
-        int_month = 1
-    elif month.casefold() in ["feb", "february", "fév", "février", "fev", "fevrier" "2"]:
-        int_month = 2
-    elif month.casefold() in ["mar", "march", "mars", "3"]:
-        int_month = 3
-    elif month.casefold() in ["apr", "april", "avr", "avril", "4"]:
-        int_month = 4
-    elif month.casefold() in ["may", "mai", "5"]:
-        int_month = 5
-    elif month.casefold() in ["jun", "june", "juin", "6"]:
-        int_month = 6
-    elif month.casefold() in ["jul", "july", "juil", "juillet", "7"]:
-        int_month = 7
-    elif month.casefold() in ["aug", "august", "août", "aout", "8"]:
-        int_month = 8
-    elif month.casefold() in ["sep", "september", "sept", "septembre", "9"]:
-        int_month = 9
-    elif month.casefold() in ["oct", "october", "octobre", "10"]:
-        int_month = 10
-    elif month.casefold() in ["nov", "november", "novembre", "11"]:
-        int_month = 11
-    elif month.casefold() in ["dec", "december", "déc", "décembre", "12"]:
-        int_month = 12
-    else:
+    int_month = MONTH_NAMES_TO_INT.get(month.casefold())
+    if int_month is None:
         raise ValueError(
             "The month should be one of the following: "
             "jan, january, janv, janvier, 1, "
-            "feb, february, fév, février, fev, fevrier 2, "
+            "feb, february, fév, février, fev, fevrier, 2, "
             "mar, march, mars, 3, "
             "apr, april, avr, avril, 4, "
             "may, mai, 5, "
@@ -388,7 +2329,60 @@ def convert_month_to_int(
             "dec, december, déc, décembre, 12."
         )
 
-    return int_month
+    return int_month
+
+
+@instrument_function
+def convert_months_to_int(
+    months,
+    errors: str = "raise",
+) -> np.ndarray:
+    """
+    Convert a Series or array of months to integers
+
+    Each distinct value is looked up once in `MONTH_NAMES_TO_INT` and the
+    results are broadcast back to the rows, so there is no Python loop over
+    the rows. Integer months between 1 and 12 are accepted as they are.
+
+    Parameters
+    ----------
+    months : pandas.Series or numpy.ndarray
+        The months as strings (see `convert_month_to_int`) or integers
+    errors : str, optional
+        How to handle values that are not months. Default is "raise". The options are:
+            'raise': raise a ValueError listing the invalid rows.
+            'coerce': set the invalid rows to 0.
+
+    Returns
+    -------
+    int_months : numpy.ndarray
+        The months as an int8 array
+    """
+    validate_type(months, (pd.Series, np.ndarray), "months")
+    validate_type(errors, str, "errors")
+    if errors not in ["raise", "coerce"]:
+        raise ValueError(f"The errors should be 'raise' or 'coerce' not {errors}.")
+
+    months = pd.Series(months) if isinstance(months, np.ndarray) else months
+
+    codes, unique_months = pd.factorize(months, use_na_sentinel=True)
+    unique_int_months = np.array(
+        [
+            MONTH_NAMES_TO_INT.get(str(month).strip().casefold(), 0)
+            if isinstance(month, str) or not float(month).is_integer()
+            else int(month) if 1 <= month <= 12 else 0
+            for month in unique_months
+        ],
+        dtype=np.int8,
+    )
+    # missing values (code -1) map to the 0 appended at the end
+    int_months = np.append(unique_int_months, np.int8(0))[codes]
+
+    invalid_rows = int_months == 0
+    if errors == "raise" and invalid_rows.any():
+        raise ValueError(create_invalid_rows_message(months, invalid_rows, "month"))
+
+    return int_months
 
 
 def convert_coordinate_to_float(
@@ -425,6 +2419,161 @@ def convert_coordinate_to_float(
     return float_coordinate
 
 
+@instrument_function
+def convert_coordinates_to_float(
+    coordinates,
+    errors: str = "raise",
+) -> np.ndarray:
+    """
+    Convert a Series or array of coordinates to floats
+
+    All rows are parsed with one vectorized regular expression
+    (`COORDINATE_PATTERN`) instead of splitting each string in Python.
+
+    Parameters
+    ----------
+    coordinates : pandas.Series or numpy.ndarray
+        The coordinate values as "deg°min'sec''direction" strings
+        (see `convert_coordinate_to_float`)
+    errors : str, optional
+        How to handle values that are not coordinates. Default is "raise". The options are:
+            'raise': raise a ValueError listing the invalid rows.
+            'coerce': set the invalid rows to NaN.
+
+    Returns
+    -------
+    float_coordinates : numpy.ndarray
+        The coordinate values as a float64 array
+    """
+    validate_type(coordinates, (pd.Series, np.ndarray), "coordinates")
+    validate_type(errors, str, "errors")
+    if errors not in ["raise", "coerce"]:
+        raise ValueError(f"The errors should be 'raise' or 'coerce' not {errors}.")
+
+    coordinates = pd.Series(coordinates) if isinstance(coordinates, np.ndarray) else coordinates
+
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        pa = None
+
+    if pa is not None:
+        # the arrow regex kernel is much faster than Series.str.extract
+        coordinate_strings = pa.array(
+            coordinates.astype("string").to_numpy(dtype=object, na_value=None),
+            type=pa.string(),
+        )
+        coordinate_parts = pc.extract_regex(coordinate_strings, COORDINATE_PATTERN)
+        # struct_field keeps the rows that did not match the pattern as nulls
+        deg, min, sec = [
+            pc.cast(pc.struct_field(coordinate_parts, part), pa.float64()).to_numpy(zero_copy_only=False)
+            for part in ["deg", "min", "sec"]
+        ]
+        direction = pc.utf8_upper(pc.struct_field(coordinate_parts, "direction"))
+        is_negative = pc.is_in(direction, value_set=pa.array(["S", "W"]))
+        is_negative = pc.fill_null(is_negative, False).to_numpy(zero_copy_only=False)
+    else:
+        coordinate_parts = coordinates.astype("string").str.extract(COORDINATE_PATTERN)
+        deg, min, sec = [
+            coordinate_parts[part].astype("float64").to_numpy(na_value=np.nan)
+            for part in ["deg", "min", "sec"]
+        ]
+        is_negative = coordinate_parts["direction"].str.upper().isin(["S", "W"]).to_numpy()
+
+    float_coordinates = deg + min / 60 + sec / 3600
+    float_coordinates = np.where(is_negative, - float_coordinates, float_coordinates)
+
+    invalid_rows = np.isnan(float_coordinates)
+    if errors == "raise" and invalid_rows.any():
+        raise ValueError(create_invalid_rows_message(coordinates, invalid_rows, "coordinate"))
+
+    return float_coordinates
+
+
+def calculate_great_circle_distance_km(
+    lat1,
+    lon1,
+    lat2,
+    lon2,
+):
+    """
+    Calculate the great-circle distance between coordinates with the haversine formula
+
+    The arguments can be floats or arrays that broadcast together.
+
+    Parameters
+    ----------
+    lat1 : float or numpy.ndarray
+        The latitudes of the first points in degrees
+    lon1 : float or numpy.ndarray
+        The longitudes of the first points in degrees
+    lat2 : float or numpy.ndarray
+        The latitudes of the second points in degrees
+    lon2 : float or numpy.ndarray
+        The longitudes of the second points in degrees
+
+    Returns
+    -------
+    distance_km : float or numpy.ndarray
+        The great-circle distances in km
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(coordinate) for coordinate in (lat1, lon1, lat2, lon2))
+    haversine = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    distance_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(haversine, 0, 1)))
+
+    return distance_km
+
+
+def create_great_circle_bounds(
+    centre_lat: float,
+    centre_lon: float,
+    radius_km: float,
+) -> tuple:
+    """
+    Create the latitude and longitude bounds of a great-circle radius around a centre
+
+    Every point within the radius is inside the bounds, so they can be used as
+    a box pre-filter before the exact distance test. The bounds span all
+    longitudes if the circle reaches a pole or the antimeridian.
+
+    Parameters
+    ----------
+    centre_lat : float
+        The centre latitude in degrees
+    centre_lon : float
+        The centre longitude in degrees
+    radius_km : float
+        The radius in km
+
+    Returns
+    -------
+    bounds : tuple
+        (min lat, max lat, min lon, max lon) in degrees
+    """
+    validate_type(centre_lat, float, "centre_lat")
+    validate_type(centre_lon, float, "centre_lon")
+    validate_type(radius_km, float, "radius_km")
+
+    angular_radius = radius_km / EARTH_RADIUS_KM
+    min_lat = centre_lat - math.degrees(angular_radius)
+    max_lat = centre_lat + math.degrees(angular_radius)
+    if min_lat <= -90 or max_lat >= 90 or angular_radius >= math.pi / 2:
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+
+    # the widest longitude span of the circle is at the tangent latitude
+    lon_delta = math.degrees(math.asin(min(1.0, math.sin(angular_radius) / math.cos(math.radians(centre_lat)))))
+    min_lon = centre_lon - lon_delta
+    max_lon = centre_lon + lon_delta
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, max_lat, -180.0, 180.0
+
+    return min_lat, max_lat, min_lon, max_lon
+
+
 def load_json_file(
     json_name: str,
     json_path: str = None,
@@ -497,51 +2646,541 @@ def create_data_file_path(
             "The file name should include the file extension."
         )
 
-    data_file_path = os.path.join(
-        data_package_dir,
-        file_name,
+    data_file_path = os.path.join(
+        data_package_dir,
+        file_name,
+    )
+
+    return data_file_path
+
+
+def create_nfdb_query(
+        file_path: str,
+        province_or_territory_column_name: str,
+        province_or_territory: str,
+        region_centre_latitude_column_name: str,
+        region_centre_lat: float,
+        region_centre_longitude_column_name: str,
+        region_centre_lon: float,
+        region_radius: float,
+        year_column: str,
+        start_year: int,
+        end_year: int,
+        month_column: str,
+        start_month: int,
+        end_month: int,
+        columns: list = None,
+        region_radius_km: float = None,
+) -> dict:
+    """
+    Create the query of the NFDB data cleaning parameters
+
+    See `filter_nfdb_data` for the parameters.
+
+    Returns
+    -------
+    nfdb_query : dict
+        The query plan (see `create_query`)
+    """
+    validate_type(file_path, str, "NFDB data path")
+    validate_type(province_or_territory_column_name, str, "province_or_territory_column_name")
+    validate_type(province_or_territory, str, "province_or_territory")
+    validate_type(region_centre_latitude_column_name, str, "region_centre_latitude_column_name")
+    validate_type(region_centre_lat, float, "region_centre_lat")
+    validate_type(region_centre_longitude_column_name, str, "region_centre_longitude_column_name")
+    validate_type(region_centre_lon, float, "region_centre_lon")
+    validate_type(region_radius, float, "region_radius")
+    validate_type(year_column, str, "year_column")
+    validate_type(start_year, int, "start_year")
+    validate_type(end_year, int, "end_year")
+    validate_type(month_column, str, "month_column")
+    validate_type(start_month, int, "start_month")
+    validate_type(end_month, int, "end_month")
+
+    if columns is not None:
+        validate_type(columns, list, "columns")
+
+    if region_radius_km is None:
+        min_lat, max_lat = region_centre_lat - region_radius, region_centre_lat + region_radius
+        min_lon, max_lon = region_centre_lon - region_radius, region_centre_lon + region_radius
+    else:
+        validate_type(region_radius_km, float, "region_radius_km")
+        min_lat, max_lat, min_lon, max_lon = create_great_circle_bounds(
+            region_centre_lat, region_centre_lon, region_radius_km
+        )
+
+    # the province, region, year, and month filters are pushed down into the
+    # read and evaluated again as one mask
+    nfdb_query = create_query(file_path, columns=columns)
+    nfdb_query = add_query_filter(nfdb_query, province_or_territory_column_name, "==", province_or_territory)
+    nfdb_query = add_query_filter(nfdb_query, region_centre_latitude_column_name, "between", (min_lat, max_lat))
+    nfdb_query = add_query_filter(nfdb_query, region_centre_longitude_column_name, "between", (min_lon, max_lon))
+    nfdb_query = add_query_filter(nfdb_query, year_column, "between", (start_year, end_year))
+    nfdb_query = add_query_filter(nfdb_query, month_column, "between", (start_month, end_month))
+    if region_radius_km is not None:
+        nfdb_query = add_query_mask(
+            nfdb_query,
+            lambda nfdb_data_gdf: calculate_great_circle_distance_km(
+                region_centre_lat,
+                region_centre_lon,
+                nfdb_data_gdf[region_centre_latitude_column_name].to_numpy(dtype=float),
+                nfdb_data_gdf[region_centre_longitude_column_name].to_numpy(dtype=float),
+            ) <= region_radius_km,
+        )
+
+    return nfdb_query
+
+
+@instrument_function
+def filter_nfdb_data(
+        file_path: str,
+        province_or_territory_column_name: str,
+        province_or_territory: str,
+        region_centre_latitude_column_name: str,
+        region_centre_lat: float,
+        region_centre_longitude_column_name: str,
+        region_centre_lon: float,
+        region_radius: float,
+        year_column: str,
+        start_year: int,
+        end_year: int,
+        month_column: str,
+        start_month: int,
+        end_month: int,
+        use_cache: bool = True,
+        rebuild_cache: bool = False,
+        cache_dir: str = None,
+        columns: list = None,
+        region_radius_km: float = None,
+        column_dtypes: dict = None,
+) -> gpd.GeoDataFrame:
+    """
+    Filter NFDB data according to the data cleaning parameters
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the NFDB data
+    province_or_territory_column_name : str
+        The name of the province or territory column
+    province_or_territory : str
+        The province or territory of interest
+    region_centre_latitude_column_name : str
+        The name of the region centre latitude column
+    region_centre_lat : float
+        The region centre latitude
+    region_centre_longitude_column_name : str
+        The name of the region centre longitude column
+    region_centre_lon : float
+        The region centre longitude
+    region_radius : float
+        The radius of the region of interest in degrees. The region is the
+        square of this half-width around the centre.
+    year_column : str
+        The name of the year column
+    start_year : int
+        The start year of interest
+    end_year : int
+        The end year of interest
+    month_column : str
+        The name of the month column
+    start_month : int
+        The start month of interest
+    end_month : int
+        The end month of interest
+    use_cache : bool, optional
+        Whether to read the data through the columnar cache. Default is True.
+    rebuild_cache : bool, optional
+        Whether to rebuild the columnar cache. Default is False.
+    cache_dir : str, optional
+        The directory to store the cache files. Default is None, which uses
+        a `.wildfire_cache` folder next to the data file.
+    columns : list, optional
+        The columns to read in addition to the filter columns.
+        Default is None, which reads all columns.
+    region_radius_km : float, optional
+        The great-circle radius of the region of interest in km. If given,
+        the region is the circle of this radius around the centre and
+        `region_radius` is ignored. Default is None.
+    column_dtypes : dict, optional
+        The compact dtypes of the filtered data columns (see `compact_dtypes`),
+        e.g. {"SRC_AGENCY": "category", "YEAR": "int16"}.
+        Default is None, which keeps the dtypes.
+
+    Returns
+    -------
+    filtered_nfdb_data : GeoDataFrame
+        The filtered NFDB data
+    """
+    filtered_nfdb_data = collect_query(
+        create_nfdb_query(
+            file_path,
+            province_or_territory_column_name=province_or_territory_column_name,
+            province_or_territory=province_or_territory,
+            region_centre_latitude_column_name=region_centre_latitude_column_name,
+            region_centre_lat=region_centre_lat,
+            region_centre_longitude_column_name=region_centre_longitude_column_name,
+            region_centre_lon=region_centre_lon,
+            region_radius=region_radius,
+            year_column=year_column,
+            start_year=start_year,
+            end_year=end_year,
+            month_column=month_column,
+            start_month=start_month,
+            end_month=end_month,
+            columns=columns,
+            region_radius_km=region_radius_km,
+        ),
+        use_cache=use_cache,
+        rebuild_cache=rebuild_cache,
+        cache_dir=cache_dir,
+    )
+
+    if column_dtypes is not None:
+        filtered_nfdb_data = compact_dtypes(
+            filtered_nfdb_data,
+            column_dtypes=column_dtypes,
+        )
+
+    return filtered_nfdb_data
+
+
+@instrument_function
+def filter_nfdb_data_by_regions(
+        file_path: str,
+        regions: list,
+        province_or_territory_column_name: str,
+        region_centre_latitude_column_name: str,
+        region_centre_longitude_column_name: str,
+        year_column: str,
+        start_year: int,
+        end_year: int,
+        month_column: str,
+        start_month: int,
+        end_month: int,
+        region_column_name: str = "region_name",
+        return_dict: bool = False,
+        use_cache: bool = True,
+        rebuild_cache: bool = False,
+        cache_dir: str = None,
+        columns: list = None,
+):
+    """
+    Filter NFDB data for several regions of interest with a single read
+
+    The NFDB data is read once, with the time filters, the provinces or
+    territories, and the bounding box of all regions pushed down into the read.
+    The region boxes are then matched against an STRtree of the fire
+    coordinates in one query, so the cost grows with the number of matching
+    fires rather than with the number of regions times the number of fires.
+    Each region selects the same fires as `filter_nfdb_data` would.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the NFDB data
+    regions : list
+        The regions of interest as dicts with the keys "region_name",
+        "province_or_territory", "region_centre_lat", "region_centre_lon",
+        and "region_radius" (see `create_nfdb_regions`)
+    province_or_territory_column_name : str
+        The name of the province or territory column
+    region_centre_latitude_column_name : str
+        The name of the region centre latitude column
+    region_centre_longitude_column_name : str
+        The name of the region centre longitude column
+    year_column : str
+        The name of the year column
+    start_year : int
+        The start year of interest
+    end_year : int
+        The end year of interest
+    month_column : str
+        The name of the month column
+    start_month : int
+        The start month of interest
+    end_month : int
+        The end month of interest
+    region_column_name : str, optional
+        The name of the region column of the region-labelled frame.
+        Default is "region_name".
+    return_dict : bool, optional
+        Whether to return one GeoDataFrame per region instead of a single
+        region-labelled GeoDataFrame. Default is False.
+    use_cache : bool, optional
+        Whether to read the data through the columnar cache. Default is True.
+    rebuild_cache : bool, optional
+        Whether to rebuild the columnar cache. Default is False.
+    cache_dir : str, optional
+        The directory to store the cache files. Default is None, which uses
+        a `.wildfire_cache` folder next to the data file.
+    columns : list, optional
+        The columns to read in addition to the filter columns.
+        Default is None, which reads all columns.
+
+    Returns
+    -------
+    filtered_nfdb_data : GeoDataFrame or dict
+        The filtered NFDB data of all regions with a region column, in the
+        order of the regions. A fire in overlapping regions appears once per
+        region. If `return_dict` is True, {region name: GeoDataFrame} instead.
+    """
+    validate_type(file_path, str, "NFDB data path")
+    validate_type(regions, list, "regions")
+    validate_type(province_or_territory_column_name, str, "province_or_territory_column_name")
+    validate_type(region_centre_latitude_column_name, str, "region_centre_latitude_column_name")
+    validate_type(region_centre_longitude_column_name, str, "region_centre_longitude_column_name")
+    validate_type(year_column, str, "year_column")
+    validate_type(start_year, int, "start_year")
+    validate_type(end_year, int, "end_year")
+    validate_type(month_column, str, "month_column")
+    validate_type(start_month, int, "start_month")
+    validate_type(end_month, int, "end_month")
+    validate_type(region_column_name, str, "region_column_name")
+    validate_type(return_dict, bool, "return_dict")
+    if len(regions) == 0:
+        raise ValueError("At least one region of interest should be given.")
+    for region in regions:
+        validate_type(region, dict, "region")
+        validate_type(region["region_name"], str, "region_name")
+        validate_type(region["province_or_territory"], str, "province_or_territory")
+        validate_type(region["region_centre_lat"], float, "region_centre_lat")
+        validate_type(region["region_centre_lon"], float, "region_centre_lon")
+        validate_type(region["region_radius"], float, "region_radius")
+    region_names = [region["region_name"] for region in regions]
+    if len(set(region_names)) != len(region_names):
+        raise ValueError(f"The region names should be unique, got {region_names}.")
+
+    if columns is not None:
+        validate_type(columns, list, "columns")
+        filter_columns = [
+            province_or_territory_column_name,
+            region_centre_latitude_column_name,
+            region_centre_longitude_column_name,
+            year_column,
+            month_column,
+        ]
+        columns = list(dict.fromkeys(filter_columns + columns))
+
+    # the corners of the region boxes as (min lon, min lat, max lon, max lat)
+    region_bounds = np.array(
+        [
+            [
+                region["region_centre_lon"] - region["region_radius"],
+                region["region_centre_lat"] - region["region_radius"],
+                region["region_centre_lon"] + region["region_radius"],
+                region["region_centre_lat"] + region["region_radius"],
+            ]
+            for region in regions
+        ]
+    )
+    provinces_or_territories = sorted({region["province_or_territory"] for region in regions})
+
+    # push the filters shared by all regions down into the read
+    nfdb_data_gdf = read_vector_file_into_gdf(
+        file_path,
+        use_cache=use_cache,
+        rebuild_cache=rebuild_cache,
+        cache_dir=cache_dir,
+        columns=columns,
+        filters=[
+            (province_or_territory_column_name, "in", provinces_or_territories),
+            (region_centre_latitude_column_name, ">=", region_bounds[:, 1].min()),
+            (region_centre_latitude_column_name, "<=", region_bounds[:, 3].max()),
+            (region_centre_longitude_column_name, ">=", region_bounds[:, 0].min()),
+            (region_centre_longitude_column_name, "<=", region_bounds[:, 2].max()),
+            (year_column, ">=", start_year),
+            (year_column, "<=", end_year),
+            (month_column, ">=", start_month),
+            (month_column, "<=", end_month),
+        ],
+    )
+    nfdb_data_gdf = nfdb_data_gdf.loc[
+        create_filter_mask(
+            nfdb_data_gdf,
+            [
+                (year_column, ">=", start_year),
+                (year_column, "<=", end_year),
+                (month_column, ">=", start_month),
+                (month_column, "<=", end_month),
+            ],
+        )
+    ]
+
+    # match all region boxes against the fire coordinates in one index query;
+    # the box boundaries are included, as in `filter_nfdb_data`
+    fire_points = shapely.points(
+        nfdb_data_gdf[region_centre_longitude_column_name].to_numpy(dtype=float),
+        nfdb_data_gdf[region_centre_latitude_column_name].to_numpy(dtype=float),
+    )
+    region_indices, fire_indices = shapely.STRtree(fire_points).query(
+        shapely.box(*region_bounds.T),
+        predicate="intersects",
+    )
+
+    # keep the fires in the province or territory of their region, in the
+    # order of the regions and then of the data
+    fire_provinces_or_territories = nfdb_data_gdf[province_or_territory_column_name].to_numpy()
+    region_provinces_or_territories = np.array([region["province_or_territory"] for region in regions], dtype=object)
+    is_in_province_or_territory = (
+        fire_provinces_or_territories[fire_indices] == region_provinces_or_territories[region_indices]
+    )
+    filtered_nfdb_data = create_region_labelled_data(
+        nfdb_data_gdf,
+        region_indices=region_indices[is_in_province_or_territory],
+        row_indices=fire_indices[is_in_province_or_territory],
+        region_names=region_names,
+        region_column_name=region_column_name,
+        return_dict=return_dict,
+    )
+
+    return filtered_nfdb_data
+
+
+def create_region_labelled_data(
+    data_gdf: gpd.GeoDataFrame,
+    region_indices: np.ndarray,
+    row_indices: np.ndarray,
+    region_names: list,
+    region_column_name: str,
+    return_dict: bool = False,
+):
+    """
+    Create the per-region rows of a GeoDataFrame from (region, row) matches
+
+    Parameters
+    ----------
+    data_gdf : GeoDataFrame
+        The data the rows are taken from
+    region_indices : numpy.ndarray
+        The positions of the matched regions in `region_names`
+    row_indices : numpy.ndarray
+        The positions of the matched rows in `data_gdf`
+    region_names : list
+        The names of the regions
+    region_column_name : str
+        The name of the region column of the region-labelled frame
+    return_dict : bool, optional
+        Whether to return one GeoDataFrame per region instead of a single
+        region-labelled GeoDataFrame. Default is False.
+
+    Returns
+    -------
+    region_labelled_data : GeoDataFrame or dict
+        The matched rows with a categorical region column, in the order of
+        the regions and then of the data. If `return_dict` is True,
+        {region name: GeoDataFrame} instead.
+    """
+    match_order = np.lexsort((row_indices, region_indices))
+    region_indices = region_indices[match_order]
+    row_indices = row_indices[match_order]
+
+    if return_dict:
+        region_starts = np.searchsorted(region_indices, np.arange(len(region_names) + 1))
+        region_labelled_data = {
+            region_name: data_gdf.iloc[row_indices[region_starts[i]:region_starts[i + 1]]]
+            for i, region_name in enumerate(region_names)
+        }
+        return region_labelled_data
+
+    region_labelled_data = data_gdf.iloc[row_indices].copy()
+    region_labelled_data[region_column_name] = pd.Categorical.from_codes(
+        region_indices,
+        categories=region_names,
+    )
+
+    return region_labelled_data
+
+
+@instrument_function
+def read_areas_of_interest(
+    file_path: str,
+    name_column_name: str,
+    use_cache: bool = True,
+    rebuild_cache: bool = False,
+    cache_dir: str = None,
+) -> gpd.GeoDataFrame:
+    """
+    Read area of interest polygons from a vector file in latitude/longitude coordinates
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the vector file of the areas of interest, e.g. park
+        boundaries or forest management units
+    name_column_name : str
+        The name of the column with the unique names of the areas
+    use_cache : bool, optional
+        Whether to read the file through the columnar cache. Default is True.
+    rebuild_cache : bool, optional
+        Whether to rebuild the columnar cache. Default is False.
+    cache_dir : str, optional
+        The directory to store the cache files. Default is None, which uses
+        a `.wildfire_cache` folder next to the vector file.
+
+    Returns
+    -------
+    areas_of_interest : GeoDataFrame
+        The names and (multi)polygons of the areas in EPSG:4326
+    """
+    validate_type(name_column_name, str, "name_column_name")
+
+    areas_of_interest = read_vector_file_into_gdf(
+        file_path,
+        use_cache=use_cache,
+        rebuild_cache=rebuild_cache,
+        cache_dir=cache_dir,
+        columns=[name_column_name],
     )
+    if areas_of_interest[name_column_name].duplicated().any():
+        raise ValueError(f"The area of interest names in the {name_column_name} column should be unique.")
+    if areas_of_interest.crs is not None and not areas_of_interest.crs.equals("EPSG:4326"):
+        areas_of_interest = areas_of_interest.to_crs("EPSG:4326")
 
-    return data_file_path
+    return areas_of_interest
 
 
-def filter_nfdb_data(
+@instrument_function
+def filter_nfdb_data_by_areas_of_interest(
         file_path: str,
-        province_or_territory_column_name: str,
-        province_or_territory: str,
+        areas_of_interest: gpd.GeoDataFrame,
+        area_name_column_name: str,
         region_centre_latitude_column_name: str,
-        region_centre_lat: float,
         region_centre_longitude_column_name: str,
-        region_centre_lon: float,
-        region_radius: float,
         year_column: str,
         start_year: int,
         end_year: int,
         month_column: str,
         start_month: int,
         end_month: int,
-) -> gpd.GeoDataFrame:
+        return_dict: bool = False,
+        use_cache: bool = True,
+        rebuild_cache: bool = False,
+        cache_dir: str = None,
+        columns: list = None,
+):
     """
-    Filter NFDB data according to the data cleaning parameters
+    Filter NFDB data for the fires inside area of interest polygons
+
+    The NFDB data is read once, with the time filters and the bounding box of
+    all areas pushed down into the read. A binary search over the fires sorted
+    by longitude then selects the fires in the bounding box of each area, and
+    only those are tested against the prepared area polygon, without building
+    a geometry per fire. Fires on an area boundary are inside the area.
 
     Parameters
     ----------
     file_path : str
         The path to the NFDB data
-    province_or_territory_column_name : str
-        The name of the province or territory column
-    province_or_territory : str
-        The province or territory of interest
+    areas_of_interest : GeoDataFrame
+        The areas of interest in EPSG:4326, e.g. the output of `read_areas_of_interest`
+    area_name_column_name : str
+        The name of the column with the unique names of the areas. It is also
+        the name of the area column of the area-labelled frame.
     region_centre_latitude_column_name : str
-        The name of the region centre latitude column
-    region_centre_lat : float
-        The region centre latitude
+        The name of the fire latitude column
     region_centre_longitude_column_name : str
-        The name of the region centre longitude column
-    region_centre_lon : float
-        The region centre longitude
-    region_radius : float
-        The radius of the region of interest
+        The name of the fire longitude column
     year_column : str
         The name of the year column
     start_year : int
@@ -554,60 +3193,372 @@ def filter_nfdb_data(
         The start month of interest
     end_month : int
         The end month of interest
+    return_dict : bool, optional
+        Whether to return one GeoDataFrame per area instead of a single
+        area-labelled GeoDataFrame. Default is False.
+    use_cache : bool, optional
+        Whether to read the data through the columnar cache. Default is True.
+    rebuild_cache : bool, optional
+        Whether to rebuild the columnar cache. Default is False.
+    cache_dir : str, optional
+        The directory to store the cache files. Default is None, which uses
+        a `.wildfire_cache` folder next to the data file.
+    columns : list, optional
+        The columns to read in addition to the filter columns.
+        Default is None, which reads all columns.
 
     Returns
     -------
-    filtered_nfdb_data : GeoDataFrame
-        The filtered NFDB data
+    filtered_nfdb_data : GeoDataFrame or dict
+        The filtered NFDB data of all areas with an area column, in the order
+        of the areas. A fire in overlapping areas appears once per area.
+        If `return_dict` is True, {area name: GeoDataFrame} instead.
     """
-    # read in the NFDB data
     validate_type(file_path, str, "NFDB data path")
-    validate_type(province_or_territory_column_name, str, "province_or_territory_column_name")
-    validate_type(province_or_territory, str, "province_or_territory")
+    validate_type(areas_of_interest, gpd.GeoDataFrame, "areas_of_interest")
+    validate_type(area_name_column_name, str, "area_name_column_name")
     validate_type(region_centre_latitude_column_name, str, "region_centre_latitude_column_name")
-    validate_type(region_centre_lat, float, "region_centre_lat")
     validate_type(region_centre_longitude_column_name, str, "region_centre_longitude_column_name")
-    validate_type(region_centre_lon, float, "region_centre_lon")
-    validate_type(region_radius, float, "region_radius")
     validate_type(year_column, str, "year_column")
     validate_type(start_year, int, "start_year")
     validate_type(end_year, int, "end_year")
     validate_type(month_column, str, "month_column")
     validate_type(start_month, int, "start_month")
     validate_type(end_month, int, "end_month")
-
-    nfdb_data_gdf = read_vector_file_into_gdf(file_path)
-
-    # filter according to the province or territory
-    filtered_nfdb_data = nfdb_data_gdf.loc[
-        nfdb_data_gdf[province_or_territory_column_name] == province_or_territory
-    ]
-
-    # filter according to the region centre coordinates
-    filtered_nfdb_data = filtered_nfdb_data.loc[
-        filtered_nfdb_data[region_centre_latitude_column_name].between(
-            region_centre_lat - region_radius,
-            region_centre_lat + region_radius
+    validate_type(return_dict, bool, "return_dict")
+    if len(areas_of_interest) == 0:
+        raise ValueError("At least one area of interest should be given.")
+    if areas_of_interest.crs is not None and not areas_of_interest.crs.equals("EPSG:4326"):
+        raise ValueError(
+            f"The areas of interest should be in EPSG:4326 not {areas_of_interest.crs}. "
+            f"Use read_areas_of_interest to read them."
         )
-    ]
-    filtered_nfdb_data = filtered_nfdb_data.loc[
-        filtered_nfdb_data[region_centre_longitude_column_name].between(
-            region_centre_lon - region_radius,
-            region_centre_lon + region_radius
+
+    if columns is not None:
+        validate_type(columns, list, "columns")
+        filter_columns = [
+            region_centre_latitude_column_name,
+            region_centre_longitude_column_name,
+            year_column,
+            month_column,
+        ]
+        columns = list(dict.fromkeys(filter_columns + columns))
+
+    # push the filters shared by all areas down into the read
+    min_lon, min_lat, max_lon, max_lat = areas_of_interest.total_bounds
+    nfdb_data_gdf = read_vector_file_into_gdf(
+        file_path,
+        use_cache=use_cache,
+        rebuild_cache=rebuild_cache,
+        cache_dir=cache_dir,
+        columns=columns,
+        filters=[
+            (region_centre_latitude_column_name, ">=", min_lat),
+            (region_centre_latitude_column_name, "<=", max_lat),
+            (region_centre_longitude_column_name, ">=", min_lon),
+            (region_centre_longitude_column_name, "<=", max_lon),
+            (year_column, ">=", start_year),
+            (year_column, "<=", end_year),
+            (month_column, ">=", start_month),
+            (month_column, "<=", end_month),
+        ],
+    )
+    nfdb_data_gdf = nfdb_data_gdf.loc[
+        create_filter_mask(
+            nfdb_data_gdf,
+            [
+                (year_column, ">=", start_year),
+                (year_column, "<=", end_year),
+                (month_column, ">=", start_month),
+                (month_column, "<=", end_month),
+            ],
         )
     ]
 
-    # filter according to the years of interest
-    filtered_nfdb_data = filtered_nfdb_data.loc[
-        filtered_nfdb_data[year_column].between(start_year, end_year)
-    ]
+    # the fires sorted by longitude are the index of the pre-pass: the fires in
+    # the bounding box of an area are found with a binary search and a
+    # latitude check, and only those are tested against the prepared polygon
+    fire_lons = nfdb_data_gdf[region_centre_longitude_column_name].to_numpy(dtype=float)
+    fire_lats = nfdb_data_gdf[region_centre_latitude_column_name].to_numpy(dtype=float)
+    lon_order = np.argsort(fire_lons, kind="stable")
+    sorted_fire_lons = fire_lons[lon_order]
+    area_geometries = areas_of_interest.geometry.to_numpy()
+    area_indices, fire_indices = [], []
+    for area_index, (area_geometry, (area_min_lon, area_min_lat, area_max_lon, area_max_lat)) in enumerate(
+        zip(area_geometries, areas_of_interest.geometry.bounds.to_numpy())
+    ):
+        if area_geometry is None or area_geometry.is_empty:
+            continue
+        candidates = lon_order[
+            np.searchsorted(sorted_fire_lons, area_min_lon, side="left"):
+            np.searchsorted(sorted_fire_lons, area_max_lon, side="right")
+        ]
+        candidates = candidates[
+            (fire_lats[candidates] >= area_min_lat) & (fire_lats[candidates] <= area_max_lat)
+        ]
+        shapely.prepare(area_geometry)
+        is_in_area = shapely.intersects_xy(area_geometry, fire_lons[candidates], fire_lats[candidates])
+        fire_indices.append(candidates[is_in_area])
+        area_indices.append(np.full(is_in_area.sum(), area_index))
+    area_indices = np.concatenate(area_indices) if area_indices else np.array([], dtype=np.int64)
+    fire_indices = np.concatenate(fire_indices) if fire_indices else np.array([], dtype=np.int64)
+
+    filtered_nfdb_data = create_region_labelled_data(
+        nfdb_data_gdf,
+        region_indices=area_indices,
+        row_indices=fire_indices,
+        region_names=areas_of_interest[area_name_column_name].tolist(),
+        region_column_name=area_name_column_name,
+        return_dict=return_dict,
+    )
+
+    return filtered_nfdb_data
 
-    # filter according to the months of interest
-    filtered_nfdb_data = filtered_nfdb_data.loc[
-        filtered_nfdb_data[month_column].between(start_month, end_month)
+
+def create_nfdb_regions(
+    regions_of_interest: list,
+) -> list:
+    """
+    Create the regions of `filter_nfdb_data_by_regions` from config regions of interest
+
+    Parameters
+    ----------
+    regions_of_interest : list
+        The regions of interest in the format of the "region_of_interest"
+        config section, with the coordinates as degree-minute-second strings
+
+    Returns
+    -------
+    regions : list
+        The regions as dicts with the keys "region_name", "province_or_territory",
+        "region_centre_lat", "region_centre_lon", and "region_radius"
+    """
+    validate_type(regions_of_interest, list, "regions_of_interest")
+
+    regions = [
+        {
+            "region_name": region_of_interest["region_name"],
+            "province_or_territory": region_of_interest["province_or_territory_name"],
+            "region_centre_lat": convert_coordinate_to_float(
+                coordinate=region_of_interest["region_centre_latitude"]
+            ),
+            "region_centre_lon": convert_coordinate_to_float(
+                coordinate=region_of_interest["region_centre_longitude"]
+            ),
+            "region_radius": float(region_of_interest["region_radius"]),
+        }
+        for region_of_interest in regions_of_interest
     ]
 
-    return filtered_nfdb_data
+    return regions
+
+
+def convert_config_month_to_int(
+    month,
+) -> int:
+    """
+    Convert a month of the config to int if it is a string
+
+    Parameters
+    ----------
+    month : str or int
+        The month as a string (see `convert_month_to_int`) or an integer
+
+    Returns
+    -------
+    int_month : int
+        The month as an integer
+    """
+    validate_type(month, (str, int), "month")
+
+    if isinstance(month, str):
+        return convert_month_to_int(month=month)
+
+    return month
+
+
+def create_nfdb_filter_arguments(
+    config: dict,
+    use_cache: bool = True,
+    rebuild_cache: bool = False,
+) -> dict:
+    """
+    Create the arguments of `filter_nfdb_data` from the configuration parameters
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    use_cache : bool, optional
+        Whether to read the data through the columnar cache. Default is True.
+    rebuild_cache : bool, optional
+        Whether to rebuild the columnar cache. Default is False.
+
+    Returns
+    -------
+    nfdb_filter_arguments : dict
+        The keyword arguments of `filter_nfdb_data`
+    """
+    validate_type(config, dict, "config")
+
+    region_of_interest = config["NFDB_data"]["region_of_interest"]
+    time_of_interest = config["NFDB_data"]["time_of_interest"]
+    nfdb_filter_arguments = {
+        "file_path": create_data_file_path(
+            data_package_dir=config["data_package_dir"],
+            file_name=config["NFDB_data"]["file_name"],
+        ),
+        "province_or_territory_column_name": region_of_interest["province_or_territory_column_name"],
+        "province_or_territory": region_of_interest["province_or_territory_name"],
+        "region_centre_latitude_column_name": region_of_interest["region_centre_latitude_column_name"],
+        "region_centre_lat": convert_coordinate_to_float(
+            coordinate=region_of_interest["region_centre_latitude"]
+        ),
+        "region_centre_longitude_column_name": region_of_interest["region_centre_longitude_column_name"],
+        "region_centre_lon": convert_coordinate_to_float(
+            coordinate=region_of_interest["region_centre_longitude"]
+        ),
+        "region_radius": float(region_of_interest["region_radius"]),
+        "region_radius_km": (
+            None if region_of_interest.get("region_radius_km") is None
+            else float(region_of_interest["region_radius_km"])
+        ),
+        "year_column": time_of_interest["year_column_name"],
+        "start_year": time_of_interest["start_year"],
+        "end_year": time_of_interest["end_year"],
+        "month_column": time_of_interest["month_column_name"],
+        "start_month": convert_config_month_to_int(time_of_interest["start_month"]),
+        "end_month": convert_config_month_to_int(time_of_interest["end_month"]),
+        "use_cache": use_cache,
+        "rebuild_cache": rebuild_cache,
+        "cache_dir": config.get("cache_dir"),
+        # only read the columns used in the analysis
+        "columns": [config["NFDB_data"]["fire_conditions"]["fire_size_column_name"]]
+        + config["NFDB_data"].get("additional_columns", []),
+        "column_dtypes": config["NFDB_data"].get("column_dtypes"),
+    }
+
+    return nfdb_filter_arguments
+
+
+def create_whitesands_f4_filter_arguments(
+    config: dict,
+    use_cache: bool = True,
+    rebuild_cache: bool = False,
+) -> dict:
+    """
+    Create the arguments of `filter_whitesands_f4_data` from the configuration parameters
+
+    Parameters
+    ----------
+    config : dict
+        The configuration parameters
+    use_cache : bool, optional
+        Whether to read the data through the columnar cache. Default is True.
+    rebuild_cache : bool, optional
+        Whether to rebuild the columnar cache. Default is False.
+
+    Returns
+    -------
+    whitesands_f4_filter_arguments : dict
+        The keyword arguments of `filter_whitesands_f4_data`
+    """
+    validate_type(config, dict, "config")
+
+    time_of_interest = config["Whitesands_F4_data"]["time_of_interest"]
+    whitesands_f4_filter_arguments = {
+        "file_path": create_data_file_path(
+            data_package_dir=config["data_package_dir"],
+            file_name=config["Whitesands_F4_data"]["file_name"],
+        ),
+        "date_column_name": time_of_interest["date_column_name"],
+        "start_year": time_of_interest["start_year"],
+        "end_year": time_of_interest["end_year"],
+        "start_month": convert_config_month_to_int(time_of_interest["start_month"]),
+        "end_month": convert_config_month_to_int(time_of_interest["end_month"]),
+        "use_cache": use_cache,
+        "rebuild_cache": rebuild_cache,
+        "cache_dir": config.get("cache_dir"),
+        "chunk_size": config["Whitesands_F4_data"].get("chunk_size"),
+        "column_dtypes": config["Whitesands_F4_data"].get("column_dtypes"),
+    }
+
+    return whitesands_f4_filter_arguments
+
+
+def run_function(
+    function,
+    function_arguments: dict,
+):
+    """
+    Run a function with keyword arguments
+
+    Parameters
+    ----------
+    function : callable
+        The function to run
+    function_arguments : dict
+        The keyword arguments of the function
+
+    Returns
+    -------
+    result : any
+        The result of the function
+    """
+    validate_type(function_arguments, dict, "function_arguments")
+
+    return function(**function_arguments)
+
+
+def run_tasks_concurrently(
+    tasks: dict,
+    use_processes: bool = True,
+    max_workers: int = None,
+) -> dict:
+    """
+    Run independent tasks concurrently and collect their results
+
+    Processes suit CPU-heavy tasks like filtering and parsing, while threads
+    are enough for tasks that mostly wait on file reads. The results are
+    returned in the order of the tasks, as in a sequential run.
+
+    Parameters
+    ----------
+    tasks : dict
+        The tasks as {task name: (function, keyword arguments)}
+    use_processes : bool, optional
+        Whether to run the tasks in a process pool instead of a thread pool.
+        Default is True.
+    max_workers : int, optional
+        The maximum number of workers. Default is None, which uses one worker
+        per task. If 1, the tasks run one after the other in the current process.
+
+    Returns
+    -------
+    results : dict
+        The results as {task name: result}
+    """
+    validate_type(tasks, dict, "tasks")
+    validate_type(use_processes, bool, "use_processes")
+    if max_workers is None:
+        max_workers = len(tasks)
+    validate_type(max_workers, int, "max_workers")
+
+    if max_workers <= 1:
+        return {
+            task_name: run_function(function, function_arguments)
+            for task_name, (function, function_arguments) in tasks.items()
+        }
+
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor_class(max_workers=max_workers) as executor:
+        futures = {
+            task_name: executor.submit(run_function, function, function_arguments)
+            for task_name, (function, function_arguments) in tasks.items()
+        }
+        results = {task_name: future.result() for task_name, future in futures.items()}
+
+    return results
 
 
 def validate_type(
@@ -638,16 +3589,299 @@ def validate_type(
         )
 
 
+def create_file_fingerprint(
+    file_path: str,
+) -> str:
+    """
+    Create a fingerprint of a data file from its path, size, and modification time
+
+    For shapefiles, the .dbf, .shx, and .prj sidecar files are included in
+    the fingerprint, since the attributes are stored in the .dbf file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the data file
+
+    Returns
+    -------
+    fingerprint : str
+        A short hexadecimal hash identifying the current version of the file
+    """
+    validate_type(file_path, str, "file_path")
+
+    file_paths = [file_path]
+    if file_path.lower().endswith(".shp"):
+        for extension in [".dbf", ".shx", ".prj"]:
+            sidecar_path = os.path.splitext(file_path)[0] + extension
+            if os.path.exists(sidecar_path):
+                file_paths.append(sidecar_path)
+
+    file_hash = hashlib.sha256()
+    for path in file_paths:
+        file_stat = os.stat(path)
+        file_hash.update(
+            f"{os.path.abspath(path)}|{file_stat.st_size}|{file_stat.st_mtime_ns}\n".encode()
+        )
+    fingerprint = file_hash.hexdigest()[:16]
+
+    return fingerprint
+
+
+def create_cache_file_path(
+    file_path: str,
+    cache_dir: str = None,
+) -> str:
+    """
+    Create the path to the columnar cache file of a data file
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the source data file
+    cache_dir : str, optional
+        The directory to store the cache files. Default is None, which uses
+        a `.wildfire_cache` folder next to the source data file.
+
+    Returns
+    -------
+    cache_file_path : str
+        The path to the GeoParquet/Parquet cache file
+    """
+    validate_type(file_path, str, "file_path")
+
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(file_path)), ".wildfire_cache")
+    validate_type(cache_dir, str, "cache_dir")
+
+    file_stem = os.path.splitext(os.path.basename(file_path))[0]
+    cache_file_path = os.path.join(
+        cache_dir,
+        f"{file_stem}_{create_file_fingerprint(file_path)}.parquet",
+    )
+
+    return cache_file_path
+
+
+def create_temporary_file_path(
+    file_path: str,
+) -> str:
+    """
+    Create a unique temporary file next to a file
+
+    Files are written to a temporary file first and then moved to their path,
+    so an interrupted run does not leave a truncated file behind. The name is
+    unique, so workers writing the same file do not write to the same
+    temporary file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file to be written
+
+    Returns
+    -------
+    temporary_file_path : str
+        The path to the empty temporary file in the directory of the file
+    """
+    validate_type(file_path, str, "file_path")
+
+    file_descriptor, temporary_file_path = tempfile.mkstemp(
+        prefix=os.path.basename(file_path) + ".",
+        suffix=".tmp",
+        dir=os.path.dirname(file_path) or ".",
+    )
+    os.close(file_descriptor)
+
+    return temporary_file_path
+
+
+def remove_stale_cache_files(
+    cache_file_path: str,
+    file_name_pattern: str,
+) -> int:
+    """
+    Remove the files next to a cache file whose names match a pattern
+
+    Only the names that fully match the pattern are removed, so the caches of
+    other source files whose names start with the same stem are kept.
+
+    Parameters
+    ----------
+    cache_file_path : str
+        The path to the current cache file, which is kept
+    file_name_pattern : str
+        The regular expression of the names of the stale files,
+        e.g. "Whitesands_F4_[0-9a-f]{16}\\.parquet"
+
+    Returns
+    -------
+    number_of_removed_files : int
+        The number of removed files
+    """
+    validate_type(cache_file_path, str, "cache_file_path")
+    validate_type(file_name_pattern, str, "file_name_pattern")
+
+    cache_dir = os.path.dirname(cache_file_path)
+    number_of_removed_files = 0
+    for file_name in os.listdir(cache_dir or "."):
+        if file_name == os.path.basename(cache_file_path) or re.fullmatch(file_name_pattern, file_name) is None:
+            continue
+        try:
+            os.remove(os.path.join(cache_dir, file_name))
+            number_of_removed_files += 1
+        except FileNotFoundError:
+            # another worker has removed it
+            pass
+
+    return number_of_removed_files
+
+
+@instrument_function
+def write_cache_file(
+    data_df: pd.DataFrame,
+    cache_file_path: str,
+) -> bool:
+    """
+    Write a DataFrame or GeoDataFrame to a columnar cache file
+
+    Older cache files of the same source file are removed. If the cache cannot
+    be written (e.g. pyarrow is not installed, or a column mixes numbers and
+    strings), a message is printed and the data is left uncached.
+
+    Parameters
+    ----------
+    data_df : DataFrame or GeoDataFrame
+        The data to be cached
+    cache_file_path : str
+        The path to the cache file (see `create_cache_file_path`)
+
+    Returns
+    -------
+    is_cached : bool
+        True if the cache file was written
+    """
+    validate_type(data_df, pd.DataFrame, "data_df")
+    validate_type(cache_file_path, str, "cache_file_path")
+
+    # <file stem>_<fingerprint>.parquet
+    file_stem = os.path.basename(cache_file_path).rsplit("_", 1)[0]
+    temporary_cache_file_path = None
+    try:
+        os.makedirs(os.path.dirname(cache_file_path), exist_ok=True)
+        temporary_cache_file_path = create_temporary_file_path(cache_file_path)
+        data_df.to_parquet(temporary_cache_file_path, index=False, row_group_size=65536)
+        os.replace(temporary_cache_file_path, cache_file_path)
+    # pyarrow raises ValueError and TypeError subclasses for unsupported columns
+    except (ImportError, OSError, ValueError, TypeError) as error:
+        print(f"Failed to write the cache file {cache_file_path}: {error}")
+        if temporary_cache_file_path is not None and os.path.exists(temporary_cache_file_path):
+            os.remove(temporary_cache_file_path)
+        return False
+
+    remove_stale_cache_files(cache_file_path, re.escape(file_stem) + r"_[0-9a-f]{16}\.parquet")
+
+    return True
+
+
+def create_sql_where_clause(
+    filters: list,
+) -> str:
+    """
+    Create an SQL WHERE clause from a list of attribute filters
+
+    Parameters
+    ----------
+    filters : list
+        A list of (column name, operator, value) tuples combined with AND.
+        The operator should be one of "==", "!=", "<", "<=", ">", ">=", "in",
+        with a list of values for "in".
+
+    Returns
+    -------
+    where_clause : str
+        The SQL WHERE clause (without the WHERE keyword)
+    """
+    validate_type(filters, list, "filters")
+
+    sql_operators = {"==": "=", "!=": "<>", "<": "<", "<=": "<=", ">": ">", ">=": ">=", "in": "IN"}
+    conditions = []
+    for column_name, operator, value in filters:
+        if operator not in sql_operators:
+            raise ValueError(
+                f"The filter operator should be one of {list(sql_operators)} not {operator}."
+            )
+        if operator == "in":
+            validate_type(value, list, "in filter values")
+            value = "(" + ", ".join(create_sql_literal(item) for item in value) + ")"
+        else:
+            value = create_sql_literal(value)
+        conditions.append(f'"{column_name}" {sql_operators[operator]} {value}')
+    where_clause = " AND ".join(conditions)
+
+    return where_clause
+
+
+def create_sql_literal(
+    value,
+) -> str:
+    """
+    Create an SQL literal of a filter value
+
+    Parameters
+    ----------
+    value : str, int, or float
+        The filter value
+
+    Returns
+    -------
+    sql_literal : str
+        The value as an SQL literal, with strings quoted
+    """
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+
+    return str(value)
+
+
+@instrument_function
 def read_vector_file_into_gdf(
-    file_path: str
+    file_path: str,
+    use_cache: bool = True,
+    rebuild_cache: bool = False,
+    cache_dir: str = None,
+    columns: list = None,
+    filters: list = None,
 ) -> gpd.GeoDataFrame:
     """
     Read a vector file into a GeoDataFrame
 
+    The first read of a file is converted to a GeoParquet cache keyed on the
+    file path, size, and modification time. Later reads load from the cache,
+    which is much faster than parsing the shapefile again.
+
+    The columns and attribute filters are pushed down into the read, either as
+    row-group filters on the cache or as a WHERE clause to the vector driver,
+    so that only the rows and columns of interest are materialised.
+
     Parameters
     ----------
     file_path : str
         The path to the vector file
+    use_cache : bool, optional
+        Whether to read from and write to the columnar cache. Default is True.
+    rebuild_cache : bool, optional
+        Whether to ignore an existing cache and build it again. Default is False.
+    cache_dir : str, optional
+        The directory to store the cache files. Default is None, which uses
+        a `.wildfire_cache` folder next to the vector file.
+    columns : list, optional
+        The attribute columns to read. The geometry is always read.
+        Default is None, which reads all columns.
+    filters : list, optional
+        A list of (column name, operator, value) tuples combined with AND,
+        e.g. [("YEAR", ">=", 2010)] or [("SRC_AGENCY", "in", ["AB", "BC"])].
+        Default is None, which reads all rows.
 
     Returns
     -------
@@ -655,8 +3889,94 @@ def read_vector_file_into_gdf(
         The data in the vector file as a GeoDataFrame
     """
     validate_type(file_path, str, "file_path")
+    validate_type(use_cache, bool, "use_cache")
+    validate_type(rebuild_cache, bool, "rebuild_cache")
+    if columns is not None:
+        validate_type(columns, list, "columns")
+    if filters is not None:
+        validate_type(filters, list, "filters")
+
+    if use_cache:
+        cache_file_path = create_cache_file_path(file_path, cache_dir)
+        is_cached = os.path.exists(cache_file_path) and not rebuild_cache
+        if not is_cached:
+            is_cached = write_cache_file(gpd.read_file(file_path), cache_file_path)
+        if is_cached:
+            # the geometry column of the cache is always called "geometry"
+            data_gdf = gpd.read_parquet(
+                cache_file_path,
+                columns=None if columns is None else columns + ["geometry"],
+                filters=filters or None,
+            )
+            return data_gdf
 
     # read in the data
-    data_gdf = gpd.read_file(file_path)
+    data_gdf = gpd.read_file(
+        file_path,
+        columns=columns,
+        where=create_sql_where_clause(filters) if filters else None,
+    )
 
     return data_gdf
+
+
+@instrument_function
+def read_csv_file_into_df(
+    file_path: str,
+    use_cache: bool = True,
+    rebuild_cache: bool = False,
+    cache_dir: str = None,
+    columns: list = None,
+    filters: list = None,
+) -> pd.DataFrame:
+    """
+    Read a CSV file into a DataFrame
+
+    The first read of a file is converted to a Parquet cache keyed on the
+    file path, size, and modification time. Later reads load from the cache.
+    The columns are always pushed down into the read, and the filters only
+    when reading from the cache.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the CSV file
+    use_cache : bool, optional
+        Whether to read from and write to the columnar cache. Default is True.
+    rebuild_cache : bool, optional
+        Whether to ignore an existing cache and build it again. Default is False.
+    cache_dir : str, optional
+        The directory to store the cache files. Default is None, which uses
+        a `.wildfire_cache` folder next to the CSV file.
+    columns : list, optional
+        The columns to read. Default is None, which reads all columns.
+    filters : list, optional
+        A list of (column name, operator, value) tuples combined with AND,
+        applied as row-group filters on the cache. Default is None.
+
+    Returns
+    -------
+    data_df : DataFrame
+        The data in the CSV file as a DataFrame
+    """
+    validate_type(file_path, str, "file_path")
+    validate_type(use_cache, bool, "use_cache")
+    validate_type(rebuild_cache, bool, "rebuild_cache")
+    if columns is not None:
+        validate_type(columns, list, "columns")
+    if filters is not None:
+        validate_type(filters, list, "filters")
+
+    if not use_cache:
+        return pd.read_csv(file_path, usecols=columns)
+
+    cache_file_path = create_cache_file_path(file_path, cache_dir)
+    if rebuild_cache or not os.path.exists(cache_file_path):
+        # read in the data
+        data_df = pd.read_csv(file_path)
+        if not write_cache_file(data_df, cache_file_path):
+            return data_df if columns is None else data_df[columns]
+
+    data_df = pd.read_parquet(cache_file_path, columns=columns, filters=filters or None)
+
+    return data_df
@@ -0,0 +1,599 @@
+import json
+import time
+import threading
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+from wildfire_processing_functions import (
+    validate_type,
+    apply_query,
+    create_nfdb_query,
+    create_whitesands_f4_query,
+    aggregate_nfdb_data,
+    aggregate_whitesands_f4_data,
+    aggregate_wind_rose,
+)
+from wildfire_parameter_sweep import (
+    apply_config_overrides,
+    create_sweep_filter_arguments,
+    load_sweep_data,
+    SWEEP_FIXED_ARGUMENT_NAMES,
+)
+from wildfire_spatial_index import (
+    create_spatial_index,
+    load_nfdb_spatial_index,
+    query_spatial_index_bbox,
+)
+
+
+# the POST endpoints of the query service
+QUERY_ENDPOINTS = ["/filter", "/aggregate", "/large_fires"]
+
+# the number of latest request latencies the percentiles are calculated from
+LATENCY_WINDOW_SIZE = 10000
+
+
+def create_query_service_state(
+    config: dict,
+    cache_size_mb: float = 64.0,
+    use_cache: bool = True,
+    rebuild_cache: bool = False,
+) -> dict:
+    """
+    Load the NFDB and Whitesands F4 data once and index them for the query service
+
+    The NFDB points are indexed on a latitude/longitude grid, so a query only
+    filters the fires of the cells around its region. With the columnar cache
+    the index is persisted next to the cache (see `load_nfdb_spatial_index`),
+    so a restart of the service does not rebuild it. The Whitesands F4 rows
+    are sorted by year, so a query only filters the rows of its years.
+
+    Parameters
+    ----------
+    config : dict
+        The base configuration parameters. The queries override its values.
+    cache_size_mb : float, optional
+        The maximum size of the cached responses in MB. Default is 64.0.
+    use_cache : bool, optional
+        Whether to read the data through the columnar cache. Default is True.
+    rebuild_cache : bool, optional
+        Whether to rebuild the columnar cache. Default is False.
+
+    Returns
+    -------
+    service_state : dict
+        The config, the data and its indexes, the result cache, and the
+        latency and cache metrics of the service
+    """
+    validate_type(config, dict, "config")
+    validate_type(cache_size_mb, (int, float), "cache_size_mb")
+
+    sweep_data = load_sweep_data(config, use_cache=use_cache, rebuild_cache=rebuild_cache)
+    nfdb_arguments = create_sweep_filter_arguments(config)["NFDB"]
+    nfdb_data = sweep_data["NFDB"].reset_index(drop=True)
+    whitesands_f4_data = sweep_data["Whitesands F4"].sort_values("year", kind="stable").reset_index(drop=True)
+    # the resident NFDB data holds every row of the file, so the positions of
+    # the persisted index of the file are its row positions
+    latitude_column_name = nfdb_arguments["region_centre_latitude_column_name"]
+    longitude_column_name = nfdb_arguments["region_centre_longitude_column_name"]
+    if use_cache:
+        nfdb_spatial_index = load_nfdb_spatial_index(
+            nfdb_arguments["file_path"],
+            latitude_column_name=latitude_column_name,
+            longitude_column_name=longitude_column_name,
+            rebuild_index=rebuild_cache,
+            cache_dir=config.get("cache_dir"),
+        )
+    if not use_cache or len(nfdb_spatial_index["latitudes"]) != len(nfdb_data):
+        nfdb_spatial_index = create_spatial_index(
+            nfdb_data[latitude_column_name].to_numpy(dtype=float),
+            nfdb_data[longitude_column_name].to_numpy(dtype=float),
+        )
+
+    service_state = {
+        "config": config,
+        "nfdb_data": nfdb_data,
+        "nfdb_spatial_index": nfdb_spatial_index,
+        "whitesands_f4_data": whitesands_f4_data,
+        "whitesands_f4_years": whitesands_f4_data["year"].to_numpy(),
+        "result_cache": OrderedDict(),
+        "result_cache_size": 0,
+        "max_result_cache_size": int(cache_size_mb * 1024 ** 2),
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "cache_evictions": 0,
+        "latencies": {endpoint: deque(maxlen=LATENCY_WINDOW_SIZE) for endpoint in QUERY_ENDPOINTS},
+        "lock": threading.Lock(),
+    }
+
+    return service_state
+
+
+def create_query_config(
+    service_state: dict,
+    overrides: dict,
+) -> dict:
+    """
+    Create the config of a query from the overrides of the base config
+
+    Parameters
+    ----------
+    service_state : dict
+        The output of `create_query_service_state`
+    overrides : dict
+        The new values as {dotted key: value} (see `apply_config_overrides`)
+
+    Returns
+    -------
+    query_config : dict
+        The config of the query
+    """
+    validate_type(overrides, dict, "overrides")
+
+    query_config = apply_config_overrides(service_state["config"], overrides)
+    base_filter_arguments = create_sweep_filter_arguments(service_state["config"])
+    query_filter_arguments = create_sweep_filter_arguments(query_config)
+    # the resident data was loaded with the files and columns of the base config
+    for data_name, argument_names in SWEEP_FIXED_ARGUMENT_NAMES.items():
+        for argument_name in argument_names:
+            if query_filter_arguments[data_name][argument_name] != base_filter_arguments[data_name][argument_name]:
+                raise ValueError(f"The {data_name} {argument_name} of the service cannot be overridden.")
+
+    return query_config
+
+
+def find_query_filter_value(
+    query: dict,
+    column_name: str,
+    operator: str,
+):
+    """
+    Find the value of a filter of a query
+
+    Parameters
+    ----------
+    query : dict
+        The query plan (see `create_query`)
+    column_name : str
+        The name of the filtered column
+    operator : str
+        The operator of the filter
+
+    Returns
+    -------
+    value : any
+        The value of the first matching filter
+    """
+    return next(
+        value for filter_column_name, filter_operator, value in query["filters"]
+        if filter_column_name == column_name and filter_operator == operator
+    )
+
+
+def filter_resident_nfdb_data(
+    service_state: dict,
+    query_config: dict,
+) -> pd.DataFrame:
+    """
+    Filter the resident NFDB data like `filter_nfdb_data`
+
+    The spatial index narrows the fires to the latitude/longitude box of the
+    query before the query mask is applied.
+
+    Parameters
+    ----------
+    service_state : dict
+        The output of `create_query_service_state`
+    query_config : dict
+        The config of the query
+
+    Returns
+    -------
+    filtered_nfdb_data : GeoDataFrame
+        The filtered NFDB data
+    """
+    nfdb_arguments = create_sweep_filter_arguments(query_config)["NFDB"]
+    nfdb_query = create_nfdb_query(**nfdb_arguments)
+    latitude_column_name = nfdb_arguments["region_centre_latitude_column_name"]
+    longitude_column_name = nfdb_arguments["region_centre_longitude_column_name"]
+    candidate_positions = query_spatial_index_bbox(
+        service_state["nfdb_spatial_index"],
+        min_lat=find_query_filter_value(nfdb_query, latitude_column_name, ">="),
+        max_lat=find_query_filter_value(nfdb_query, latitude_column_name, "<="),
+        min_lon=find_query_filter_value(nfdb_query, longitude_column_name, ">="),
+        max_lon=find_query_filter_value(nfdb_query, longitude_column_name, "<="),
+    )
+    filtered_nfdb_data = apply_query(service_state["nfdb_data"].iloc[candidate_positions], nfdb_query)
+
+    return filtered_nfdb_data
+
+
+def filter_resident_whitesands_f4_data(
+    service_state: dict,
+    query_config: dict,
+) -> pd.DataFrame:
+    """
+    Filter the resident Whitesands F4 data like `filter_whitesands_f4_data`
+
+    The rows of the years of the query are one slice of the year-sorted data.
+
+    Parameters
+    ----------
+    service_state : dict
+        The output of `create_query_service_state`
+    query_config : dict
+        The config of the query
+
+    Returns
+    -------
+    filtered_whitesands_f4_data : DataFrame
+        The filtered Whitesands F4 data
+    """
+    whitesands_f4_arguments = create_sweep_filter_arguments(query_config)["Whitesands F4"]
+    whitesands_f4_query = create_whitesands_f4_query(**whitesands_f4_arguments)
+    first_row = np.searchsorted(service_state["whitesands_f4_years"], whitesands_f4_arguments["start_year"], side="left")
+    last_row = np.searchsorted(service_state["whitesands_f4_years"], whitesands_f4_arguments["end_year"], side="right")
+    # the year and month columns were derived when the data was loaded
+    filtered_whitesands_f4_data = apply_query(
+        service_state["whitesands_f4_data"].iloc[first_row:last_row],
+        {**whitesands_f4_query, "date_column_name": None},
+    )
+
+    return filtered_whitesands_f4_data
+
+
+def run_query(
+    service_state: dict,
+    endpoint: str,
+    parameters: dict,
+) -> dict:
+    """
+    Answer a query of the service
+
+    Parameters
+    ----------
+    service_state : dict
+        The output of `create_query_service_state`
+    endpoint : str
+        The endpoint of the query, one of "/filter", "/aggregate", and "/large_fires"
+    parameters : dict
+        The parameters of the query with the config "overrides". A "/filter"
+        query also takes the "dataset" ("nfdb" or "whitesands_f4") and the
+        "limit" of the returned rows (default 1000).
+
+    Returns
+    -------
+    query_result : dict
+        The result of the query
+    """
+    validate_type(parameters, dict, "parameters")
+
+    query_config = create_query_config(service_state, parameters.get("overrides", {}))
+
+    if endpoint == "/filter":
+        dataset = parameters.get("dataset", "nfdb")
+        limit = parameters.get("limit", 1000)
+        validate_type(limit, int, "limit")
+        if dataset == "nfdb":
+            filtered_data = filter_resident_nfdb_data(service_state, query_config)
+            filtered_data = pd.DataFrame(filtered_data.drop(columns=filtered_data.geometry.name))
+        elif dataset == "whitesands_f4":
+            filtered_data = filter_resident_whitesands_f4_data(service_state, query_config)
+        else:
+            raise ValueError(f"The dataset should be nfdb or whitesands_f4 not {dataset}.")
+        query_result = {
+            "number_of_rows": len(filtered_data),
+            "rows": filtered_data.head(limit).to_dict(orient="records"),
+        }
+    elif endpoint == "/aggregate":
+        filtered_whitesands_f4_data = filter_resident_whitesands_f4_data(service_state, query_config)
+        weather_data_config = query_config["Whitesands_F4_data"]["weather_data"]
+        query_result = {
+            "nfdb": aggregate_nfdb_data(
+                filter_resident_nfdb_data(service_state, query_config),
+                year_column=query_config["NFDB_data"]["time_of_interest"]["year_column_name"],
+                month_column=query_config["NFDB_data"]["time_of_interest"]["month_column_name"],
+                fire_size_column=query_config["NFDB_data"]["fire_conditions"]["fire_size_column_name"],
+                min_fire_size=query_config["NFDB_data"]["fire_conditions"]["min_fire_size"],
+            ).to_dict(orient="records"),
+            "whitesands_f4": aggregate_whitesands_f4_data(
+                filtered_whitesands_f4_data,
+                wind_direction_column_name=weather_data_config["wind_direction_column_name"],
+            ).to_dict(orient="records"),
+            "wind_rose": aggregate_wind_rose(
+                filtered_whitesands_f4_data,
+                wind_direction_column_name=weather_data_config["wind_direction_column_name"],
+                wind_speed_column_name=weather_data_config["wind_speed_column_name"],
+                number_of_sectors=query_config["Whitesands_F4_data"].get("wind_rose", {}).get("number_of_sectors", 8),
+                speed_class_edges=query_config["Whitesands_F4_data"].get("wind_rose", {}).get("speed_class_edges"),
+            ).to_dict(orient="records"),
+        }
+    elif endpoint == "/large_fires":
+        nfdb_summary = aggregate_nfdb_data(
+            filter_resident_nfdb_data(service_state, query_config),
+            year_column=query_config["NFDB_data"]["time_of_interest"]["year_column_name"],
+            month_column=query_config["NFDB_data"]["time_of_interest"]["month_column_name"],
+            fire_size_column=query_config["NFDB_data"]["fire_conditions"]["fire_size_column_name"],
+            min_fire_size=query_config["NFDB_data"]["fire_conditions"]["min_fire_size"],
+        )
+        query_result = {
+            "min_fire_size": query_config["NFDB_data"]["fire_conditions"]["min_fire_size"],
+            "number_of_large_fires": int(nfdb_summary["number_of_large_fires"].sum()),
+            "large_fires_by_year_and_month": nfdb_summary[
+                nfdb_summary["number_of_large_fires"] > 0
+            ].to_dict(orient="records"),
+        }
+    else:
+        raise ValueError(f"The endpoint should be one of {QUERY_ENDPOINTS} not {endpoint}.")
+
+    return query_result
+
+
+def read_cached_response(
+    service_state: dict,
+    cache_key: str,
+) -> bytes:
+    """
+    Read a response from the LRU result cache and mark it as recently used
+
+    Parameters
+    ----------
+    service_state : dict
+        The output of `create_query_service_state`
+    cache_key : str
+        The endpoint and the canonical JSON parameters of the query
+
+    Returns
+    -------
+    response : bytes or None
+        The cached response, or None if the query is not cached
+    """
+    with service_state["lock"]:
+        response = service_state["result_cache"].get(cache_key)
+        if response is None:
+            service_state["cache_misses"] += 1
+        else:
+            service_state["cache_hits"] += 1
+            service_state["result_cache"].move_to_end(cache_key)
+
+    return response
+
+
+def write_cached_response(
+    service_state: dict,
+    cache_key: str,
+    response: bytes,
+) -> None:
+    """
+    Write a response to the LRU result cache, evicting the least recently used
+    responses until the cache fits in its maximum size
+
+    Responses larger than the whole cache are not cached.
+
+    Parameters
+    ----------
+    service_state : dict
+        The output of `create_query_service_state`
+    cache_key : str
+        The endpoint and the canonical JSON parameters of the query
+    response : bytes
+        The encoded response
+    """
+    if len(response) > service_state["max_result_cache_size"]:
+        return
+
+    with service_state["lock"]:
+        result_cache = service_state["result_cache"]
+        if cache_key in result_cache:
+            service_state["result_cache_size"] -= len(result_cache.pop(cache_key))
+        result_cache[cache_key] = response
+        service_state["result_cache_size"] += len(response)
+        while service_state["result_cache_size"] > service_state["max_result_cache_size"]:
+            _, evicted_response = result_cache.popitem(last=False)
+            service_state["result_cache_size"] -= len(evicted_response)
+            service_state["cache_evictions"] += 1
+
+
+def create_service_metrics(
+    service_state: dict,
+) -> dict:
+    """
+    Create the latency and cache metrics of the service
+
+    Parameters
+    ----------
+    service_state : dict
+        The output of `create_query_service_state`
+
+    Returns
+    -------
+    service_metrics : dict
+        The number of requests and the p50 and p99 latencies in ms of each
+        endpoint, and the hits, misses, evictions, entries, and size of the
+        result cache
+    """
+    with service_state["lock"]:
+        latencies = {endpoint: list(latencies) for endpoint, latencies in service_state["latencies"].items()}
+        service_metrics = {
+            "endpoints": {
+                endpoint: {
+                    "number_of_requests": len(endpoint_latencies),
+                    "p50_latency_ms": float(np.percentile(endpoint_latencies, 50)) if endpoint_latencies else None,
+                    "p99_latency_ms": float(np.percentile(endpoint_latencies, 99)) if endpoint_latencies else None,
+                }
+                for endpoint, endpoint_latencies in latencies.items()
+            },
+            "result_cache": {
+                "hits": service_state["cache_hits"],
+                "misses": service_state["cache_misses"],
+                "evictions": service_state["cache_evictions"],
+                "entries": len(service_state["result_cache"]),
+                "size_mb": service_state["result_cache_size"] / 1024 ** 2,
+                "max_size_mb": service_state["max_result_cache_size"] / 1024 ** 2,
+            },
+        }
+
+    return service_metrics
+
+
+def replace_json_nan(
+    value,
+):
+    """
+    Replace the missing and infinite values of a response with None
+
+    NaN and infinity are not valid JSON, so they are returned as null.
+
+    Parameters
+    ----------
+    value
+        The response or a value of it
+
+    Returns
+    -------
+    json_value
+        The value with the missing and infinite numbers replaced by None
+    """
+    if isinstance(value, dict):
+        return {key: replace_json_nan(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [replace_json_nan(item) for item in value]
+    if isinstance(value, (float, np.floating)):
+        return float(value) if np.isfinite(value) else None
+    if isinstance(value, np.integer):
+        return int(value)
+    if value is pd.NA or value is pd.NaT:
+        return None
+
+    return value
+
+
+def encode_json_response(
+    response_body: dict,
+) -> bytes:
+    """
+    Encode a response as JSON, with dates and other values as strings and missing values as null
+
+    Parameters
+    ----------
+    response_body : dict
+        The response
+
+    Returns
+    -------
+    response : bytes
+        The UTF-8 encoded JSON response
+    """
+    return json.dumps(replace_json_nan(response_body), default=str, allow_nan=False).encode("utf-8")
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handle the HTTP requests of the query service
+
+    GET /health and GET /metrics report the state of the service. POST
+    /filter, /aggregate, and /large_fires take a JSON body with the config
+    "overrides" of the query (see `run_query`).
+    """
+
+    def send_json_response(self, status_code: int, response: bytes) -> None:
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def do_GET(self) -> None:
+        service_state = self.server.service_state
+        if self.path == "/health":
+            self.send_json_response(200, encode_json_response({"status": "ok"}))
+        elif self.path == "/metrics":
+            self.send_json_response(200, encode_json_response(create_service_metrics(service_state)))
+        else:
+            self.send_json_response(404, encode_json_response({"error": f"Unknown endpoint {self.path}."}))
+
+    def do_POST(self) -> None:
+        service_state = self.server.service_state
+        if self.path not in QUERY_ENDPOINTS:
+            self.send_json_response(404, encode_json_response({"error": f"Unknown endpoint {self.path}."}))
+            return
+
+        start_time = time.perf_counter()
+        try:
+            parameters = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            validate_type(parameters, dict, "parameters")
+            cache_key = self.path + json.dumps(parameters, sort_keys=True)
+            response = read_cached_response(service_state, cache_key)
+            if response is None:
+                response = encode_json_response(run_query(service_state, self.path, parameters))
+                write_cached_response(service_state, cache_key, response)
+            status_code = 200
+        except (ValueError, TypeError, KeyError) as error:
+            response = encode_json_response({"error": str(error)})
+            status_code = 400
+        except Exception as error:
+            # any other failure is a bug of the service, which keeps serving
+            print(f"The {self.path} query failed: {error!r} \n")
+            response = encode_json_response({"error": f"Internal error: {error}"})
+            status_code = 500
+        try:
+            self.send_json_response(status_code, response)
+        finally:
+            with service_state["lock"]:
+                service_state["latencies"][self.path].append((time.perf_counter() - start_time) * 1000)
+
+    def log_message(self, format: str, *args) -> None:
+        # the latencies are reported by /metrics instead of a log line per request
+        pass
+
+
+def run_query_service(
+    config: dict,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    cache_size_mb: float = 64.0,
+    use_cache: bool = True,
+    rebuild_cache: bool = False,
+) -> None:
+    """
+    Load the data once and answer queries over HTTP until interrupted
+
+    Parameters
+    ----------
+    config : dict
+        The base configuration parameters. The queries override its values.
+    host : str, optional
+        The host to listen on. Default is "127.0.0.1", which only accepts
+        local connections.
+    port : int, optional
+        The port to listen on. Default is 8765.
+    cache_size_mb : float, optional
+        The maximum size of the cached responses in MB. Default is 64.0.
+    use_cache : bool, optional
+        Whether to read the data through the columnar cache. Default is True.
+    rebuild_cache : bool, optional
+        Whether to rebuild the columnar cache. Default is False.
+    """
+    validate_type(host, str, "host")
+    validate_type(port, int, "port")
+
+    service_state = create_query_service_state(
+        config,
+        cache_size_mb=cache_size_mb,
+        use_cache=use_cache,
+        rebuild_cache=rebuild_cache,
+    )
+    server = ThreadingHTTPServer((host, port), QueryRequestHandler)
+    server.service_state = service_state
+    print(
+        f"The query service is listening on http://{host}:{server.server_address[1]} with"
+        f" {len(service_state['nfdb_data'])} NFDB rows and"
+        f" {len(service_state['whitesands_f4_data'])} Whitesands F4 rows in memory. \n"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,420 @@
+import os
+import re
+import hashlib
+import numpy as np
+from wildfire_instrumentation import instrument_function
+from wildfire_processing_functions import (
+    validate_type,
+    calculate_great_circle_distance_km,
+    create_great_circle_bounds,
+    create_cache_file_path,
+    create_temporary_file_path,
+    remove_stale_cache_files,
+    read_vector_file_into_gdf,
+)
+
+
+# the suffix of the spatial index files stored next to the columnar cache files
+SPATIAL_INDEX_FILE_SUFFIX = ".sindex.npz"
+
+
+@instrument_function
+def create_spatial_index(
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    cell_size: float = 0.1,
+) -> dict:
+    """
+    Create a grid index of points for box, radius, and nearest neighbour queries
+
+    The points are bucketed into square latitude/longitude cells and sorted by
+    cell, so the points of a row of cells form one contiguous slice. Points
+    with missing coordinates are left out of the index.
+
+    Parameters
+    ----------
+    latitudes : numpy.ndarray
+        The latitudes of the points in degrees
+    longitudes : numpy.ndarray
+        The longitudes of the points in degrees
+    cell_size : float, optional
+        The size of the grid cells in degrees. Default is 0.1.
+
+    Returns
+    -------
+    spatial_index : dict
+        The index arrays. The query results are positions in `latitudes`.
+    """
+    validate_type(latitudes, np.ndarray, "latitudes")
+    validate_type(longitudes, np.ndarray, "longitudes")
+    validate_type(cell_size, float, "cell_size")
+    if len(latitudes) != len(longitudes):
+        raise ValueError("The latitudes and longitudes should have the same length.")
+    if cell_size <= 0:
+        raise ValueError(f"The cell_size should be positive not {cell_size}.")
+
+    latitudes = latitudes.astype(np.float64)
+    longitudes = longitudes.astype(np.float64)
+    positions = np.flatnonzero(~(np.isnan(latitudes) | np.isnan(longitudes)))
+    if len(positions) > 0:
+        min_lat = np.floor(latitudes[positions].min() / cell_size) * cell_size
+        min_lon = np.floor(longitudes[positions].min() / cell_size) * cell_size
+        number_of_rows = int((latitudes[positions].max() - min_lat) // cell_size) + 1
+        number_of_columns = int((longitudes[positions].max() - min_lon) // cell_size) + 1
+    else:
+        min_lat, min_lon, number_of_rows, number_of_columns = 0.0, 0.0, 1, 1
+
+    cell_ids = (
+        np.minimum(((latitudes[positions] - min_lat) // cell_size).astype(np.int64), number_of_rows - 1)
+        * number_of_columns
+        + np.minimum(((longitudes[positions] - min_lon) // cell_size).astype(np.int64), number_of_columns - 1)
+    )
+    cell_order = np.argsort(cell_ids, kind="stable")
+    sorted_positions = positions[cell_order]
+
+    spatial_index = {
+        "latitudes": latitudes,
+        "longitudes": longitudes,
+        "sorted_positions": sorted_positions,
+        # the sorted_positions of cell i are sorted_positions[cell_starts[i]:cell_starts[i + 1]]
+        "cell_starts": np.searchsorted(
+            cell_ids[cell_order], np.arange(number_of_rows * number_of_columns + 1)
+        ),
+        "grid": np.array([cell_size, min_lat, min_lon, number_of_rows, number_of_columns]),
+    }
+
+    return spatial_index
+
+
+def create_spatial_index_file_path(
+    file_path: str,
+    latitude_column_name: str,
+    longitude_column_name: str,
+    cell_size: float,
+    cache_dir: str = None,
+) -> str:
+    """
+    Create the path to the spatial index file of a data file
+
+    The index file is stored next to the columnar cache file and is keyed on
+    the same fingerprint of the data file, so it is rebuilt when the file changes.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the source data file
+    latitude_column_name : str
+        The name of the latitude column
+    longitude_column_name : str
+        The name of the longitude column
+    cell_size : float
+        The size of the grid cells in degrees
+    cache_dir : str, optional
+        The directory to store the cache files. Default is None, which uses
+        a `.wildfire_cache` folder next to the source data file.
+
+    Returns
+    -------
+    spatial_index_file_path : str
+        The path to the spatial index file
+    """
+    validate_type(latitude_column_name, str, "latitude_column_name")
+    validate_type(longitude_column_name, str, "longitude_column_name")
+    validate_type(cell_size, float, "cell_size")
+
+    index_key = hashlib.sha256(
+        f"{latitude_column_name}|{longitude_column_name}|{cell_size!r}".encode()
+    ).hexdigest()[:8]
+    spatial_index_file_path = (
+        os.path.splitext(create_cache_file_path(file_path, cache_dir))[0]
+        + f"_{index_key}{SPATIAL_INDEX_FILE_SUFFIX}"
+    )
+
+    return spatial_index_file_path
+
+
+@instrument_function
+def write_spatial_index(
+    spatial_index: dict,
+    spatial_index_file_path: str,
+) -> None:
+    """
+    Write a spatial index to a file and remove the index files of older versions of its data file
+
+    Parameters
+    ----------
+    spatial_index : dict
+        The output of `create_spatial_index`
+    spatial_index_file_path : str
+        The path to the spatial index file (see `create_spatial_index_file_path`)
+    """
+    validate_type(spatial_index, dict, "spatial_index")
+    validate_type(spatial_index_file_path, str, "spatial_index_file_path")
+
+    # <file stem>_<fingerprint>_<index key>.sindex.npz
+    file_stem, fingerprint, _ = os.path.basename(spatial_index_file_path)[
+        :-len(SPATIAL_INDEX_FILE_SUFFIX)
+    ].rsplit("_", 2)
+    temporary_file_path = None
+    try:
+        os.makedirs(os.path.dirname(spatial_index_file_path), exist_ok=True)
+        temporary_file_path = create_temporary_file_path(spatial_index_file_path)
+        with open(temporary_file_path, "wb") as f:
+            np.savez(f, **spatial_index)
+        os.replace(temporary_file_path, spatial_index_file_path)
+    except OSError as error:
+        print(f"Failed to write the spatial index file {spatial_index_file_path}: {error}")
+        if temporary_file_path is not None and os.path.exists(temporary_file_path):
+            os.remove(temporary_file_path)
+        return
+
+    # the indexes of the current data file with other columns or cell sizes are kept
+    remove_stale_cache_files(
+        spatial_index_file_path,
+        re.escape(file_stem) + f"_(?!{fingerprint}_)[0-9a-f]{{16}}_[0-9a-f]{{8}}" + re.escape(SPATIAL_INDEX_FILE_SUFFIX),
+    )
+
+
+def read_spatial_index(
+    spatial_index_file_path: str,
+) -> dict:
+    """
+    Read a spatial index written by `write_spatial_index`
+
+    Parameters
+    ----------
+    spatial_index_file_path : str
+        The path to the spatial index file
+
+    Returns
+    -------
+    spatial_index : dict
+        The index arrays (see `create_spatial_index`)
+    """
+    validate_type(spatial_index_file_path, str, "spatial_index_file_path")
+
+    with np.load(spatial_index_file_path) as index_file:
+        spatial_index = {array_name: index_file[array_name] for array_name in index_file.files}
+
+    return spatial_index
+
+
+@instrument_function
+def load_nfdb_spatial_index(
+    file_path: str,
+    latitude_column_name: str = "LATITUDE",
+    longitude_column_name: str = "LONGITUDE",
+    cell_size: float = 0.1,
+    rebuild_index: bool = False,
+    cache_dir: str = None,
+) -> dict:
+    """
+    Load the spatial index of the NFDB fires, building and persisting it on first use
+
+    The query results of the index are row positions in the full NFDB data,
+    as returned by `read_vector_file_into_gdf(file_path)` without filters.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the NFDB data
+    latitude_column_name : str, optional
+        The name of the latitude column. Default is "LATITUDE".
+    longitude_column_name : str, optional
+        The name of the longitude column. Default is "LONGITUDE".
+    cell_size : float, optional
+        The size of the grid cells in degrees. Default is 0.1.
+    rebuild_index : bool, optional
+        Whether to ignore an existing index file and build it again. Default is False.
+    cache_dir : str, optional
+        The directory to store the cache and index files. Default is None,
+        which uses a `.wildfire_cache` folder next to the data file.
+
+    Returns
+    -------
+    spatial_index : dict
+        The index arrays (see `create_spatial_index`)
+    """
+    validate_type(file_path, str, "NFDB data path")
+    validate_type(rebuild_index, bool, "rebuild_index")
+
+    spatial_index_file_path = create_spatial_index_file_path(
+        file_path,
+        latitude_column_name=latitude_column_name,
+        longitude_column_name=longitude_column_name,
+        cell_size=cell_size,
+        cache_dir=cache_dir,
+    )
+    if not rebuild_index and os.path.exists(spatial_index_file_path):
+        return read_spatial_index(spatial_index_file_path)
+
+    nfdb_data_gdf = read_vector_file_into_gdf(
+        file_path,
+        cache_dir=cache_dir,
+        columns=[latitude_column_name, longitude_column_name],
+    )
+    spatial_index = create_spatial_index(
+        nfdb_data_gdf[latitude_column_name].to_numpy(dtype=float),
+        nfdb_data_gdf[longitude_column_name].to_numpy(dtype=float),
+        cell_size=cell_size,
+    )
+    write_spatial_index(spatial_index, spatial_index_file_path)
+
+    return spatial_index
+
+
+def query_spatial_index_bbox(
+    spatial_index: dict,
+    min_lat: float,
+    max_lat: float,
+    min_lon: float,
+    max_lon: float,
+) -> np.ndarray:
+    """
+    Find the points inside a latitude/longitude box, including its boundary
+
+    Parameters
+    ----------
+    spatial_index : dict
+        The output of `create_spatial_index` or `load_nfdb_spatial_index`
+    min_lat : float
+        The minimum latitude in degrees
+    max_lat : float
+        The maximum latitude in degrees
+    min_lon : float
+        The minimum longitude in degrees
+    max_lon : float
+        The maximum longitude in degrees
+
+    Returns
+    -------
+    positions : numpy.ndarray
+        The sorted positions of the points in the box
+    """
+    validate_type(spatial_index, dict, "spatial_index")
+
+    cell_size, grid_min_lat, grid_min_lon, number_of_rows, number_of_columns = spatial_index["grid"]
+    number_of_rows, number_of_columns = int(number_of_rows), int(number_of_columns)
+    first_row = max(int((min_lat - grid_min_lat) // cell_size), 0)
+    last_row = min(int((max_lat - grid_min_lat) // cell_size), number_of_rows - 1)
+    first_column = max(int((min_lon - grid_min_lon) // cell_size), 0)
+    last_column = min(int((max_lon - grid_min_lon) // cell_size), number_of_columns - 1)
+    if first_row > last_row or first_column > last_column:
+        return np.array([], dtype=np.int64)
+
+    # the cells of a row of the box are one slice of the sorted positions
+    rows = np.arange(first_row, last_row + 1)
+    slice_starts = spatial_index["cell_starts"][rows * number_of_columns + first_column]
+    slice_ends = spatial_index["cell_starts"][rows * number_of_columns + last_column + 1]
+    slice_lengths = slice_ends - slice_starts
+    slice_offsets = np.repeat(slice_starts - np.cumsum(slice_lengths) + slice_lengths, slice_lengths)
+    candidates = spatial_index["sorted_positions"][slice_offsets + np.arange(slice_lengths.sum())]
+
+    # only the points of the cells on the edge of the box can be outside it
+    latitudes = spatial_index["latitudes"][candidates]
+    longitudes = spatial_index["longitudes"][candidates]
+    positions = np.sort(
+        candidates[
+            (latitudes >= min_lat) & (latitudes <= max_lat)
+            & (longitudes >= min_lon) & (longitudes <= max_lon)
+        ]
+    )
+
+    return positions
+
+
+def query_spatial_index_radius(
+    spatial_index: dict,
+    centre_lat: float,
+    centre_lon: float,
+    radius_km: float,
+) -> tuple:
+    """
+    Find the points within a great-circle radius of a centre
+
+    Parameters
+    ----------
+    spatial_index : dict
+        The output of `create_spatial_index` or `load_nfdb_spatial_index`
+    centre_lat : float
+        The centre latitude in degrees
+    centre_lon : float
+        The centre longitude in degrees
+    radius_km : float
+        The radius in km
+
+    Returns
+    -------
+    positions : numpy.ndarray
+        The sorted positions of the points within the radius
+    distances_km : numpy.ndarray
+        The great-circle distances of the points to the centre in km
+    """
+    validate_type(spatial_index, dict, "spatial_index")
+
+    candidates = query_spatial_index_bbox(
+        spatial_index,
+        *create_great_circle_bounds(centre_lat, centre_lon, radius_km),
+    )
+    distances_km = calculate_great_circle_distance_km(
+        centre_lat,
+        centre_lon,
+        spatial_index["latitudes"][candidates],
+        spatial_index["longitudes"][candidates],
+    )
+    is_within_radius = distances_km <= radius_km
+
+    return candidates[is_within_radius], distances_km[is_within_radius]
+
+
+def query_spatial_index_nearest(
+    spatial_index: dict,
+    centre_lat: float,
+    centre_lon: float,
+    k: int = 1,
+) -> tuple:
+    """
+    Find the k points nearest to a centre by great-circle distance
+
+    The search radius starts at about one grid cell and doubles until it
+    holds k points, so the cost follows the local density of the points.
+
+    Parameters
+    ----------
+    spatial_index : dict
+        The output of `create_spatial_index` or `load_nfdb_spatial_index`
+    centre_lat : float
+        The centre latitude in degrees
+    centre_lon : float
+        The centre longitude in degrees
+    k : int, optional
+        The number of nearest points. Default is 1.
+
+    Returns
+    -------
+    positions : numpy.ndarray
+        The positions of the nearest points, nearest first. Fewer than k if
+        the index holds fewer points.
+    distances_km : numpy.ndarray
+        The great-circle distances of the points to the centre in km
+    """
+    validate_type(spatial_index, dict, "spatial_index")
+    validate_type(k, int, "k")
+    if k < 1:
+        raise ValueError(f"k should be at least 1 not {k}.")
+
+    k = min(k, len(spatial_index["sorted_positions"]))
+    # half the circumference reaches every point on the Earth
+    max_radius_km = float(calculate_great_circle_distance_km(0.0, 0.0, 0.0, 180.0))
+    radius_km = float(calculate_great_circle_distance_km(0.0, 0.0, 0.0, spatial_index["grid"][0]))
+    while True:
+        positions, distances_km = query_spatial_index_radius(
+            spatial_index, centre_lat, centre_lon, min(radius_km, max_radius_km)
+        )
+        if len(positions) >= k or radius_km >= max_radius_km:
+            break
+        radius_km *= 2
+
+    nearest = np.lexsort((positions, distances_km))[:k]
+
+    return positions[nearest], distances_km[nearest]
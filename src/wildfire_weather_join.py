@@ -0,0 +1,258 @@
+import numpy as np
+import pandas as pd
+from wildfire_instrumentation import instrument_function
+from wildfire_processing_functions import (
+    validate_type,
+    calculate_great_circle_distance_km,
+)
+
+
+def find_nearest_stations(
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    station_latitudes: np.ndarray,
+    station_longitudes: np.ndarray,
+    number_of_stations: int = 1,
+    chunk_size: int = 65536,
+) -> tuple:
+    """
+    Find the nearest weather stations of points by great-circle distance
+
+    The distances of a chunk of points to all stations are calculated at once,
+    so the memory use is bounded by `chunk_size` times the number of stations.
+
+    Parameters
+    ----------
+    latitudes : numpy.ndarray
+        The latitudes of the points in degrees
+    longitudes : numpy.ndarray
+        The longitudes of the points in degrees
+    station_latitudes : numpy.ndarray
+        The latitudes of the stations in degrees
+    station_longitudes : numpy.ndarray
+        The longitudes of the stations in degrees
+    number_of_stations : int, optional
+        The number of nearest stations of each point. Default is 1.
+    chunk_size : int, optional
+        The number of points per chunk. Default is 65536.
+
+    Returns
+    -------
+    station_indices : numpy.ndarray
+        The positions of the nearest stations as a (points, stations) array,
+        nearest first
+    distances_km : numpy.ndarray
+        The distances to the nearest stations in km, in the same shape
+    """
+    validate_type(number_of_stations, int, "number_of_stations")
+    validate_type(chunk_size, int, "chunk_size")
+    if not 1 <= number_of_stations <= len(station_latitudes):
+        raise ValueError(
+            f"The number_of_stations should be between 1 and the {len(station_latitudes)} "
+            f"stations not {number_of_stations}."
+        )
+
+    station_indices = np.empty((len(latitudes), number_of_stations), dtype=np.int64)
+    distances_km = np.empty((len(latitudes), number_of_stations), dtype=np.float64)
+    for chunk_start in range(0, len(latitudes), chunk_size):
+        chunk = slice(chunk_start, chunk_start + chunk_size)
+        chunk_distances_km = calculate_great_circle_distance_km(
+            latitudes[chunk, np.newaxis],
+            longitudes[chunk, np.newaxis],
+            station_latitudes[np.newaxis, :],
+            station_longitudes[np.newaxis, :],
+        )
+        # points with missing coordinates are matched to no station
+        chunk_distances_km[np.isnan(chunk_distances_km)] = np.inf
+        if number_of_stations < len(station_latitudes):
+            nearest = np.argpartition(chunk_distances_km, number_of_stations - 1, axis=1)[:, :number_of_stations]
+        else:
+            nearest = np.broadcast_to(np.arange(len(station_latitudes)), chunk_distances_km.shape)
+        nearest_distances_km = np.take_along_axis(chunk_distances_km, nearest, axis=1)
+        nearest_order = np.argsort(nearest_distances_km, axis=1, kind="stable")
+        station_indices[chunk] = np.take_along_axis(nearest, nearest_order, axis=1)
+        distances_km[chunk] = np.take_along_axis(nearest_distances_km, nearest_order, axis=1)
+
+    return station_indices, distances_km
+
+
+@instrument_function
+def join_fires_to_weather(
+    fires: pd.DataFrame,
+    weather: pd.DataFrame,
+    stations: pd.DataFrame,
+    variable_column_names: list,
+    fire_latitude_column_name: str = "LATITUDE",
+    fire_longitude_column_name: str = "LONGITUDE",
+    fire_year_column_name: str = "YEAR",
+    fire_month_column_name: str = "MONTH",
+    fire_day_column_name: str = "DAY",
+    weather_date_column_name: str = "weather_date",
+    weather_date_format: str = "%Y-%m-%d %H:%M",
+    station_column_name: str = "station_id",
+    station_latitude_column_name: str = "latitude",
+    station_longitude_column_name: str = "longitude",
+    number_of_stations: int = 1,
+    time_window_hours: int = 24,
+    report_hour: int = 23,
+    max_distance_km: float = None,
+) -> pd.DataFrame:
+    """
+    Attach the weather observed at the nearest stations before each fire was reported
+
+    Every fire is matched to its nearest stations by great-circle distance.
+    The weather of all stations is sorted once by station and time, and the
+    observations in the time window before each fire's report time are found
+    with two binary searches per fire and station. The last observation in the
+    window is the as-of value of each variable, and prefix sums give the
+    window mean, so there is no loop over the fires.
+
+    Parameters
+    ----------
+    fires : DataFrame or GeoDataFrame
+        The fires, e.g. the output of `filter_nfdb_data`
+    weather : DataFrame
+        The hourly weather of all stations, e.g. the concatenated outputs of
+        `filter_whitesands_f4_data` with a station column
+    stations : DataFrame
+        The stations with their id, latitude, and longitude columns
+    variable_column_names : list
+        The weather columns to attach, e.g. ["wind_speed_kmh", "relative_humidity"]
+    fire_latitude_column_name : str, optional
+        The name of the fire latitude column. Default is "LATITUDE".
+    fire_longitude_column_name : str, optional
+        The name of the fire longitude column. Default is "LONGITUDE".
+    fire_year_column_name : str, optional
+        The name of the report year column. Default is "YEAR".
+    fire_month_column_name : str, optional
+        The name of the report month column. Default is "MONTH".
+    fire_day_column_name : str, optional
+        The name of the report day column. Default is "DAY".
+    weather_date_column_name : str, optional
+        The name of the weather date column. Default is "weather_date".
+    weather_date_format : str, optional
+        The format of the weather dates, if they are strings.
+        Default is "%Y-%m-%d %H:%M".
+    station_column_name : str, optional
+        The name of the station id column of the weather and the stations.
+        Default is "station_id".
+    station_latitude_column_name : str, optional
+        The name of the station latitude column. Default is "latitude".
+    station_longitude_column_name : str, optional
+        The name of the station longitude column. Default is "longitude".
+    number_of_stations : int, optional
+        The number of nearest stations joined to each fire. Default is 1.
+    time_window_hours : int, optional
+        The length of the time window before the report time in hours.
+        Default is 24.
+    report_hour : int, optional
+        The hour of the report day the time window ends at (inclusive).
+        Default is 23, so the weather of the whole report day is included.
+    max_distance_km : float, optional
+        The maximum distance of a joined station. The weather of farther
+        stations is left missing. Default is None, which joins any distance.
+
+    Returns
+    -------
+    joined_fires : DataFrame or GeoDataFrame
+        One row per fire and joined station, with the columns of `fires` and
+        the station id, "station_rank" (1 is the nearest), "station_distance_km",
+        "number_of_observations" in the window, and for each variable its
+        as-of value and its window mean as "<variable>_window_mean"
+    """
+    validate_type(fires, pd.DataFrame, "fires")
+    validate_type(weather, pd.DataFrame, "weather")
+    validate_type(stations, pd.DataFrame, "stations")
+    validate_type(variable_column_names, list, "variable_column_names")
+    validate_type(time_window_hours, int, "time_window_hours")
+    validate_type(report_hour, int, "report_hour")
+    if time_window_hours < 1:
+        raise ValueError(f"The time_window_hours should be at least 1 not {time_window_hours}.")
+    if not 0 <= report_hour <= 23:
+        raise ValueError(f"The report_hour should be between 0 and 23 not {report_hour}.")
+    if max_distance_km is not None:
+        validate_type(max_distance_km, float, "max_distance_km")
+    if stations[station_column_name].duplicated().any():
+        raise ValueError(f"The station ids in the {station_column_name} column should be unique.")
+
+    # the nearest stations of every fire
+    station_indices, distances_km = find_nearest_stations(
+        fires[fire_latitude_column_name].to_numpy(dtype=float),
+        fires[fire_longitude_column_name].to_numpy(dtype=float),
+        stations[station_latitude_column_name].to_numpy(dtype=float),
+        stations[station_longitude_column_name].to_numpy(dtype=float),
+        number_of_stations=number_of_stations,
+    )
+    fire_positions = np.repeat(np.arange(len(fires)), number_of_stations)
+    station_indices = station_indices.ravel()
+    distances_km = distances_km.ravel()
+
+    # the report times of the fires in seconds, with missing dates as NaT
+    report_times = pd.to_datetime(
+        pd.DataFrame(
+            {
+                "year": fires[fire_year_column_name].to_numpy(),
+                "month": fires[fire_month_column_name].to_numpy(),
+                "day": fires[fire_day_column_name].to_numpy(),
+            }
+        ),
+        errors="coerce",
+    ) + pd.Timedelta(hours=report_hour)
+    report_seconds = report_times.to_numpy(dtype="datetime64[s]").astype(np.int64)[fire_positions]
+    is_joinable = ~report_times.isna().to_numpy()[fire_positions] & np.isfinite(distances_km)
+    if max_distance_km is not None:
+        is_joinable &= distances_km <= max_distance_km
+
+    # sort the weather by station and time, as one integer key per observation
+    weather_station_indices = pd.Index(stations[station_column_name]).get_indexer(weather[station_column_name])
+    weather_times = weather[weather_date_column_name]
+    if not pd.api.types.is_datetime64_any_dtype(weather_times):
+        weather_times = pd.to_datetime(weather_times, format=weather_date_format, errors="coerce")
+    weather_seconds = weather_times.to_numpy(dtype="datetime64[s]").astype(np.int64)
+    is_valid_observation = (weather_station_indices >= 0) & ~weather_times.isna().to_numpy()
+    valid_observations = np.flatnonzero(is_valid_observation)
+    if len(valid_observations) > 0:
+        min_seconds = weather_seconds[valid_observations].min()
+        time_span = weather_seconds[valid_observations].max() - min_seconds + 1
+    else:
+        min_seconds, time_span = 0, 1
+    weather_keys = (
+        weather_station_indices[valid_observations].astype(np.int64) * time_span
+        + weather_seconds[valid_observations] - min_seconds
+    )
+    key_order = np.argsort(weather_keys, kind="stable")
+    weather_keys = weather_keys[key_order]
+    observation_positions = valid_observations[key_order]
+
+    # the window (report time - time window, report time] of each fire and
+    # station, clipped to the keys of the station
+    window_end_seconds = np.clip(report_seconds - min_seconds, -1, time_span - 1)
+    window_start_seconds = np.clip(report_seconds - time_window_hours * 3600 - min_seconds, -1, time_span - 1)
+    window_starts = np.searchsorted(weather_keys, station_indices * time_span + window_start_seconds, side="right")
+    window_ends = np.searchsorted(weather_keys, station_indices * time_span + window_end_seconds, side="right")
+    window_ends = np.where(is_joinable, window_ends, window_starts)
+    has_observations = window_ends > window_starts
+    # the as-of observation is the last one in the window
+    as_of_positions = observation_positions[window_ends[has_observations] - 1]
+
+    joined_fires = fires.iloc[fire_positions].copy()
+    joined_fires[station_column_name] = stations[station_column_name].to_numpy()[station_indices]
+    joined_fires["station_rank"] = np.tile(np.arange(1, number_of_stations + 1), len(fires))
+    joined_fires["station_distance_km"] = distances_km
+    joined_fires["number_of_observations"] = window_ends - window_starts
+    for variable_column_name in variable_column_names:
+        values = pd.to_numeric(weather[variable_column_name], errors="coerce").to_numpy(dtype=float)
+        sorted_values = values[observation_positions]
+        is_observed = ~np.isnan(sorted_values)
+        # prefix sums of the values and counts give the window means
+        value_sums = np.concatenate([[0.0], np.cumsum(np.where(is_observed, sorted_values, 0.0))])
+        value_counts = np.concatenate([[0], np.cumsum(is_observed)])
+        window_counts = value_counts[window_ends] - value_counts[window_starts]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            window_means = (value_sums[window_ends] - value_sums[window_starts]) / window_counts
+        as_of_values = np.full(len(window_ends), np.nan)
+        as_of_values[has_observations] = values[as_of_positions]
+        joined_fires[variable_column_name] = as_of_values
+        joined_fires[f"{variable_column_name}_window_mean"] = np.where(window_counts > 0, window_means, np.nan)
+
+    return joined_fires
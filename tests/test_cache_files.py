@@ -0,0 +1,26 @@
+import os
+import pandas as pd
+from wildfire_processing_functions import write_cache_file
+
+
+def test_write_cache_file_leaves_unsupported_data_uncached(tmp_path):
+    cache_file_path = str(tmp_path / "cache" / "data_0123456789abcdef.parquet")
+    # a column mixing numbers and strings cannot be written to parquet
+    data_df = pd.DataFrame({"value": pd.Series([1, "x"], dtype=object)})
+
+    assert not write_cache_file(data_df, cache_file_path)
+    assert os.listdir(tmp_path / "cache") == []
+
+
+def test_write_cache_file_removes_stale_cache_files_only(tmp_path):
+    stale_file_path = tmp_path / "data_fedcba9876543210.parquet"
+    other_file_path = tmp_path / "data_extra_fedcba9876543210.parquet"
+    stale_file_path.write_bytes(b"")
+    other_file_path.write_bytes(b"")
+    cache_file_path = str(tmp_path / "data_0123456789abcdef.parquet")
+
+    assert write_cache_file(pd.DataFrame({"value": [1, 2]}), cache_file_path)
+    assert sorted(os.listdir(tmp_path)) == [
+        "data_0123456789abcdef.parquet",
+        "data_extra_fedcba9876543210.parquet",
+    ]
@@ -0,0 +1,40 @@
+import geopandas as gpd
+import matplotlib
+import matplotlib.pyplot as plt
+import pytest
+from wildfire_processing_functions import (
+    plot_nfdb_fire_density_map,
+    plot_nfdb_fire_density_map_by_year,
+)
+
+matplotlib.use("Agg")
+
+CONFIG = {
+    "NFDB_data": {
+        "region_of_interest": {
+            "region_centre_latitude_column_name": "LATITUDE",
+            "region_centre_longitude_column_name": "LONGITUDE",
+        },
+        "time_of_interest": {"year_column_name": "YEAR"},
+        "fire_conditions": {"fire_size_column_name": "SIZE_HA"},
+    },
+    "density_map": {"number_of_cells": 10},
+}
+
+
+@pytest.mark.parametrize("plot_function", [plot_nfdb_fire_density_map, plot_nfdb_fire_density_map_by_year])
+@pytest.mark.parametrize("number_of_fires", [0, 3])
+def test_density_maps_draw_with_and_without_fires(plot_function, number_of_fires):
+    large_fires = gpd.GeoDataFrame(
+        {
+            "LATITUDE": [58.0, 58.5, 59.0][:number_of_fires],
+            "LONGITUDE": [-115.0, -114.5, -114.0][:number_of_fires],
+            "YEAR": [2010, 2015, 2020][:number_of_fires],
+            "SIZE_HA": [250.0, 1000.0, 5000.0][:number_of_fires],
+        }
+    )
+
+    fig = plot_function(CONFIG, large_fires)
+
+    assert len(fig.axes[0].images) == (1 if number_of_fires > 0 else 0)
+    plt.close(fig)
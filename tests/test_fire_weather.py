@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+from wildfire_fire_weather import (
+    FIRE_WEATHER_INDEX_NAMES,
+    create_daily_fire_weather,
+    calculate_fire_weather_indices,
+)
+
+
+# the first days of the standard test data of the FWI system
+# (Van Wagner and Pickett 1985), started from FFMC 85, DMC 6, and DC 15
+VAN_WAGNER_TEST_WEATHER = pd.DataFrame(
+    {
+        "date": pd.to_datetime(["2021-04-13", "2021-04-14", "2021-04-15"]),
+        "temperature": [17.0, 20.0, 8.5],
+        "relative_humidity": [42.0, 21.0, 40.0],
+        "wind_speed": [25.0, 25.0, 17.0],
+        "precipitation": [0.0, 2.4, 0.0],
+    }
+)
+VAN_WAGNER_TEST_CODES = np.array(
+    [
+        [87.7, 8.5, 19.0, 10.9, 8.5, 10.1],
+        [86.2, 10.4, 23.6, 8.8, 10.4, 9.3],
+        [87.0, 11.8, 26.1, 6.5, 11.7, 7.6],
+    ]
+)
+
+
+def test_calculate_fire_weather_indices_matches_van_wagner_test_days():
+    fire_weather = calculate_fire_weather_indices(VAN_WAGNER_TEST_WEATHER)
+
+    np.testing.assert_allclose(
+        fire_weather[FIRE_WEATHER_INDEX_NAMES].to_numpy(), VAN_WAGNER_TEST_CODES, atol=0.05
+    )
+
+
+def test_calculate_fire_weather_indices_restarts_after_a_gap():
+    weather = VAN_WAGNER_TEST_WEATHER.copy()
+    weather.loc[2, "date"] = pd.Timestamp("2021-06-15")
+
+    fire_weather = calculate_fire_weather_indices(weather, max_gap_days=30)
+
+    # the third day starts a new season, so it equals the first day in June
+    restarted = calculate_fire_weather_indices(weather.iloc[[2]].reset_index(drop=True))
+    np.testing.assert_allclose(
+        fire_weather[FIRE_WEATHER_INDEX_NAMES].to_numpy()[2],
+        restarted[FIRE_WEATHER_INDEX_NAMES].to_numpy()[0],
+    )
+
+
+def test_create_daily_fire_weather_uses_noon_values_and_rain_to_noon():
+    hourly_weather = pd.DataFrame(
+        {
+            "weather_date": [
+                "2021-04-12 13:00",
+                "2021-04-13 06:00",
+                "2021-04-13 12:00",
+                "2021-04-13 15:00",
+            ],
+            "temperature": [5.0, 10.0, 17.0, 25.0],
+            "maximum_temperature": [30.0, 30.0, 30.0, 30.0],
+            "relative_humidity": [80.0, 60.0, 42.0, 20.0],
+            "wind_speed_kmh": [5.0, 10.0, 25.0, 40.0],
+            "precipitation": [1.0, 0.5, 0.0, 3.0],
+        }
+    )
+
+    daily_weather = create_daily_fire_weather(hourly_weather, date_column_name="weather_date")
+
+    noon = daily_weather[daily_weather["date"] == pd.Timestamp("2021-04-13")].iloc[0]
+    assert noon["temperature"] == 17.0
+    assert noon["relative_humidity"] == 42.0
+    assert noon["wind_speed"] == 25.0
+    # 13:00 on the day before to noon, but not the afternoon rain
+    assert noon["precipitation"] == pytest.approx(1.5)
+
+
+def test_create_daily_fire_weather_reports_missing_columns():
+    hourly_weather = pd.DataFrame({"weather_date": ["2021-04-13 12:00"], "maximum_temperature": [17.0]})
+
+    with pytest.raises(ValueError, match="temperature"):
+        create_daily_fire_weather(hourly_weather, date_column_name="weather_date")
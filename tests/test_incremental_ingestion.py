@@ -0,0 +1,91 @@
+import pandas as pd
+import pytest
+from wildfire_incremental_ingestion import (
+    ingest_whitesands_f4_data_incrementally,
+    read_incrementally_ingested_whitesands_f4_data,
+)
+
+
+HEADER_LINE = "weather_date,c_wnd_drct_type,minimum_temperature,maximum_temperature,relative_humidity\n"
+FILTER_ARGUMENTS = {
+    "date_column_name": "weather_date",
+    "start_year": 2020,
+    "end_year": 2021,
+    "start_month": 5,
+    "end_month": 8,
+}
+
+
+def create_row_lines(start_hour, number_of_rows):
+    return [
+        f"2021-07-01 {hour:02d}:00,N,10.0,20.0,{40 + hour}.0\n"
+        for hour in range(start_hour, start_hour + number_of_rows)
+    ]
+
+
+def ingest(file_path, state_dir):
+    return ingest_whitesands_f4_data_incrementally(
+        str(file_path),
+        state_dir=str(state_dir),
+        wind_direction_column_name="c_wnd_drct_type",
+        **FILTER_ARGUMENTS,
+    )
+
+
+def read_ingested_data(file_path, state_dir):
+    return read_incrementally_ingested_whitesands_f4_data(str(file_path), state_dir=str(state_dir), **FILTER_ARGUMENTS)
+
+
+def test_ingestion_reads_only_the_appended_rows(tmp_path):
+    file_path = tmp_path / "Whitesands_F4.csv"
+    file_path.write_text(HEADER_LINE + "".join(create_row_lines(0, 3)))
+    ingest(file_path, tmp_path / "state")
+    with open(file_path, "a") as f:
+        f.write("".join(create_row_lines(3, 2)))
+
+    ingestion_result = ingest(file_path, tmp_path / "state")
+
+    assert ingestion_result["number_of_new_rows"] == 2
+    assert ingestion_result["new_filtered_rows"]["relative_humidity"].tolist() == [43.0, 44.0]
+    assert ingestion_result["whitesands_f4_summary"]["number_of_measurements"].sum() == 5
+    assert len(read_ingested_data(file_path, tmp_path / "state")) == 5
+
+
+def test_ingestion_reads_a_complete_last_row_without_a_newline(tmp_path):
+    file_path = tmp_path / "Whitesands_F4.csv"
+    file_path.write_text(HEADER_LINE + "".join(create_row_lines(0, 3)).rstrip("\n"))
+
+    ingestion_result = ingest(file_path, tmp_path / "state")
+
+    assert ingestion_result["number_of_new_rows"] == 3
+    assert len(read_ingested_data(file_path, tmp_path / "state")) == 3
+
+
+def test_ingestion_waits_for_a_partly_written_last_row(tmp_path):
+    file_path = tmp_path / "Whitesands_F4.csv"
+    row_lines = create_row_lines(0, 3)
+    file_path.write_text(HEADER_LINE + "".join(row_lines[:2]) + row_lines[2][:20])
+
+    assert ingest(file_path, tmp_path / "state")["number_of_new_rows"] == 2
+    with open(file_path, "a") as f:
+        f.write(row_lines[2][20:])
+
+    assert ingest(file_path, tmp_path / "state")["number_of_new_rows"] == 1
+    assert len(read_ingested_data(file_path, tmp_path / "state")) == 3
+
+
+def test_ingestion_starts_over_when_a_last_row_is_continued(tmp_path):
+    file_path = tmp_path / "Whitesands_F4.csv"
+    row_lines = create_row_lines(0, 3)
+    # the last row has all its columns but its relative humidity is cut short
+    file_path.write_text(HEADER_LINE + "".join(row_lines[:2]) + row_lines[2][:-4])
+    ingest(file_path, tmp_path / "state")
+    with open(file_path, "a") as f:
+        f.write(row_lines[2][-4:])
+
+    ingestion_result = ingest(file_path, tmp_path / "state")
+
+    assert ingestion_result["number_of_new_rows"] == 3
+    ingested_data = read_ingested_data(file_path, tmp_path / "state")
+    assert ingested_data["relative_humidity"].tolist() == pytest.approx([40.0, 41.0, 42.0])
+    assert ingestion_result["whitesands_f4_summary"]["number_of_measurements"].sum() == 3
@@ -0,0 +1,13 @@
+import os
+import pandas as pd
+import pytest
+from wildfire_memo_cache import write_memo_file
+
+
+@pytest.mark.parametrize("values", [[1, "x"], ["x", 1.5]])
+def test_write_memo_file_leaves_unsupported_data_unmemoized(tmp_path, values):
+    # pyarrow raises ArrowInvalid or ArrowTypeError for these columns
+    data_df = pd.DataFrame({"value": pd.Series(values, dtype=object)})
+
+    assert write_memo_file(data_df, str(tmp_path), memo_key="0123456789abcdef", max_size_mb=1.0) == 0
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,20 @@
+import matplotlib.pyplot as plt
+import pytest
+from wildfire_processing_functions import render_figures
+
+
+def plot_line(values):
+    fig, ax = plt.subplots()
+    ax.plot(values)
+    return fig
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_render_figures_keeps_the_backend_of_the_caller(tmp_path, max_workers):
+    plt.switch_backend("pdf")
+    figure_tasks = [("first", plot_line, ([1, 2],)), ("second", plot_line, ([2, 1],))]
+
+    figure_paths = render_figures(figure_tasks, str(tmp_path), max_workers=max_workers)
+
+    assert sorted(figure_paths) == [str(tmp_path / "first.png"), str(tmp_path / "second.png")]
+    assert plt.get_backend() == "pdf"
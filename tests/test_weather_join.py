@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+from wildfire_weather_join import join_fires_to_weather
+
+
+STATIONS = pd.DataFrame(
+    {
+        "station_id": ["F4", "F5"],
+        "latitude": [52.5, 58.0],
+        "longitude": [-112.8, -115.0],
+    }
+)
+
+
+def create_fires(latitudes, longitudes, days):
+    return pd.DataFrame(
+        {
+            "LATITUDE": latitudes,
+            "LONGITUDE": longitudes,
+            "YEAR": [2021] * len(days),
+            "MONTH": [7] * len(days),
+            "DAY": days,
+        }
+    )
+
+
+def test_join_fires_to_weather_window_edges():
+    # the report time is 2021-07-02 23:00, so the window is (07-01 23:00, 07-02 23:00]
+    weather = pd.DataFrame(
+        {
+            "station_id": ["F4", "F4", "F4", "F4", "F4"],
+            "weather_date": [
+                "2021-07-01 23:00",
+                "2021-07-02 00:00",
+                "2021-07-02 12:00",
+                "2021-07-02 23:00",
+                "2021-07-03 00:00",
+            ],
+            "temperature": [100.0, 10.0, np.nan, 30.0, 200.0],
+        }
+    )
+
+    joined_fires = join_fires_to_weather(
+        create_fires([52.6], [-112.9], [2]), weather, STATIONS, ["temperature"]
+    )
+
+    joined_fire = joined_fires.iloc[0]
+    assert joined_fire["station_id"] == "F4"
+    assert joined_fire["number_of_observations"] == 3
+    # the observation at the end of the window is the as-of value
+    assert joined_fire["temperature"] == 30.0
+    # the missing value is left out of the mean
+    assert joined_fire["temperature_window_mean"] == 20.0
+
+
+def test_join_fires_to_weather_as_of_value_can_be_missing():
+    weather = pd.DataFrame(
+        {
+            "station_id": ["F4", "F4"],
+            "weather_date": ["2021-07-02 12:00", "2021-07-02 23:00"],
+            "temperature": [10.0, np.nan],
+        }
+    )
+
+    joined_fires = join_fires_to_weather(
+        create_fires([52.6], [-112.9], [2]), weather, STATIONS, ["temperature"]
+    )
+
+    assert np.isnan(joined_fires["temperature"].iloc[0])
+    assert joined_fires["temperature_window_mean"].iloc[0] == 10.0
+
+
+def test_join_fires_to_weather_missing_stations():
+    # F5 has no observations, and G1 is not one of the stations
+    weather = pd.DataFrame(
+        {
+            "station_id": ["F4", "G1"],
+            "weather_date": ["2021-07-02 12:00", "2021-07-02 12:00"],
+            "temperature": [10.0, 50.0],
+        }
+    )
+
+    joined_fires = join_fires_to_weather(
+        create_fires([52.6, 58.1], [-112.9, -115.1], [2, 2]), weather, STATIONS, ["temperature"]
+    )
+
+    assert joined_fires["station_id"].tolist() == ["F4", "F5"]
+    assert joined_fires["number_of_observations"].tolist() == [1, 0]
+    assert joined_fires["temperature"].iloc[0] == 10.0
+    assert np.isnan(joined_fires["temperature"].iloc[1])
+    assert np.isnan(joined_fires["temperature_window_mean"].iloc[1])
+
+
+def test_join_fires_to_weather_nearest_stations_and_unjoinable_fires():
+    weather = pd.DataFrame(
+        {
+            "station_id": ["F4", "F5"],
+            "weather_date": ["2021-07-02 12:00", "2021-07-02 12:00"],
+            "temperature": [10.0, 20.0],
+        }
+    )
+    fires = create_fires([52.6, 52.6, 40.0], [-112.9, -112.9, -100.0], [2, 2, 2])
+    fires.loc[1, "DAY"] = np.nan
+
+    joined_fires = join_fires_to_weather(
+        fires, weather, STATIONS, ["temperature"], number_of_stations=2, max_distance_km=500.0
+    )
+
+    assert len(joined_fires) == 6
+    assert joined_fires["station_rank"].tolist() == [1, 2, 1, 2, 1, 2]
+    # the first fire is within 500 km of F4 only
+    assert joined_fires["temperature"].iloc[0] == 10.0
+    assert np.isnan(joined_fires["temperature"].iloc[1])
+    # the fire without a date and the fire far from all stations are not joined
+    assert joined_fires["number_of_observations"].iloc[2:].tolist() == [0, 0, 0, 0]
+    assert joined_fires["temperature"].iloc[2:].isna().all()